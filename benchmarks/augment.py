@@ -0,0 +1,84 @@
+# Balanceamento do multiclasse em um corpus sintético desbalanceado (100 mil linhas por padrão): loop original
+# (SynonymAug texto a texto, em todas as linhas das classes minoritárias) contra train_multiclasse.balance_multiclasse
+# (aumento só até min_samples, em um pool de processos, com semente fixa e cache em disco) com o cache vazio e cheio.
+# Também confere que duas execuções com o cache vazio produzem o mesmo conjunto. O cache fica em uma pasta temporária.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+from collections import Counter
+import numpy as np
+
+import src.models.augment as augment_module
+from src.models.augment import AugmentCache
+from src.models.rules import classificar_exame
+from src.models.train_multiclasse import BALANCE_PARAMS, balance_multiclasse
+
+# Participação de cada tipo de exame no corpus sintético (as três últimas classes ficam abaixo do alvo)
+PROPORCOES = {"tomografia": 0.40, "ressonância magnética": 0.30, "ultrassom": 0.20, "radiografia": 0.07, "eletrocardiograma": 0.025, "densitometria": 0.005}
+REGIOES = ["crânio", "tórax", "abdome total", "coluna lombar", "joelho direito", "pelve", "mão esquerda", "ombro"]
+
+def synthetic_corpus(linhas, seed=42): # Textos de pedidos de exame com as classes nas proporções acima.
+    rng = np.random.default_rng(seed)
+    exames = rng.choice(list(PROPORCOES), linhas, p=list(PROPORCOES.values()))
+    regioes = rng.choice(REGIOES, linhas)
+    return [{"texto": f"Solicito {exame} de {regiao} para investigação, paciente {i}"} for i, (exame, regiao) in enumerate(zip(exames, regioes))]
+
+def legacy_balance(dados, min_samples, aug_p, random_state): # balance_multiclasse original: um SynonymAug.augment por linha de cada classe minoritária, em série.
+    from nlpaug.augmenter.word import SynonymAug
+    from sklearn.utils import resample
+    dados_multiclasse = [
+        {"texto": d["texto"], "label": classificar_exame(d["texto"])}
+        for d in dados if classificar_exame(d["texto"]) is not None
+    ]
+    contagem = Counter([d["label"] for d in dados_multiclasse])
+    aug = SynonymAug(aug_p=aug_p)
+    for d in dados_multiclasse.copy():
+        if contagem[d["label"]] < min_samples:
+            texto_aumentado = aug.augment(d["texto"])[0]
+            dados_multiclasse.append({"texto": texto_aumentado, "label": d["label"]})
+    aumentados = len(dados_multiclasse) - sum(contagem.values())
+    balanced = []
+    for label in set([d["label"] for d in dados_multiclasse]):
+        dados_classe = [d for d in dados_multiclasse if d["label"] == label]
+        if len(dados_classe) < min_samples:
+            dados_classe = resample(dados_classe, replace=True, n_samples=min_samples, random_state=random_state)
+        balanced.extend(dados_classe)
+    return balanced, aumentados
+
+def timed(func, *args):
+    inicio = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--min-samples", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=augment_module.AUG_WORKERS)
+    args = parser.parse_args()
+
+    BALANCE_PARAMS["min_samples"] = args.min_samples
+    augment_module.AUG_WORKERS = args.workers
+    dados = synthetic_corpus(args.linhas)
+
+    (_, aumentos_original), t_original = timed(legacy_balance, dados, args.min_samples, BALANCE_PARAMS["aug_p"], BALANCE_PARAMS["random_state"])
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for execucao in ("cache vazio", "cache cheio", "cache vazio (2ª vez)"):
+            if execucao != "cache cheio":
+                augment_module._cache = AugmentCache(os.path.join(pasta, f"aumentos_{len(resultados)}.db"))
+            balanceados, tempo = timed(balance_multiclasse, dados)
+            resultados.append((execucao, balanceados, tempo))
+            if len(resultados) == 1:
+                aumentos_novo = len(augment_module._cache)
+
+    print(f"{args.linhas:,} linhas, min_samples={args.min_samples:,}, {args.workers} processos")
+    print(f"  original (em série, todas as linhas minoritárias): {aumentos_original:,} textos aumentados, {t_original:.2f} s")
+    for execucao, balanceados, tempo in resultados:
+        print(f"  balance_multiclasse, {execucao}: {tempo:.2f} s ({t_original / tempo:.1f}x)")
+    print(f"  textos aumentados pela nova versão (só até min_samples): {aumentos_novo:,}")
+    print(f"  mesmo conjunto nas duas execuções com cache vazio: {resultados[0][1] == resultados[2][1]}")
@@ -0,0 +1,73 @@
+# Mede localmente a latência da cloud function com o armazenamento local (src/cloud/storage.py:LocalStorage):
+# partida a frio (processo novo: importações + modelos carregados no escopo global + primeira invocação) e invocações
+# quentes no mesmo processo. O envio de mensagens fica desligado.
+# Repete as etapas de inicialização do cloud_function.py, que depende do functions_framework e do google-cloud-storage.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+
+BUCKET = "bucket-exames"
+
+def invoke(arquivos, invocacoes, chunksize): # Executado no processo filho: inicialização global seguida das invocações.
+    inicio = time.perf_counter()
+    from src.cloud.handler import handle_object
+    from src.cloud.storage import get_storage
+    from src.models.classifier import get_classifier
+    storage_backend = get_storage()
+    get_classifier()
+    tempos = {"inicializacao": time.perf_counter() - inicio, "invocacoes": []}
+    for i in range(invocacoes):
+        nome = arquivos[i % len(arquivos)]
+        t = time.perf_counter()
+        resultado = handle_object(storage_backend, BUCKET, nome, send=False, chunksize=chunksize)
+        tempos["invocacoes"].append({"arquivo": nome, "linhas": resultado["linhas"], "saida": resultado["saida"], "tempo": time.perf_counter() - t})
+    print(json.dumps(tempos))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invocacoes", type=int, default=6)
+    parser.add_argument("--chunksize", type=int, default=500)
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    arquivos = ["raw/sample_nao_estruturados.csv", "raw/sample_estruturados.csv"]
+    if args.filho:
+        invoke(arquivos, args.invocacoes, args.chunksize)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as raiz:
+        for nome in arquivos:
+            destino = os.path.join(raiz, BUCKET, nome)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            shutil.copy(os.path.join("data", nome), destino)
+
+        inicio = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--filho", "--invocacoes", str(args.invocacoes), "--chunksize", str(args.chunksize)],
+            capture_output=True, text=True, env={**os.environ, "STORAGE_LOCAL_ROOT": raiz, "PYTHONPATH": os.getcwd()},
+        )
+        total = time.perf_counter() - inicio
+        if proc.returncode != 0:
+            print(proc.stderr)
+            sys.exit(1)
+        tempos = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        invocacoes = tempos["invocacoes"]
+        partida = total - sum(i["tempo"] for i in invocacoes[1:])
+        print(f"partida a frio (processo + inicialização global + 1ª invocação): {partida:.2f} s")
+        print(f"  inicialização global (importações + modelos): {tempos['inicializacao']:.2f} s")
+        for i, invocacao in enumerate(invocacoes):
+            print(f"  invocação {i + 1} ({'fria' if i == 0 else 'quente'}): {invocacao['arquivo']} ({invocacao['linhas']} linhas) em {invocacao['tempo']:.3f} s")
+
+        # Cada entrada gera o seu próprio objeto de saída
+        import pandas as pd
+        for nome in arquivos:
+            saida = os.path.join(raiz, BUCKET, *[i["saida"] for i in invocacoes if i["arquivo"] == nome][0].split("/"))
+            print(f"  {os.path.relpath(saida, raiz)}: {len(pd.read_parquet(saida))} linhas")
@@ -0,0 +1,57 @@
+# Compara a latência por arquivo entre o caminho frio (um processo novo por CSV, como o monitor.py fazia)
+# e o caminho quente (lotes enviados ao daemon do server.py com os modelos já carregados).
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from http.server import ThreadingHTTPServer
+import subprocess
+import threading
+import argparse
+import time
+import pandas as pd
+
+from server import ClassifierHandler, predict_remote
+from src.models.classifier import get_classifier
+
+COLD_SCRIPT = (
+    "import pandas as pd\n"
+    "from src.models.predict import predict_exam_batch\n"
+    "textos = pd.read_csv({path!r})['DS_RECEITA'].fillna('').astype(str).tolist()[:{rows}]\n"
+    "predict_exam_batch(textos)\n"
+)
+
+def cold_run(path, rows): # Um interpretador novo: import do torch + carga dos modelos + inferência.
+    inicio = time.time()
+    subprocess.run([sys.executable, "-c", COLD_SCRIPT.format(path=path, rows=rows)], check=True, capture_output=True)
+    return time.time() - inicio
+
+def warm_run(textos, port): # Apenas a inferência, via HTTP, no daemon já aquecido.
+    inicio = time.time()
+    predict_remote(textos, port=port)
+    return time.time() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivo", default=os.path.join("data", "raw", "sample_nao_estruturados.csv"))
+    parser.add_argument("--linhas", type=int, default=500)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    textos = pd.read_csv(args.arquivo)["DS_RECEITA"].fillna("").astype(str).tolist()[:args.linhas]
+
+    frios = [cold_run(args.arquivo, args.linhas) for _ in range(args.repeticoes)]
+
+    # Sobe o daemon numa porta livre dentro deste processo
+    inicio = time.time()
+    get_classifier()
+    carga = time.time() - inicio
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ClassifierHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    quentes = [warm_run(textos, server.server_address[1]) for _ in range(args.repeticoes)]
+    server.shutdown()
+
+    print(f"Linhas por arquivo: {len(textos)} | repetições: {args.repeticoes}")
+    print(f"Frio  (python novo por arquivo): média {sum(frios)/len(frios):.2f} s | " + ", ".join(f"{t:.2f}" for t in frios))
+    print(f"Carga única dos modelos no daemon: {carga:.2f} s")
+    print(f"Quente (daemon já carregado):    média {sum(quentes)/len(quentes):.2f} s | " + ", ".join(f"{t:.2f}" for t in quentes))
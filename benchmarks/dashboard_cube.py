@@ -0,0 +1,69 @@
+# Compara as consultas do dashboard feitas no agregado diário (src/data/aggregates.py) com o filtro anterior
+# (cópia do DataFrame + pd.to_datetime + value_counts a cada interação): confere que os números são os mesmos e
+# mede a latência de uma consulta de 30 dias e de todo o histórico conforme o histórico cresce.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from src.data.aggregates import AggregateCube, build_aggregate
+from src.models.rules import LABEL_MAP, NAO_EXAME
+
+def synthetic_processed(anos, linhas_por_dia, seed=42): # Dataset processado sintético cobrindo `anos` anos a partir de 2020.
+    rng = np.random.default_rng(seed)
+    n = int(anos * 365 * linhas_por_dia)
+    exames = np.array(list(LABEL_MAP.values()) + [NAO_EXAME], dtype=object)
+    datas = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, int(anos * 365), n), unit="D")
+    return pd.DataFrame({
+        "DATA": datas.strftime("%Y-%m-%d"),
+        "SOLICITANTE": rng.choice([f"Médico {i}" for i in range(300)], n),
+        "exame_resultado": rng.choice(exames, n),
+    })
+
+def legacy_query(df, data_inicio, data_fim): # Versão anterior do dashboard.
+    df_copy = df.copy()
+    df_copy['DATA'] = pd.to_datetime(df_copy['DATA'], format='%Y-%m-%d', errors='coerce')
+    df_filtered = df_copy[(df_copy['DATA'] >= data_inicio) & (df_copy['DATA'] <= data_fim)]
+    return len(df_filtered), df_filtered['SOLICITANTE'].value_counts(), df_filtered['exame_resultado'].value_counts()
+
+def timed(func, *args, repeticoes=5):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        result = func(*args)
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return result, melhor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--anos", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--linhas-por-dia", type=int, default=300)
+    args = parser.parse_args()
+
+    for anos in args.anos:
+        estruturado = synthetic_processed(anos / 2, args.linhas_por_dia, seed=1)
+        nao_estruturado = synthetic_processed(anos, args.linhas_por_dia, seed=2)
+        resultado = pd.concat([estruturado, nao_estruturado], ignore_index=True)
+        cubo = build_aggregate(estruturado, nao_estruturado)
+        cube = AggregateCube(cubo)
+
+        inicio_30, fim_30 = pd.Timestamp("2020-03-01"), pd.Timestamp("2020-03-30")
+        fim_total = pd.Timestamp("2020-01-01") + pd.Timedelta(days=int(anos * 365))
+        for data_inicio, data_fim in ((inicio_30, fim_30), (pd.Timestamp("2020-01-01"), fim_total)):
+            total, por_solicitante, por_exame = legacy_query(resultado, data_inicio, data_fim)
+            consulta = cube.query(data_inicio, data_fim)
+            assert consulta["total"] == total
+            assert consulta["por_solicitante"].to_dict() == por_solicitante.to_dict()
+            assert consulta["por_exame"].to_dict() == por_exame.to_dict()
+
+        _, t_legado_30 = timed(legacy_query, resultado, inicio_30, fim_30, repeticoes=2)
+        _, t_cubo_30 = timed(cube.query, inicio_30, fim_30)
+        _, t_cubo_total = timed(cube.query, pd.Timestamp("2020-01-01"), fim_total)
+        print(f"{anos:g} anos ({len(resultado):,} linhas, agregado com {len(cubo):,}): "
+              f"30 dias: anterior {t_legado_30 * 1000:.0f} ms, agregado {t_cubo_30 * 1000:.2f} ms | "
+              f"histórico inteiro: agregado {t_cubo_total * 1000:.1f} ms")
@@ -0,0 +1,82 @@
+# Carga dos dados do dashboard com um arquivo processado de 1M de linhas: compara o carregamento original (CSV +
+# fillna coluna a coluna, DATA como texto convertida a cada filtro, cópia do st.cache_data a cada execução do script)
+# com a camada processada em Parquet (datas e categorias já tipadas, cópia única compartilhada e chave por assinatura).
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import pickle
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from src.data.aggregates import AggregateCube, daily_aggregate
+from src.data.storage import processed_path, processed_signature, read_processed, write_processed
+from src.models.rules import LABEL_MAP, NAO_EXAME
+
+def synthetic_processed(linhas, seed=42): # Saída processada sintética com as colunas do nao_estruturado_processado.
+    rng = np.random.default_rng(seed)
+    receitas = np.array([f"Solicito {exame.lower()} para investigação clínica, paciente {i}" for i, exame in enumerate(LABEL_MAP.values())], dtype=object)
+    exames = np.array(list(LABEL_MAP.values()) + [NAO_EXAME], dtype=object)
+    datas = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 5 * 365, linhas), unit="D")
+    return pd.DataFrame({
+        "ID": np.arange(linhas),
+        "DATA": datas.strftime("%Y-%m-%d"),
+        "TEL": pd.Series(rng.integers(10**10, 10**11, linhas)).astype(str).radd("0"),
+        "CPF": pd.Series(rng.integers(10**9, 10**10, linhas)).astype(str).radd("0"),
+        "SOLICITANTE": rng.choice([f"Médico {i}" for i in range(300)], linhas),
+        "DS_RECEITA": rng.choice(receitas, linhas),
+        "exame_resultado": rng.choice(exames, linhas),
+    })
+
+def legacy_load(path): # Carregamento original do dashboard.
+    df = pd.read_csv(path, dtype={'CPF': str})
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].fillna('')
+        else:
+            df[col] = df[col].fillna(0)
+    return df
+
+def legacy_filter(df, data_inicio, data_fim): # Cada interação copiava o DataFrame e convertia a coluna DATA de novo.
+    df_copy = df.copy()
+    df_copy['DATA'] = pd.to_datetime(df_copy['DATA'], format='%Y-%m-%d', errors='coerce')
+    return df_copy[(df_copy['DATA'] >= data_inicio) & (df_copy['DATA'] <= data_fim)]
+
+def timed(func, *args):
+    inicio = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - inicio
+
+def mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = synthetic_processed(args.linhas)
+    inicio, fim = pd.Timestamp("2021-03-01"), pd.Timestamp("2021-03-30")
+    with tempfile.TemporaryDirectory() as pasta:
+        nome = "nao_estruturado_processado"
+        df.to_csv(processed_path(nome, pasta, "csv"), index=False)
+        write_processed(df.copy(), nome, pasta)
+        print(f"{args.linhas:,} linhas: CSV {os.path.getsize(processed_path(nome, pasta, 'csv')) / 2**20:.0f} MB, "
+              f"Parquet {os.path.getsize(processed_path(nome, pasta)) / 2**20:.0f} MB em disco")
+
+        antigo, t_antigo = timed(legacy_load, processed_path(nome, pasta, "csv"))
+        _, t_copia = timed(lambda: pickle.loads(pickle.dumps(antigo, protocol=pickle.HIGHEST_PROTOCOL)))
+        filtrado_antigo, t_filtro_antigo = timed(legacy_filter, antigo, inicio, fim)
+        print(f"original: carga {t_antigo:.2f} s, {mb(antigo):.0f} MB em memória, "
+              f"cópia do st.cache_data a cada execução {t_copia:.2f} s, filtro de 30 dias {t_filtro_antigo * 1000:.0f} ms")
+
+        novo, t_novo = timed(read_processed, nome, pasta)
+        _, t_assinatura = timed(processed_signature, [nome], pasta)
+        cube, t_cubo = timed(lambda: AggregateCube(daily_aggregate(novo, "nao_estruturado")))
+        consulta, t_filtro_novo = timed(cube.query, inicio, fim)
+        print(f"novo: carga {t_novo:.2f} s, {mb(novo):.0f} MB em memória ({', '.join(f'{c}={novo[c].dtype}' for c in ('DATA', 'SOLICITANTE', 'exame_resultado'))}), "
+              f"agregado {t_cubo:.2f} s, assinatura a cada execução {t_assinatura * 1e6:.0f} µs, filtro de 30 dias {t_filtro_novo * 1000:.2f} ms")
+        assert consulta["total"] == len(filtrado_antigo)
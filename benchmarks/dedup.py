@@ -0,0 +1,58 @@
+# Verifica a deduplicação dos envios contra o histórico (db/envios.db) usando o Twilio falso (benchmarks/fake_twilio.py):
+# uma segunda execução só reenvia o que falhou na primeira, e o agrupamento por telefone reduz as chamadas à API.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextlib
+import io
+import tempfile
+
+from benchmarks.fake_twilio import start_fake_twilio
+from src.data.storage import read_processed
+from src.messaging.generate_messages import generate_messages
+from src.messaging.send_log import SendLogWriter
+from src.messaging.send_messages import send_all_messages, HttpTransport
+
+def send(server, messages, db_path): # Envia sem retentativas (os 429 viram falhas) e retorna quantas requisições chegaram ao servidor.
+    antes = len(server.recebidas) + server.rejeitadas
+    writer = SendLogWriter(db_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = send_all_messages(messages, transport=HttpTransport(server.url), rate=None, max_retries=0, send_log=writer)
+    writer.close()
+    return stats, len(server.recebidas) + server.rejeitadas - antes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--erros", type=float, default=0.2, help="Fração de respostas 429 na primeira execução")
+    args = parser.parse_args()
+
+    df = read_processed("resultado_processado")
+    with tempfile.TemporaryDirectory() as pasta:
+        db_path = os.path.join(pasta, "envios.db")
+        server = start_fake_twilio(latency=0.0, error_rate=args.erros)
+
+        messages = generate_messages(df, skip_sent=True, db_path=db_path)
+        stats, chamadas = send(server, messages, db_path)
+        print(f"1ª execução: {len(messages)} mensagens, {chamadas} chamadas à API, {stats['falhas']} falhas")
+
+        server.error_rate = 0.0
+        messages = generate_messages(df, skip_sent=True, db_path=db_path)
+        assert len(messages) == stats["falhas"], "A segunda execução deveria reenviar apenas as falhas"
+        _, chamadas = send(server, messages, db_path)
+        print(f"2ª execução: {len(messages)} mensagens (apenas as que falharam), {chamadas} chamadas à API")
+
+        messages = generate_messages(df, skip_sent=True, db_path=db_path)
+        assert not messages, "Depois de tudo enviado nada deveria ser reenviado"
+        print("3ª execução: 0 mensagens")
+        server.shutdown()
+
+    # Agrupamento: uma mensagem por telefone, cobrindo todos os exames dele
+    separadas = generate_messages(df)
+    agrupadas = generate_messages(df, merge_by_phone=True)
+    assert sorted(chave for msg in separadas for chave in msg["chaves"]) == sorted(chave for msg in agrupadas for chave in msg["chaves"])
+    assert len(agrupadas) == len({msg["telefone"] for msg in separadas})
+    print(f"agrupamento por telefone: {len(separadas)} -> {len(agrupadas)} mensagens ({1 - len(agrupadas) / len(separadas):.1%} menos chamadas)")
+    exemplo = next(msg for msg in agrupadas if len(msg["chaves"]) > 1)
+    print(f"exemplo: {exemplo['mensagem'][:120]}...")
@@ -0,0 +1,151 @@
+# Benchmark ponta a ponta em dados sintéticos (benchmarks/synthetic_data.py) em uma ou mais escalas: mede cada etapa do
+# pipeline (load_data, mapeamento TUSS, predict_exam_batch com o cache vazio e cheio, generate_messages, envio contra o
+# Twilio falso e agregações do dashboard) e grava um relatório JSON para acompanhar regressões entre commits.
+# Por padrão usa modelos pequenos com pesos aleatórios (benchmarks/stub_models.py); --modelos reais usa os de models/.
+# Com --comparar, compara com um relatório anterior e sai com código 1 se alguma etapa ficou mais lenta que a tolerância.
+# Rodar a partir da raiz do repositório. Cache de previsões, histórico de envios e dados gerados ficam em uma pasta temporária.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+
+import src.models.cache as cache_module
+from benchmarks.fake_twilio import start_fake_twilio
+from benchmarks.stub_models import make_stub_models
+from benchmarks.synthetic_data import generate_raw
+from src.data.aggregates import AggregateCube, build_aggregate
+from src.data.load_data import load_data
+from src.data.process_data import process_estruturado
+from src.messaging.generate_messages import generate_messages
+from src.messaging.send_log import SendLogWriter
+from src.messaging.send_messages import HttpTransport, send_all_messages
+from src.models.cache import PredictionCache
+from src.models.classifier import ExamClassifier
+from src.models.predict import predict_exam_batch
+
+# Etapas que podem ser puladas com --pular (as demais alimentam as seguintes)
+OPCIONAIS = ["inferencia_cache", "mensagens", "envio", "dashboard"]
+# Regressão: mais lento que o relatório anterior por mais de TOLERANCIA (relativa) e FOLGA_S (absoluta)
+TOLERANCIA = 0.25
+FOLGA_S = 0.05
+
+def git_commit():
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+def run_scale(linhas, pasta, classifier, args): # Gera os dados de uma escala e mede as etapas; retorna {etapa: {"segundos", "itens", "itens_por_segundo"}}.
+    dados_dir = os.path.join(pasta, f"raw_{linhas}")
+    generate_raw(dados_dir, linhas, seed=args.seed)
+    etapas = {}
+
+    def medir(nome, func, itens):
+        if nome in args.pular:
+            return None
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = func()
+        tempo = time.perf_counter() - inicio
+        n = itens(resultado) if callable(itens) else itens
+        etapas[nome] = {"segundos": round(tempo, 4), "itens": n, "itens_por_segundo": round(n / tempo, 1) if tempo > 0 else None}
+        print(f"  {nome:<18}{tempo:>9.3f} s{n:>12,} itens")
+        return resultado
+
+    estruturado, nao_estruturado = medir("load_data", lambda: load_data(dados_dir), 2 * linhas)
+    estruturado = medir("tuss", lambda: process_estruturado(estruturado), linhas)
+
+    # Cache de previsões novo a cada escala: a primeira passada roda os modelos, a segunda só consulta o cache
+    cache_module._cache = PredictionCache(os.path.join(pasta, f"predicoes_{linhas}.db"))
+    textos = nao_estruturado["DS_RECEITA"].tolist()
+    resultados = medir("inferencia", lambda: predict_exam_batch(textos, classifier=classifier), linhas)
+    medir("inferencia_cache", lambda: predict_exam_batch(textos, classifier=classifier), linhas)
+    nao_estruturado["exame_resultado"] = resultados
+
+    resultado = pd.concat([estruturado, nao_estruturado], ignore_index=True)
+    envios_db = os.path.join(pasta, f"envios_{linhas}.db")
+    messages = medir("mensagens", lambda: generate_messages(resultado, skip_sent=True, db_path=envios_db), len) or []
+
+    # Envio das primeiras --envios mensagens, sem limite de taxa, contra o Twilio falso (latência fixa por requisição)
+    if "envio" not in args.pular:
+        server = start_fake_twilio(latency=args.latencia_envio)
+        send_log = SendLogWriter(envios_db)
+        try:
+            lote = messages[:args.envios]
+            medir("envio", lambda: send_all_messages(lote, transport=HttpTransport(server.url), rate=None, send_log=send_log), len(lote))
+        finally:
+            send_log.close()
+            server.shutdown()
+
+    def dashboard():
+        cube = AggregateCube(build_aggregate(estruturado, nao_estruturado))
+        for data_inicio, data_fim in (("2021-03-01", "2021-03-30"), ("2020-01-01", "2024-12-31")):
+            cube.query(data_inicio, data_fim)
+    medir("dashboard", dashboard, 2 * linhas)
+    return etapas
+
+def compare(relatorio, anterior): # Lista as etapas mais lentas que no relatório anterior (mesma escala).
+    regressoes = []
+    for escala, atual in relatorio["escalas"].items():
+        base = anterior.get("escalas", {}).get(escala, {})
+        for etapa, medida in atual.items():
+            if etapa not in base:
+                continue
+            limite = base[etapa]["segundos"] * (1 + TOLERANCIA) + FOLGA_S
+            razao = medida["segundos"] / base[etapa]["segundos"] if base[etapa]["segundos"] else float("inf")
+            situacao = "REGRESSÃO" if medida["segundos"] > limite else "ok"
+            print(f"  {escala:>10} {etapa:<18}{base[etapa]['segundos']:>9.3f} s -> {medida['segundos']:>9.3f} s ({razao:.2f}x) {situacao}")
+            if medida["segundos"] > limite:
+                regressoes.append(f"{etapa} em {escala} linhas: {medida['segundos']:.3f} s (limite {limite:.3f} s)")
+    return regressoes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000], help="Linhas de cada arquivo; ex.: 10000 100000 1000000 10000000")
+    parser.add_argument("--modelos", choices=["stub", "reais"], default="stub")
+    parser.add_argument("--envios", type=int, default=500, help="Mensagens enviadas ao Twilio falso em cada escala")
+    parser.add_argument("--latencia-envio", type=float, default=0.02)
+    parser.add_argument("--pular", nargs="*", default=[], choices=OPCIONAIS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", default="e2e_report.json")
+    parser.add_argument("--comparar", help="Relatório JSON anterior")
+    args = parser.parse_args()
+
+    relatorio = {
+        "commit": git_commit(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "modelos": args.modelos,
+        "escalas": {},
+    }
+    with tempfile.TemporaryDirectory() as pasta:
+        kwargs = make_stub_models(os.path.join(pasta, "models")) if args.modelos == "stub" else {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            classifier = ExamClassifier(**kwargs)
+        for linhas in args.linhas:
+            print(f"{linhas:,} linhas por arquivo:")
+            relatorio["escalas"][str(linhas)] = run_scale(linhas, pasta, classifier, args)
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Relatório gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        print(f"Comparação com {args.comparar} (commit {anterior.get('commit')}):")
+        regressoes = compare(relatorio, anterior)
+        for regressao in regressoes:
+            print(f"FALHA: {regressao}")
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,75 @@
+# Servidor local que imita a rota de envio de mensagens da API do Twilio, com latência e taxa de erros 429 configuráveis.
+# Usado pelo benchmarks/send_dispatcher.py; também pode ser iniciado sozinho e usado com HttpTransport(url).
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import urllib.parse
+import threading
+import argparse
+import random
+import json
+import time
+
+
+class FakeTwilio(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.05, error_rate=0.0):
+        super().__init__(address, FakeTwilioHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.recebidas = []  # (instante, telefone) de cada requisição aceita
+        self.rejeitadas = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        campos = urllib.parse.parse_qs(self.rfile.read(tamanho).decode("utf-8"))
+        time.sleep(self.server.latency)
+        if random.random() < self.server.error_rate:
+            with self.server.lock:
+                self.server.rejeitadas += 1
+            self._responder(429, {"code": 20429, "message": "Too Many Requests"})
+            return
+        with self.server.lock:
+            self.server.recebidas.append((time.monotonic(), campos["To"][0]))
+        self._responder(201, {"sid": f"SM{random.getrandbits(64):016x}", "status": "queued"})
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_twilio(latency=0.05, error_rate=0.0, host="127.0.0.1", port=0): # Sobe o servidor em uma thread e o retorna (a URL fica em server.url).
+    server = FakeTwilio((host, port), latency, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--porta", type=int, default=8766)
+    parser.add_argument("--latencia", type=float, default=0.05)
+    parser.add_argument("--erros", type=float, default=0.0, help="Fração das requisições respondidas com 429")
+    args = parser.parse_args()
+
+    server = FakeTwilio(("127.0.0.1", args.porta), args.latencia, args.erros)
+    print(f"Twilio falso ouvindo em {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
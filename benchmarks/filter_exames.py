@@ -0,0 +1,67 @@
+# Tempo por 10 mil linhas da filtragem dos dados de treino do multiclasse (train_multiclasse.filter_exames):
+# loop original (modelo binário chamado texto a texto, padding até max_length) contra a versão em lotes pelo caminho
+# de inferência compartilhado, com o cache de previsões vazio, com o cache cheio e com o conjunto filtrado já salvo.
+# Cache e conjunto filtrado ficam em uma pasta temporária.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+import pandas as pd
+
+import src.models.cache as cache_module
+from src.models.cache import PredictionCache
+from src.models.classifier import CONFIG_DIR, MODELO_BINARIO_DIR
+from src.models.train_multiclasse import filter_exames
+
+def legacy_filter(dados): # Loop original do filter_exames.
+    from transformers import AutoTokenizer, pipeline
+    tokenizer = AutoTokenizer.from_pretrained(CONFIG_DIR)
+    classifier_binario = pipeline("text-classification", model=MODELO_BINARIO_DIR, tokenizer=tokenizer,
+                                  truncation=True, max_length=128, padding="max_length")
+    dados_filtrados = []
+    for d in dados:
+        texto = d.get("DS_RECEITA", d.get("texto", ""))
+        if pd.isna(texto):
+            texto = ""
+        texto = str(texto)
+        if classifier_binario(texto)[0]["label"] == "LABEL_1":
+            dados_filtrados.append({"texto": texto})
+    return dados_filtrados
+
+def timed(func, *args, **kwargs):
+    inicio = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivo", default=os.path.join("data", "raw", "sample_nao_estruturados.csv"))
+    parser.add_argument("--linhas", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Textos da amostra repetidos até o tamanho pedido, cada linha com um sufixo para que todos sejam únicos
+    df = pd.read_csv(args.arquivo)
+    df = pd.concat([df] * (args.linhas // len(df) + 1), ignore_index=True).head(args.linhas)
+    dados = [{"DS_RECEITA": f"{texto} (pedido {i})" if isinstance(texto, str) else texto} for i, texto in enumerate(df["DS_RECEITA"])]
+    por_10k = 10_000 / len(dados)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        cache_module._cache = PredictionCache(os.path.join(pasta, "predicoes.db"))
+        filtrados = os.path.join(pasta, "treino")
+
+        referencia, t_original = timed(legacy_filter, dados)
+        sem_cache, t_lotes = timed(filter_exames, dados, use_cache=False, persist=False)
+        _, t_cache_vazio = timed(filter_exames, dados, persist=True, filtered_dir=filtrados)
+        com_cache, t_cache_cheio = timed(filter_exames, dados, persist=False)
+        salvo, t_salvo = timed(filter_exames, dados, persist=True, filtered_dir=filtrados)
+
+    concordancia = len({d["texto"] for d in referencia} ^ {d["texto"] for d in sem_cache})
+    assert com_cache == sem_cache and salvo == sem_cache
+    print(f"{len(dados):,} linhas, {len(referencia):,} classificadas como exame no loop original, {concordancia} divergências com a versão em lotes")
+    for nome, tempo in (("original (texto a texto)", t_original), ("em lotes, sem cache", t_lotes),
+                        ("em lotes, cache vazio", t_cache_vazio), ("em lotes, cache cheio", t_cache_cheio),
+                        ("conjunto filtrado salvo", t_salvo)):
+        print(f"  {nome:<26}{tempo * por_10k:>8.2f} s por 10 mil linhas ({t_original / tempo:.1f}x)")
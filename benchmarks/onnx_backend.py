@@ -0,0 +1,40 @@
+# Compara o backend ONNX Runtime (fp32 e int8) com o pipeline do PyTorch: concordância das previsões e vazão.
+# Requer os modelos exportados com `python src/models/export_onnx.py`.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import pandas as pd
+
+from src.models.classifier import ExamClassifier, ONNX_THREADS
+
+def run(classifier, textos): # Retorna os labels binários, os labels multiclasse e o tempo total.
+    classifier.predict_binario(textos[:32])  # aquecimento
+    inicio = time.perf_counter()
+    binario = [pred["label"] for pred in classifier.predict_binario(textos)]
+    multiclasse = [pred["label"] for pred in classifier.predict_multiclasse(textos)]
+    return binario, multiclasse, time.perf_counter() - inicio
+
+def concordancia(a, b):
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivo", default=os.path.join("data", "raw", "sample_nao_estruturados.csv"))
+    parser.add_argument("--threads", type=int, default=ONNX_THREADS)
+    args = parser.parse_args()
+
+    textos = pd.read_csv(args.arquivo)["DS_RECEITA"].fillna("").astype(str).tolist()
+
+    ref_bin, ref_multi, ref_tempo = run(ExamClassifier(backend="torch"), textos)
+    print(f"{'backend':<14}{'linhas/s':>12}{'speedup':>10}{'binário':>10}{'multiclasse':>13}")
+    print(f"{'torch':<14}{2 * len(textos) / ref_tempo:>12.0f}{1.0:>10.2f}{1.0:>10.1%}{1.0:>13.1%}")
+    for nome, quantizado in (("onnx fp32", False), ("onnx int8", True)):
+        classifier = ExamClassifier(backend="onnx", onnx_quantized=quantizado, onnx_threads=args.threads)
+        if "torch" in classifier.backends:
+            print(f"{nome:<14}modelo não exportado, ignorado")
+            continue
+        binario, multi, tempo = run(classifier, textos)
+        print(f"{nome:<14}{2 * len(textos) / tempo:>12.0f}{ref_tempo / tempo:>10.2f}{concordancia(binario, ref_bin):>10.1%}{concordancia(multi, ref_multi):>13.1%}")
@@ -0,0 +1,87 @@
+# Verifica a montagem dos resultados do predict_exam_batch (merge por máscara e índices) contra uma
+# referência linha a linha e mede o crescimento do tempo com o número de linhas (deve ser linear).
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import numpy as np
+
+from src.models.classifier import LABEL_MAP, NAO_EXAME
+from src.models.predict import binary_label_array, multiclass_label_array, merge_predictions
+
+def synthetic_predictions(n, seed=42): # Gera saídas no formato dos pipelines: ~30% exames, classes aleatórias.
+    rng = np.random.default_rng(seed)
+    is_exame = rng.random(n) < 0.3
+    pred_binarias = [{"label": "LABEL_1" if e else "LABEL_0", "score": 0.9} for e in is_exame]
+    ids = rng.integers(0, len(LABEL_MAP), int(is_exame.sum()))
+    pred_multiclasses = [{"label": f"LABEL_{i}", "score": 0.9} for i in ids]
+    return pred_binarias, pred_multiclasses
+
+def reference_merge(pred_binarias, pred_multiclasses): # Referência: percorre as linhas consumindo a próxima previsão multiclasse a cada exame.
+    multiclasses = iter(pred_multiclasses)
+    return [
+        LABEL_MAP[int(next(multiclasses)["label"].split("_")[1])] if pred["label"] == "LABEL_1" else NAO_EXAME
+        for pred in pred_binarias
+    ]
+
+def legacy_merge(pred_binarias, pred_multiclasses): # Montagem anterior (insert + busca em lista), O(n²).
+    results = []
+    indices_exames = []
+    for idx, pred in enumerate(pred_binarias):
+        if pred["label"] == "LABEL_1":
+            indices_exames.append(idx)
+        else:
+            results.append(NAO_EXAME)
+    for idx, pred in zip(indices_exames, pred_multiclasses):
+        results.insert(idx, LABEL_MAP[int(pred["label"].split("_")[1])])
+    final_results = []
+    result_idx = 0
+    for idx in range(len(pred_binarias)):
+        if idx in indices_exames:
+            final_results.append(results[result_idx])
+            result_idx += 1
+        else:
+            final_results.append(NAO_EXAME)
+    return final_results
+
+def new_merge(pred_binarias, pred_multiclasses):
+    return merge_predictions(binary_label_array(pred_binarias), multiclass_label_array(pred_multiclasses)).tolist()
+
+def timed(func, *args):
+    inicio = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--linhas-legado", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Casos em que a montagem antiga é bem definida (só exames / nenhum exame): as três montagens devem coincidir
+    for is_exame in (True, False):
+        pred_b = [{"label": "LABEL_1" if is_exame else "LABEL_0"}] * 1000
+        pred_m = [{"label": f"LABEL_{i % len(LABEL_MAP)}"} for i in range(1000)] if is_exame else []
+        assert new_merge(pred_b, pred_m) == legacy_merge(pred_b, pred_m) == reference_merge(pred_b, pred_m)
+
+    # Identidade com a referência e escalabilidade linear
+    tempos = []
+    for n in (args.linhas // 8, args.linhas // 4, args.linhas // 2, args.linhas):
+        pred_b, pred_m = synthetic_predictions(n)
+        novo, t = timed(new_merge, pred_b, pred_m)
+        assert novo == reference_merge(pred_b, pred_m), f"Divergência com a referência para {n} linhas"
+        tempos.append((n, t))
+        print(f"merge vetorizado: {n:>9} linhas em {t:.3f} s ({n / t:,.0f} linhas/s)")
+    razao = (tempos[-1][1] / tempos[0][1]) / (tempos[-1][0] / tempos[0][0])
+    print(f"Razão tempo/linhas entre o maior e o menor caso: {razao:.2f} (≈1 indica crescimento linear)")
+    assert razao < 2, "O merge deixou de escalar linearmente"
+
+    # Montagem antiga, para comparação (limitada por ser quadrática)
+    pred_b, pred_m = synthetic_predictions(args.linhas_legado)
+    legado, t_legado = timed(legacy_merge, pred_b, pred_m)
+    _, t_novo = timed(new_merge, pred_b, pred_m)
+    divergencias = sum(a != b for a, b in zip(legado, reference_merge(pred_b, pred_m)))
+    print(f"montagem antiga: {args.linhas_legado} linhas em {t_legado:.3f} s vs {t_novo:.4f} s vetorizado")
+    print(f"linhas em que a montagem antiga diverge da referência: {divergencias}")
@@ -0,0 +1,60 @@
+# Mede o disparo de mensagens (src/messaging/send_messages.py) contra o Twilio falso (benchmarks/fake_twilio.py):
+# envio sequencial vs concorrente, respeito ao limite de envios por segundo e recuperação de erros 429.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import contextlib
+import io
+
+from benchmarks.fake_twilio import start_fake_twilio
+from src.messaging.send_messages import send_all_messages, HttpTransport
+
+def fake_messages(n):
+    return [{"telefone": f"+55119{idx:08d}", "mensagem": f"Mensagem de teste {idx}", "solicitante": "Teste"} for idx in range(n)]
+
+def run(server, messages, **kwargs): # Envia sem imprimir o log de cada mensagem e retorna as estatísticas do envio.
+    with contextlib.redirect_stdout(io.StringIO()):
+        return send_all_messages(messages, transport=HttpTransport(server.url), **kwargs)
+
+def max_per_second(server): # Maior número de requisições aceitas em qualquer janela de 1 segundo.
+    instantes = sorted(t for t, _ in server.recebidas)
+    maior, inicio = 0, 0
+    for fim, t in enumerate(instantes):
+        while t - instantes[inicio] >= 1.0:
+            inicio += 1
+        maior = max(maior, fim - inicio + 1)
+    return maior
+
+def report(nome, stats):
+    print(f"{nome}: {stats['enviadas']}/{stats['mensagens']} enviadas em {stats['tempo']:.2f} s | {stats['msgs_por_segundo']:.1f} msgs/s | p50 {stats['latencia_p50'] * 1000:.0f} ms | p99 {stats['latencia_p99'] * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mensagens", type=int, default=500)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência simulada de cada requisição (s)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=80)
+    parser.add_argument("--erros", type=float, default=0.1, help="Fração de respostas 429 no teste de retentativas")
+    args = parser.parse_args()
+    messages = fake_messages(args.mensagens)
+
+    # Sequencial (equivalente ao envio anterior, uma mensagem por vez)
+    server = start_fake_twilio(args.latencia)
+    report("sequencial", run(server, messages, workers=1, rate=None))
+    server.shutdown()
+
+    # Concorrente, limitado a --rate envios por segundo
+    server = start_fake_twilio(args.latencia)
+    stats = run(server, messages, workers=args.workers, rate=args.rate)
+    report(f"concorrente ({args.workers} threads)", stats)
+    print(f"pico de envios em 1 s: {max_per_second(server)} (limite {args.rate:g})")
+    server.shutdown()
+
+    # Erros transitórios: as mensagens rejeitadas com 429 são reenviadas com backoff
+    server = start_fake_twilio(args.latencia, error_rate=args.erros)
+    stats = run(server, messages, workers=args.workers, rate=args.rate, backoff_base=0.05)
+    report(f"com {args.erros:.0%} de 429", stats)
+    print(f"respostas 429: {server.rejeitadas} | telefones distintos recebidos: {len({tel for _, tel in server.recebidas})}")
+    server.shutdown()
@@ -0,0 +1,73 @@
+# Mede as gravações por segundo no histórico de envios: INSERT + commit por mensagem (versão anterior)
+# contra o SendLogWriter (src/messaging/send_log.py), alimentado por várias threads ao mesmo tempo.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from src.messaging.send_log import SendLogWriter
+
+def legacy_insert(db_path, rows): # Versão anterior: journal padrão e um commit (fsync) por registro.
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS envios (id INTEGER PRIMARY KEY AUTOINCREMENT, data_envio TEXT, telefone TEXT, mensagem TEXT, status TEXT)")
+    conn.commit()
+    for data_envio, telefone, mensagem, status in rows:
+        conn.execute("INSERT INTO envios (data_envio, telefone, mensagem, status) VALUES (?, ?, ?, ?)", (data_envio, telefone, mensagem, status))
+        conn.commit()
+    conn.close()
+
+def writer_insert(db_path, rows, threads): # Várias threads enfileirando registros no mesmo writer.
+    writer = SendLogWriter(db_path)
+    partes = [rows[i::threads] for i in range(threads)]
+    produtores = [threading.Thread(target=lambda parte: [writer.log(t, m, s, d) for d, t, m, s in parte], args=(parte,)) for parte in partes]
+    for produtor in produtores:
+        produtor.start()
+    for produtor in produtores:
+        produtor.join()
+    writer.close()
+    return writer
+
+def count(db_path):
+    conn = sqlite3.connect(db_path)
+    total = conn.execute("SELECT COUNT(*) FROM envios").fetchone()[0]
+    conn.close()
+    return total
+
+def timed(func, *args):
+    inicio = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--registros", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = [(agora, f"+55119{i:08d}", f"Mensagem {i} " + "x" * 300, "Sucesso") for i in range(args.registros)]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        antigo = os.path.join(pasta, "antigo.db")
+        _, t_antigo = timed(legacy_insert, antigo, rows)
+        assert count(antigo) == args.registros
+        print(f"commit por registro: {args.registros / t_antigo:,.0f} registros/s ({t_antigo:.2f} s)")
+
+        novo = os.path.join(pasta, "novo.db")
+        writer, t_novo = timed(writer_insert, novo, rows, args.threads)
+        assert count(novo) == args.registros
+        print(f"SendLogWriter ({args.threads} threads): {args.registros / t_novo:,.0f} registros/s ({t_novo:.2f} s, {writer.transacoes} transações)")
+        print(f"speedup: {t_antigo / t_novo:.0f}x")
+
+        # Consultas operacionais usam os índices em vez de percorrer a tabela
+        conn = sqlite3.connect(novo)
+        for consulta, parametro in (("SELECT * FROM envios WHERE telefone = ?", rows[0][1]), ("SELECT * FROM envios WHERE data_envio >= ?", agora)):
+            plano = conn.execute(f"EXPLAIN QUERY PLAN {consulta}", (parametro,)).fetchall()
+            print(f"{consulta}: {plano[0][-1]}")
+        conn.close()
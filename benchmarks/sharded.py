@@ -0,0 +1,36 @@
+# Mede a vazão da inferência com 1, 2, 4... processos (src/models/sharded.py) sobre o dataset de exemplo replicado.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import pandas as pd
+
+from src.models.predict import predict_exam_batch
+from src.models.sharded import shutdown_pool
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivo", default=os.path.join("data", "raw", "sample_nao_estruturados.csv"))
+    parser.add_argument("--repeticoes", type=int, default=4, help="Quantas vezes o dataset é replicado")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.arquivo)["DS_RECEITA"].fillna("").astype(str).tolist()
+    # Sufixo por cópia para que cada texto seja único e todos passem pelos modelos
+    textos = [f"{texto} {copia}" for copia in range(args.repeticoes) for texto in base]
+    print(f"{len(textos)} textos | núcleos disponíveis: {os.cpu_count()}")
+
+    referencia = None
+    tempo_1 = None
+    for workers in args.workers:
+        # Aquecimento: sobe o pool e carrega os modelos em cada worker
+        predict_exam_batch(textos[:workers * 8], use_cache=False, use_prefilter=False, workers=workers)
+        inicio = time.perf_counter()
+        preds = predict_exam_batch(textos, use_cache=False, use_prefilter=False, workers=workers)
+        tempo = time.perf_counter() - inicio
+        referencia = referencia or preds
+        tempo_1 = tempo_1 or tempo
+        print(f"workers={workers}: {len(textos) / tempo:,.0f} linhas/s | speedup {tempo_1 / tempo:.2f} | mesma saída: {preds == referencia}")
+        shutdown_pool()
@@ -0,0 +1,92 @@
+# Mede o tempo de importação (python -X importtime) dos pontos de entrada e compara com a linha de base registrada em
+# benchmarks/startup_baseline.json. Também confere que nenhum deles carrega torch/transformers/onnxruntime/twilio ao ser
+# importado: essas bibliotecas só devem ser carregadas no primeiro uso. Sai com código 1 se houver regressão ou se algum
+# ponto de entrada não puder ser importado (a não ser que seja dispensado com `--pular`, ex.: sem o streamlit instalado).
+# Rodar a partir da raiz do repositório; `--atualizar` grava os tempos medidos como a nova linha de base.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import subprocess
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "startup_baseline.json")
+# Pontos de entrada medidos; o dashboard é um script do Streamlit, então importá-lo executa a página inteira (modo "bare")
+TARGETS = ["main", "monitor", "server", "src.messaging.send_messages", "src.dashboard.dashboard"]
+# Bibliotecas pesadas que não podem ser carregadas só por importar os pontos de entrada
+LAZY_MODULES = ["torch", "transformers", "onnxruntime", "twilio", "google.cloud.storage"]
+# Regressão: mais lento que a linha de base por mais de TOLERANCIA (relativa) e FOLGA_MS (absoluta)
+TOLERANCIA = 0.25
+FOLGA_MS = 50
+
+def import_time(modulo): # Tempo acumulado (ms) da importação do módulo e os módulos pesados carregados por ela.
+    codigo = f"import {modulo}, sys; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.getcwd()})
+    if proc.returncode != 0:
+        erro = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"código {proc.returncode}"
+        return None, erro
+    # Cada linha: "import time: self [us] | cumulative | nome", com a indentação indicando o nível
+    for linha in proc.stderr.splitlines():
+        if linha.startswith("import time:") and linha.rsplit("|", 1)[-1].strip() == modulo and not linha.rsplit("|", 1)[-1].startswith("  "):
+            acumulado = int(linha.split("|")[1])
+            carregados = [m for m in proc.stdout.strip().split(",") if m]
+            return acumulado / 1000, carregados
+    return None, "módulo não encontrado na saída do -X importtime"
+
+def measure(modulo, repeticoes): # Menor tempo entre as repetições (reduz o ruído do sistema).
+    melhor, carregados = None, []
+    for _ in range(repeticoes):
+        tempo, resultado = import_time(modulo)
+        if tempo is None:
+            return None, resultado
+        melhor = tempo if melhor is None else min(melhor, tempo)
+        carregados = resultado
+    return melhor, carregados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--atualizar", action="store_true", help="Grava os tempos medidos como nova linha de base")
+    parser.add_argument("--pular", nargs="+", default=[], choices=TARGETS, metavar="MODULO", help="Pontos de entrada que não são medidos (ex.: src.dashboard.dashboard sem o streamlit instalado)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    medidos = {}
+    falhas = []
+    for modulo in TARGETS:
+        if modulo in args.pular:
+            print(f"{modulo}: pulado")
+            continue
+        tempo, resultado = measure(modulo, args.repeticoes)
+        if tempo is None:
+            # Um ponto de entrada que não importa é uma falha, não um ponto de entrada a menos na comparação
+            print(f"{modulo}: não foi possível importar ({resultado})")
+            falhas.append(f"{modulo} não pôde ser importado: {resultado}")
+            continue
+        medidos[modulo] = round(tempo, 1)
+        situacao = "sem linha de base"
+        if modulo in baseline:
+            limite = baseline[modulo] * (1 + TOLERANCIA) + FOLGA_MS
+            situacao = f"linha de base {baseline[modulo]:.0f} ms"
+            if tempo > limite:
+                situacao += " -> REGRESSÃO"
+                falhas.append(f"{modulo} importou em {tempo:.0f} ms (limite {limite:.0f} ms)")
+        print(f"{modulo}: {tempo:.0f} ms ({situacao})")
+        if resultado:
+            falhas.append(f"{modulo} carrega na importação: {', '.join(resultado)}")
+
+    if args.atualizar:
+        baseline.update(medidos)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Linha de base atualizada em {BASELINE_PATH}")
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    sys.exit(1 if falhas else 0)
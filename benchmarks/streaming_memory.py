@@ -0,0 +1,58 @@
+# Mede o pico de memória (RSS) do processamento completo e do modo streaming com entradas de tamanhos crescentes.
+# As entradas são o dataset de exemplo replicado com novos IDs; os textos repetidos saem do cache de previsões,
+# então o tempo de inferência não domina a medição.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import subprocess
+import argparse
+import tempfile
+import pandas as pd
+
+from src.data.load_data import ESTRUTURADO_FILE, NAO_ESTRUTURADO_FILE
+
+CHILD_SCRIPT = (
+    "import resource\n"
+    "from src.data.process_data import process_data, process_data_streaming\n"
+    "if {streaming}:\n"
+    "    process_data_streaming(data_dir={data_dir!r}, output_dir={output_dir!r}, chunksize={chunksize})\n"
+    "else:\n"
+    "    process_data(data_dir={data_dir!r}, output_dir={output_dir!r})\n"
+    "print('MAXRSS', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+)
+
+def replicate(origem, destino, vezes): # Grava o CSV de origem repetido `vezes` vezes, com IDs únicos.
+    base = pd.read_csv(origem)
+    for copia in range(vezes):
+        bloco = base.copy()
+        bloco["ID"] = bloco["ID"] + copia * (base["ID"].max() + 1)
+        bloco.to_csv(destino, mode="w" if copia == 0 else "a", header=copia == 0, index=False)
+    return len(base) * vezes
+
+def peak_rss_mb(data_dir, output_dir, streaming, chunksize): # Executa o processamento num processo novo e retorna o pico de RSS em MB.
+    script = CHILD_SCRIPT.format(streaming=streaming, data_dir=data_dir, output_dir=output_dir, chunksize=chunksize)
+    saida = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    linha = [l for l in saida.splitlines() if l.startswith("MAXRSS")][-1]
+    return int(linha.split()[1]) / 1024  # ru_maxrss é em KB no Linux
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raw", default=os.path.join("data", "raw"))
+    parser.add_argument("--escalas", type=int, nargs="+", default=[10, 40, 160], help="Quantas vezes o dataset de exemplo é replicado")
+    parser.add_argument("--chunksize", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10}{'completo (MB)':>16}{'streaming (MB)':>17}")
+    for escala in args.escalas:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, "raw")
+            output_dir = os.path.join(tmp, "processed")
+            os.makedirs(data_dir)
+            os.makedirs(output_dir)
+            linhas = replicate(os.path.join(args.raw, ESTRUTURADO_FILE), os.path.join(data_dir, ESTRUTURADO_FILE), escala)
+            linhas += replicate(os.path.join(args.raw, NAO_ESTRUTURADO_FILE), os.path.join(data_dir, NAO_ESTRUTURADO_FILE), escala)
+
+            completo = peak_rss_mb(data_dir, output_dir, False, args.chunksize)
+            streaming = peak_rss_mb(data_dir, output_dir, True, args.chunksize)
+            print(f"{linhas:>10}{completo:>16.0f}{streaming:>17.0f}")
@@ -0,0 +1,43 @@
+# Modelos pequenos com pesos aleatórios (DistilBERT de 1 camada) no mesmo formato dos salvos pelos scripts de treino,
+# para rodar o pipeline e os benchmarks sem os modelos treinados. As previsões não têm significado; só o custo importa.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import pandas as pd
+
+from src.data.load_data import NAO_ESTRUTURADO_FILE
+
+VOCAB_SIZE = 3000
+
+def make_stub_models(out_dir, sample_dir=os.path.join("data", "raw"), seed=0): # Cria config/, binario/modelo_binario e multiclasse/modelo_multiclasse em out_dir; retorna os kwargs do ExamClassifier.
+    import torch
+    from transformers import DistilBertConfig, DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+    # Vocabulário com as palavras mais frequentes dos textos de exemplo
+    textos = pd.read_csv(os.path.join(sample_dir, NAO_ESTRUTURADO_FILE))["DS_RECEITA"].dropna().astype(str)
+    palavras = pd.Series([p for texto in textos for p in re.findall(r"\w+|[^\w\s]", texto)]).value_counts()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + palavras.index[:VOCAB_SIZE].tolist()
+
+    dirs = {
+        "config_dir": os.path.join(out_dir, "config"),
+        "binario_dir": os.path.join(out_dir, "binario", "modelo_binario"),
+        "multiclasse_dir": os.path.join(out_dir, "multiclasse", "modelo_multiclasse"),
+    }
+    os.makedirs(dirs["config_dir"], exist_ok=True)
+    vocab_path = os.path.join(dirs["config_dir"], "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+    DistilBertTokenizerFast(vocab_path, do_lower_case=False).save_pretrained(dirs["config_dir"])
+
+    torch.manual_seed(seed)
+    for chave, num_labels in (("binario_dir", 2), ("multiclasse_dir", 6)):
+        config = DistilBertConfig(vocab_size=len(vocab), dim=32, hidden_dim=64, n_layers=1, n_heads=2, num_labels=num_labels)
+        DistilBertForSequenceClassification(config).save_pretrained(dirs[chave])
+    return dirs
+
+if __name__ == "__main__":
+    destino = sys.argv[1] if len(sys.argv) > 1 else "models"
+    for nome, caminho in make_stub_models(destino).items():
+        print(f"{nome}: {caminho}")
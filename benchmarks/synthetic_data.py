@@ -0,0 +1,73 @@
+# Gera os dois CSVs de entrada (estruturado e não estruturado) com o mesmo schema de data/raw/ em qualquer escala.
+# Os valores vêm das amostras de data/raw/: os pares CD_TUSS/DS_RECEITA do estruturado são reaproveitados (com uma
+# parcela de códigos fora do catálogo) e os textos do não estruturado se repetem como nos pedidos reais, com alguns
+# textos muito frequentes, uma cauda longa e uma parcela de textos únicos.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from src.data.load_data import ESTRUTURADO_FILE, NAO_ESTRUTURADO_FILE, RAW_DTYPES
+
+SAMPLE_DIR = os.path.join("data", "raw")
+BLOCO = 1_000_000  # linhas geradas e gravadas por vez (a memória não depende do total)
+DIAS = 5 * 365  # datas entre 2020-01-01 e o fim de 2024
+
+
+def _pesos_zipf(n, s=1.1): # Frequência decrescente: poucos textos muito repetidos e uma cauda longa.
+    pesos = 1.0 / np.arange(1, n + 1) ** s
+    return pesos / pesos.sum()
+
+def _comum(rng, inicio, linhas, solicitantes): # Colunas presentes nos dois arquivos.
+    ids = np.arange(inicio, inicio + linhas)
+    return pd.DataFrame({
+        "ID": ids,
+        "DATA": (pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, DIAS, linhas), unit="D")).strftime("%Y-%m-%d"),
+        "TEL": pd.Series(ids + 1_100_000_000).astype(str),
+        "CPF": pd.Series(ids + 12_345_670_000).astype(str),
+        "SOLICITANTE": rng.choice(solicitantes, linhas),
+    })
+
+def generate_raw(out_dir, linhas, seed=42, textos_unicos=0.2, codigos_desconhecidos=0.05, sample_dir=SAMPLE_DIR): # Grava os dois CSVs com `linhas` linhas cada em out_dir.
+    # textos_unicos: parcela dos textos do não estruturado que não se repete; codigos_desconhecidos: parcela de CD_TUSS fora do catálogo
+    rng = np.random.default_rng(seed)
+    estruturado = pd.read_csv(os.path.join(sample_dir, ESTRUTURADO_FILE), dtype=RAW_DTYPES)
+    nao_estruturado = pd.read_csv(os.path.join(sample_dir, NAO_ESTRUTURADO_FILE), dtype=RAW_DTYPES)
+    solicitantes = pd.concat([estruturado["SOLICITANTE"], nao_estruturado["SOLICITANTE"]]).dropna().unique()
+    pares = estruturado[["CD_TUSS", "DS_RECEITA"]].to_numpy()
+    textos = nao_estruturado["DS_RECEITA"].fillna("").drop_duplicates().to_numpy()
+    pesos = _pesos_zipf(len(textos))
+
+    os.makedirs(out_dir, exist_ok=True)
+    destinos = (os.path.join(out_dir, ESTRUTURADO_FILE), os.path.join(out_dir, NAO_ESTRUTURADO_FILE))
+    for inicio in range(0, linhas, BLOCO):
+        n = min(BLOCO, linhas - inicio)
+
+        bloco = _comum(rng, inicio, n, solicitantes)
+        escolhidos = pares[rng.integers(0, len(pares), n)]
+        codigos = escolhidos[:, 0].astype(np.int64)
+        desconhecidos = rng.random(n) < codigos_desconhecidos
+        codigos[desconhecidos] = rng.integers(10_000_000, 20_000_000, int(desconhecidos.sum()))
+        bloco["CD_TUSS"] = codigos
+        bloco["DS_RECEITA"] = escolhidos[:, 1]
+        bloco.to_csv(destinos[0], mode="a" if inicio else "w", header=not inicio, index=False)
+
+        bloco = _comum(rng, inicio, n, solicitantes)
+        receitas = textos[rng.choice(len(textos), n, p=pesos)].astype(object)
+        unicos = np.flatnonzero(rng.random(n) < textos_unicos)
+        receitas[unicos] = [f"{receitas[i]} (pedido {inicio + i})" for i in unicos]
+        bloco["DS_RECEITA"] = receitas
+        bloco.to_csv(destinos[1], mode="a" if inicio else "w", header=not inicio, index=False)
+    return destinos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("destino")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for caminho in generate_raw(args.destino, args.linhas, args.seed):
+        print(f"{caminho}: {os.path.getsize(caminho) / 2**20:.1f} MB")
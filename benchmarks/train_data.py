@@ -0,0 +1,61 @@
+# Preparação dos dados do train_binario: caminho original (balanceamento + Dataset.map com padding + divisão a cada
+# execução) contra src/models/train_data.prepare_dataset na primeira execução (grava o dataset) e nas seguintes
+# (carrega do disco). O dataset fica em uma pasta temporária; o tokenizer é o de models/config.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import time
+import pandas as pd
+from datasets import Dataset
+from transformers import AutoTokenizer
+
+from src.models.classifier import CONFIG_DIR
+from src.models.train_binario import balance_data, BALANCE_PARAMS
+from src.models.train_data import prepare_dataset
+
+def legacy_prepare(dados, tokenizer): # Preparação original do train_binario.
+    dados_balanceados = balance_data(dados)
+
+    def preprocess_function(examples):
+        return tokenizer(examples["texto"], truncation=True, padding=True, max_length=128)
+
+    dataset = Dataset.from_list(dados_balanceados).map(preprocess_function, batched=True)
+    dataset = dataset.rename_column("label", "labels")
+    dataset.set_format("torch", columns=["input_ids", "attention_mask", "labels"])
+    dataset_split = dataset.train_test_split(test_size=0.3)
+    dataset_test_val = dataset_split["test"].train_test_split(test_size=0.5)
+    return dataset_split["train"], dataset_test_val["train"], dataset_test_val["test"]
+
+def timed(func, *args, **kwargs):
+    inicio = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivo", default=os.path.join("data", "raw", "sample_nao_estruturados.csv"))
+    parser.add_argument("--linhas", type=int, default=200_000)
+    parser.add_argument("--num-proc", type=int, default=1)
+    args = parser.parse_args()
+
+    textos = pd.read_csv(args.arquivo)["DS_RECEITA"].dropna().astype(str).tolist()
+    dados = [{"texto": textos[i % len(textos)]} for i in range(args.linhas)]
+    tokenizer = AutoTokenizer.from_pretrained(CONFIG_DIR)
+
+    (treino, _, _), t_original = timed(legacy_prepare, dados, tokenizer)
+    with tempfile.TemporaryDirectory() as pasta:
+        splits, t_primeira = timed(prepare_dataset, "binario", dados, balance_data, tokenizer, BALANCE_PARAMS, num_proc=args.num_proc, dataset_dir=pasta)
+        salvo, t_seguinte = timed(prepare_dataset, "binario", dados, balance_data, tokenizer, BALANCE_PARAMS, num_proc=args.num_proc, dataset_dir=pasta)
+        assert [len(v) for v in salvo.values()] == [len(v) for v in splits.values()]
+        assert salvo["train"]["labels"].tolist() == splits["train"]["labels"].tolist()
+
+    # Tokens armazenados: com padding por bloco do map x sem padding (o collator preenche cada lote do Trainer)
+    tokens_original = sum(len(ids) for ids in treino["input_ids"])
+    tokens_novo = sum(len(ids) for ids in splits["train"]["input_ids"])
+    print(f"{args.linhas:,} textos, {len(treino):,} exemplos de treino após o balanceamento (num_proc={args.num_proc})")
+    print(f"  original (a cada execução): {t_original:.2f} s, {tokens_original:,} tokens no treino")
+    print(f"  prepare_dataset, 1ª execução: {t_primeira:.2f} s, {tokens_novo:,} tokens no treino")
+    print(f"  prepare_dataset, execuções seguintes: {t_seguinte:.2f} s ({t_original / t_seguinte:.0f}x)")
@@ -0,0 +1,47 @@
+# Mapeamento do CD_TUSS no dataset estruturado: dicionário com str() e lambda por linha (versão anterior) contra o
+# catálogo compilado de src/data/tuss.py (índice int64, busca vetorizada). O catálogo de data/tuss/ é
+# completado com códigos sintéticos até o tamanho da tabela TUSS completa; confere que os resultados são iguais.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from src.data.tuss import TUSS_CATALOG_PATH, TussCatalog
+from src.models.rules import NAO_EXAME
+
+def timed(func, *args):
+    inicio = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=5_000_000)
+    parser.add_argument("--codigos", type=int, default=50_000)
+    parser.add_argument("--distintos", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    catalogo = pd.read_csv(TUSS_CATALOG_PATH, dtype=str)
+    extras = pd.DataFrame({"CD_TUSS": rng.choice(np.arange(10_000_000, 99_999_999), args.codigos - len(catalogo), replace=False).astype(str)})
+    extras["EXAME"] = "PROCEDIMENTO " + extras["CD_TUSS"]
+    catalogo = pd.concat([catalogo, extras], ignore_index=True).drop_duplicates("CD_TUSS", keep="first")
+    tuss_map = dict(zip(catalogo["CD_TUSS"], catalogo["EXAME"]))
+
+    # Linhas com códigos do catálogo (--distintos códigos diferentes) e 10% com 100 códigos fora do catálogo
+    conhecidos = rng.choice(catalogo["CD_TUSS"].astype(np.int64).to_numpy(), args.distintos, replace=False)
+    desconhecidos = rng.integers(1, 10**7, 100)
+    cd_tuss = pd.Series(np.where(rng.random(args.linhas) < 0.9, rng.choice(conhecidos, args.linhas), rng.choice(desconhecidos, args.linhas)))
+
+    compilado, t_compilar = timed(TussCatalog, catalogo["CD_TUSS"].astype(np.int64).to_numpy(), catalogo["EXAME"].to_numpy())
+    anterior, t_anterior = timed(lambda: cd_tuss.map(lambda x: tuss_map.get(str(x), NAO_EXAME)))
+    novo, t_novo = timed(compilado.lookup, cd_tuss)
+    assert (novo.astype(object) == anterior).all()
+
+    print(f"{args.linhas:,} linhas ({args.distintos:,} códigos distintos do catálogo), catálogo com {len(compilado):,} códigos (compilado em {t_compilar * 1000:.0f} ms)")
+    print(f"  dicionário + str() por linha: {t_anterior:.2f} s")
+    print(f"  catálogo compilado: {t_novo * 1000:.0f} ms ({t_anterior / t_novo:.0f}x)")
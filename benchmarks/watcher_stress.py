@@ -0,0 +1,110 @@
+# Teste de carga do monitor (src/data/watcher.py): vários CSVs grandes copiados de uma vez, cada um gerando dezenas de
+# eventos de modificação. Confere que cada arquivo é processado uma única vez e só depois de completo, que um reinício
+# não reprocessa nada e que alterar um arquivo o processa de novo.
+# Sem --watchdog os eventos são enviados direto à fila, como o watchdog faria a cada bloco escrito.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import tempfile
+import threading
+import time
+
+from src.data.watcher import FileQueue
+
+LINHA = "0,2020-02-15,1100000000,12345670000,João,RX DE TORAX PA E PERFIL\n"
+CABECALHO = "ID,DATA,TEL,CPF,SOLICITANTE,DS_RECEITA\n"
+
+def copy_slowly(path, linhas, blocos, file_queue, linha=LINHA): # Escreve o arquivo em blocos, como uma cópia grande, emitindo um evento por bloco.
+    por_bloco = linhas // blocos
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(CABECALHO)
+        for _ in range(blocos):
+            f.write(linha * por_bloco)
+            f.flush()
+            if file_queue is not None:
+                file_queue.notify(path)
+            time.sleep(0.02)
+
+def wait_idle(file_queue, timeout=120):
+    limite = time.monotonic() + timeout
+    while not file_queue.idle():
+        if time.monotonic() > limite:
+            raise TimeoutError("A fila não esvaziou")
+        time.sleep(0.05)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arquivos", type=int, default=50)
+    parser.add_argument("--linhas", type=int, default=20_000)
+    parser.add_argument("--blocos", type=int, default=40, help="Blocos (e eventos) por arquivo")
+    parser.add_argument("--debounce", type=float, default=0.5)
+    parser.add_argument("--watchdog", action="store_true", help="Usa o Observer do watchdog em vez de enviar os eventos diretamente")
+    args = parser.parse_args()
+
+    chamadas = []
+    incompletos = []
+
+    def processar(path): # Simula o processamento e confere se o arquivo estava completo quando foi entregue.
+        with open(path, encoding="utf-8") as f:
+            linhas = sum(1 for _ in f) - 1
+        if linhas != args.linhas // args.blocos * args.blocos:
+            incompletos.append(path)
+        chamadas.append(path)
+        time.sleep(0.01)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        state_path = os.path.join(pasta, "estado.db")
+        raw = os.path.join(pasta, "raw")
+        os.makedirs(raw)
+        file_queue = FileQueue(processar, state_path, debounce=args.debounce, poll_interval=args.debounce / 4)
+        file_queue.start()
+
+        observer = None
+        if args.watchdog:
+            from watchdog.observers import Observer
+            from monitor import MonitorCSV
+            observer = Observer()
+            observer.schedule(MonitorCSV(file_queue), raw, recursive=False)
+            observer.start()
+
+        # Todos os arquivos chegam ao mesmo tempo
+        inicio = time.perf_counter()
+        caminhos = [os.path.join(raw, f"lote_{i:03d}.csv") for i in range(args.arquivos)]
+        escritores = [threading.Thread(target=copy_slowly, args=(c, args.linhas, args.blocos, None if observer else file_queue)) for c in caminhos]
+        for escritor in escritores:
+            escritor.start()
+        for escritor in escritores:
+            escritor.join()
+        time.sleep(args.debounce / 2)
+        wait_idle(file_queue)
+        tempo = time.perf_counter() - inicio
+
+        eventos = file_queue.contagens["eventos"]
+        print(f"{args.arquivos} arquivos, {eventos} eventos -> {len(chamadas)} processamentos em {tempo:.2f} s")
+        assert sorted(chamadas) == sorted(os.path.abspath(c) for c in caminhos), "Cada arquivo deve ser processado exatamente uma vez"
+        assert not incompletos, f"Arquivos processados antes de terminar a cópia: {len(incompletos)}"
+
+        # Reinício: o registro persistido evita o reprocessamento
+        if observer:
+            observer.stop()
+            observer.join()
+        file_queue.stop()
+        chamadas.clear()
+        file_queue = FileQueue(processar, state_path, debounce=args.debounce, poll_interval=args.debounce / 4)
+        file_queue.start()
+        for caminho in caminhos:
+            file_queue.notify(caminho)
+        time.sleep(args.debounce / 2)
+        wait_idle(file_queue)
+        print(f"reinício: {file_queue.contagens['ignorados']} arquivos ignorados, {len(chamadas)} processados")
+        assert not chamadas
+
+        # Conteúdo alterado: processado de novo
+        copy_slowly(caminhos[0], args.linhas, args.blocos, file_queue, linha=LINHA.replace("RX", "TC"))
+        time.sleep(args.debounce / 2)
+        wait_idle(file_queue)
+        print(f"arquivo alterado: {len(chamadas)} processamento")
+        assert chamadas == [os.path.abspath(caminhos[0])]
+        file_queue.stop()
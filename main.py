@@ -1,36 +1,87 @@
-from src.data.process_data import process_data
+from src.data.process_data import process_data, process_data_streaming, process_data_incremental, process_file, validate_prefilter
 from src.messaging.generate_messages import generate_messages
 from src.messaging.send_messages import send_all_messages
+from src.monitoring.metrics import start_run, finish_run, get_metrics, METRICS_JSONL, METRICS_PROM
+from src.models.prefilter import PREFILTER_ENABLED
+import argparse
 import time
 
-if __name__ == "__main__":
-    # Marca o início do tempo
-    start_time = time.time()
-    
-    # Processa todos os dados e gera o CSV completo
+def run_pipeline(max_messages=100, workers=1, streaming=False, chunksize=50_000, incremental=False, csv=False, skip_sent=True, merge_by_phone=False, arquivo=None, perfil=None, use_prefilter=PREFILTER_ENABLED): # Executa o fluxo completo: processamento, geração e disparo das mensagens.
+    # arquivo: processa apenas este CSV (usado pelo monitor.py) em vez dos dois datasets de data/raw/
+    # use_prefilter: resolve pelas regras de src/models/prefilter.py, sem o modelo, os textos que com certeza não são exames
+    # perfil: etapas executadas sob o cProfile (lista vazia = todas); None desativa
+    # As métricas de cada etapa vão para data/metrics/pipeline.jsonl e o resumo para data/metrics/pipeline.prom,
+    # inclusive quando a execução falha no meio
+    start_run(profile=perfil)
+    try:
+        return _run_pipeline(max_messages, workers, streaming, chunksize, incremental, csv, skip_sent, merge_by_phone, arquivo, use_prefilter)
+    finally:
+        resumo = finish_run()
+        print(f"Métricas da execução {resumo['execucao']} gravadas em {METRICS_JSONL} e {METRICS_PROM}")
+
+def _run_pipeline(max_messages, workers, streaming, chunksize, incremental, csv, skip_sent, merge_by_phone, arquivo, use_prefilter):
+    # Processa todos os dados e gera o resultado completo (data/processed/resultado_processado.parquet)
     print("Processando todos os dados...")
-    df_processed = process_data()
-    print(f"Processamento concluído. Total de linhas no CSV: {len(df_processed)}")
-    df_processed.to_csv("data/processed/resultado_processado.csv", index=False)
-    
+    # No modo streaming o resultado não fica em memória e as mensagens são geradas a partir do arquivo gravado
+    df_resultado = None
+    with get_metrics().stage("process_data") as etapa:
+        if arquivo:
+            df_resultado = process_file(arquivo, workers=workers, csv=csv, use_prefilter=use_prefilter)
+            total_linhas = len(df_resultado)
+        elif incremental:
+            df_resultado = process_data_incremental(workers=workers, csv=csv, use_prefilter=use_prefilter)
+            total_linhas = len(df_resultado)
+        elif streaming:
+            total_linhas = process_data_streaming(chunksize=chunksize, workers=workers, csv=csv, use_prefilter=use_prefilter)
+        else:
+            df_resultado = process_data(workers=workers, csv=csv, use_prefilter=use_prefilter)
+            total_linhas = len(df_resultado)
+        etapa.itens = total_linhas
+    print(f"Processamento concluído. Total de linhas processadas: {total_linhas}")
+
     # Gera as mensagens personalizadas
     print("Gerando mensagens...")
-    messages = generate_messages()
+    # Por padrão os exames que já receberam mensagem com sucesso (db/envios.db) não são enviados de novo
+    messages = generate_messages(df_resultado, skip_sent=skip_sent, merge_by_phone=merge_by_phone)
     print(f"Total de mensagens geradas: {len(messages)}")
-    
+
     # Limita os disparos a 100 mensagens para teste
-    max_messages = 100
     if len(messages) > max_messages:
         messages = messages[:max_messages]
         print(f"Limitando envio a {max_messages} mensagens.")
     else:
         print(f"Enviando todas as {len(messages)} mensagens.")
-    
+
     # Dispara as mensagens
     print("Enviando mensagens...")
     send_all_messages(messages)
-    
+    return total_linhas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="Processos usados na classificação do dataset não estruturado")
+    parser.add_argument("--streaming", action="store_true", help="Processa os CSVs em blocos, com memória limitada")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Linhas por bloco no modo --streaming")
+    parser.add_argument("--incremental", action="store_true", help="Processa apenas as linhas novas ou alteradas desde a última execução")
+    parser.add_argument("--csv", action="store_true", help="Também exporta as saídas processadas em CSV")
+    parser.add_argument("--reenviar", action="store_true", help="Envia também os exames que já receberam mensagem com sucesso")
+    parser.add_argument("--agrupar", action="store_true", help="Junta em uma única mensagem os exames de um mesmo telefone")
+    parser.add_argument("--arquivo", help="Processa apenas este CSV em vez dos datasets de data/raw/")
+    parser.add_argument("--prefiltro", action="store_true", default=PREFILTER_ENABLED, help="Resolve pelas regras, sem o modelo, os textos que com certeza não são exames")
+    parser.add_argument("--conferir-prefiltro", action="store_true", help="Só confere uma amostra das linhas que o pré-filtro resolveria com o modelo binário e sai (não processa nem envia)")
+    parser.add_argument("--perfil", nargs="*", metavar="ETAPA", help="Executa as etapas sob o cProfile (sem nomes = todas) e grava os .prof em data/metrics/")
+    args = parser.parse_args()
+
+    if args.conferir_prefiltro:
+        validate_prefilter()
+        raise SystemExit(0)
+
+    # Marca o início do tempo
+    start_time = time.time()
+
+    run_pipeline(workers=args.workers, streaming=args.streaming, chunksize=args.chunksize, incremental=args.incremental, csv=args.csv, skip_sent=not args.reenviar, merge_by_phone=args.agrupar, arquivo=args.arquivo, perfil=args.perfil, use_prefilter=args.prefiltro)
+
     # Marca o fim do tempo e exibe o total
     end_time = time.time()
     total_time = end_time - start_time
-    print(f"Tempo total de execução: {total_time:.2f} segundos ({total_time/60:.2f} minutos)")
\ No newline at end of file
+    print(f"Tempo total de execução: {total_time:.2f} segundos ({total_time/60:.2f} minutos)")
@@ -1,45 +1,56 @@
+import argparse
 import time
 import os
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-import subprocess
+from server import is_server_running, request_processing
+from src.data.watcher import FileQueue
 #from google.cloud import storage
 
 # Inicializa o cliente do Google Cloud Storage (GCS)
 #storage_client = storage.Client()
 #bucket = storage_client.bucket("seu-bucket-exames")  # Substitua por seu bucket
 
+def processar_arquivo(file_path): # Executa o fluxo do main.py apenas para o CSV alterado.
+    print(f"Novo CSV detectado: {file_path}, processando...")
+    inicio = time.time()
+
+    # Usa o daemon (server.py) com os modelos já carregados quando disponível
+    if is_server_running():
+        request_processing(arquivo=file_path)
+    else:
+        # No próprio processo: os modelos são carregados no primeiro arquivo e reaproveitados nos seguintes
+        from main import run_pipeline
+        run_pipeline(arquivo=file_path)
+    print(f"Processamento de {file_path} concluído em {time.time() - inicio:.2f} segundos.")
+
+    # Após a execução, envia o arquivo processado para o GCS
+    #upload_to_gcs(file_path)
+
+    # Reexibe a mensagem de monitoramento
+    print(f"🛠️ Monitorando a pasta {os.path.join('data', 'raw')}...")
+
 class MonitorCSV(FileSystemEventHandler):
 
-    def __init__(self):
-        # Conjunto para rastrear arquivos já processados
-        self.processed_files = set()
+    def __init__(self, file_queue):
+        # Fila que espera cada arquivo terminar de ser escrito e o processa uma única vez por conteúdo
+        # (os arquivos já processados ficam registrados em data/cache/estado.db e sobrevivem a reinícios)
+        self.file_queue = file_queue
+
+    def on_created(self, event):
+        self._notify(event.src_path, event.is_directory)
 
     def on_modified(self, event):
-        # Verifica se o arquivo modificado é um CSV
-        if event.src_path.endswith(".csv"):
+        self._notify(event.src_path, event.is_directory)
 
+    def on_moved(self, event):
+        self._notify(event.dest_path, event.is_directory)
+
+    def _notify(self, path, is_directory):
+        # Verifica se o arquivo alterado é um CSV; o processamento acontece na thread do worker, sem bloquear o watchdog
+        if not is_directory and path.endswith(".csv"):
             # Normaliza o caminho para evitar duplicatas (ex.: diferenças de barra)
-            file_path = os.path.normpath(event.src_path)
-
-            # Verifica se o arquivo já foi processado
-            if file_path not in self.processed_files:
-                print(f"Novo CSV detectado: {file_path}, rodando main.py...")
-                
-                # Executa o script principal (main.py)
-                subprocess.run(["python", "main.py"])
-                
-                # Após a execução, envia o arquivo processado para o GCS
-                #self.upload_to_gcs(file_path)
-                
-                # Marca o arquivo como processado
-                self.processed_files.add(file_path)
-
-                # Reexibe a mensagem de monitoramento
-                print(f"🛠️ Monitorando a pasta {os.path.join('data', 'raw')}...")
-            
-            # Após a execução, envia o arquivo processado para o GCS
-            #self.upload_to_gcs(event.src_path)
+            self.file_queue.notify(os.path.normpath(path))
 
     #def upload_to_gcs(self, file_path):
         # Envia o arquivo CSV original para o GCS (pasta raw/)
@@ -57,12 +68,27 @@ class MonitorCSV(FileSystemEventHandler):
             #print(f"Arquivo processado {processed_file} não encontrado.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--metricas-porta", type=int, help="Expõe as métricas da última execução (data/metrics/pipeline.prom) em http://<host>:<porta>/metrics")
+    args = parser.parse_args()
+    if args.metricas_porta:
+        from src.monitoring.metrics import serve_metrics
+        serve_metrics(args.metricas_porta)
+        print(f"Métricas do pipeline em http://localhost:{args.metricas_porta}/metrics")
+
     # Caminho da pasta a ser monitorada
     caminho_pasta = os.path.join("data", "raw")  # Ajustado para compatibilidade cruzada
-    event_handler = MonitorCSV()
+    file_queue = FileQueue(processar_arquivo)
+    file_queue.start()
+    event_handler = MonitorCSV(file_queue)
     observer = Observer()
     observer.schedule(event_handler, caminho_pasta, recursive=False)
-    
+
+    # CSVs que chegaram com o monitor parado; os já processados com o mesmo conteúdo são ignorados
+    for nome in sorted(os.listdir(caminho_pasta)):
+        if nome.endswith(".csv"):
+            file_queue.notify(os.path.join(caminho_pasta, nome))
+
     print(f"🛠️ Monitorando a pasta {caminho_pasta}...")
     observer.start()
 
@@ -71,4 +97,5 @@ if __name__ == "__main__":
             time.sleep(5)
     except KeyboardInterrupt:
         observer.stop()
-    observer.join()
\ No newline at end of file
+    observer.join()
+    file_queue.stop()
@@ -0,0 +1,113 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import urllib.request
+import urllib.error
+import threading
+import json
+import time
+import os
+
+# Endereço local do daemon de classificação
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+
+# Garante que apenas um processamento completo rode por vez
+_pipeline_lock = threading.Lock()
+
+
+class ClassifierHandler(BaseHTTPRequestHandler): # Atende os lotes enviados pelo monitor.py e pela cloud function usando os modelos já carregados.
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._responder(200, {"status": "ok"})
+        else:
+            self._responder(404, {"erro": f"Rota {self.path} não encontrada"})
+
+    def do_POST(self):
+        try:
+            tamanho = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(tamanho) or b"{}")
+        except ValueError as e:
+            self._responder(400, {"erro": f"JSON inválido: {e}"})
+            return
+
+        try:
+            if self.path == "/predict":
+                # Classifica um lote de textos com os modelos já carregados
+                from src.models.predict import predict_exam_batch
+                inicio = time.time()
+                predictions = predict_exam_batch(payload.get("texts", []), batch_size=payload.get("batch_size"))
+                self._responder(200, {"predictions": predictions, "tempo": time.time() - inicio})
+            elif self.path == "/processar":
+                # Executa o fluxo completo do main.py no próprio processo
+                from main import run_pipeline
+                from src.models.prefilter import PREFILTER_ENABLED
+                inicio = time.time()
+                with _pipeline_lock:
+                    total_linhas = run_pipeline(
+                        max_messages=payload.get("max_messages", 100),
+                        workers=payload.get("workers", 1),
+                        streaming=payload.get("streaming", False),
+                        incremental=payload.get("incremental", False),
+                        csv=payload.get("csv", False),
+                        skip_sent=payload.get("skip_sent", True),
+                        merge_by_phone=payload.get("merge_by_phone", False),
+                        arquivo=payload.get("arquivo"),
+                        use_prefilter=payload.get("prefilter", PREFILTER_ENABLED),
+                    )
+                self._responder(200, {"linhas": total_linhas, "tempo": time.time() - inicio})
+            else:
+                self._responder(404, {"erro": f"Rota {self.path} não encontrada"})
+        except Exception as e:
+            print(f"Erro ao atender {self.path}: {e}")
+            self._responder(500, {"erro": str(e)})
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT): # Carrega os modelos uma única vez e fica aguardando requisições.
+    from src.models.classifier import get_classifier
+
+    inicio = time.time()
+    get_classifier()
+    print(f"Modelos carregados em {time.time() - inicio:.2f} segundos.")
+
+    server = ThreadingHTTPServer((host, port), ClassifierHandler)
+    print(f"Servidor de classificação ouvindo em http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+def _post(rota, payload, host=SERVER_HOST, port=SERVER_PORT, timeout=None):
+    req = urllib.request.Request(
+        f"http://{host}:{port}{rota}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+def is_server_running(host=SERVER_HOST, port=SERVER_PORT): # Verifica se o daemon está no ar.
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/health", timeout=1) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+def predict_remote(texts, batch_size=None, host=SERVER_HOST, port=SERVER_PORT): # Envia um lote de textos para o daemon e retorna as previsões.
+    return _post("/predict", {"texts": list(texts), "batch_size": batch_size}, host, port)["predictions"]
+
+def request_processing(max_messages=100, arquivo=None, host=SERVER_HOST, port=SERVER_PORT): # Solicita ao daemon a execução do fluxo completo do main.py (apenas de `arquivo`, se informado).
+    return _post("/processar", {"max_messages": max_messages, "arquivo": os.path.abspath(arquivo) if arquivo else None}, host, port)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,68 @@
+import time
+import os
+import pandas as pd
+from src.data.load_data import RAW_DTYPES
+from src.data.process_data import process_estruturado, process_nao_estruturado
+from src.data.storage import ProcessedWriter
+from src.models.prefilter import PREFILTER_ENABLED
+
+# Linhas lidas do objeto por vez; a memória usada não depende do tamanho do arquivo enviado
+CHUNKSIZE = 50_000
+# Limite de mensagens disparadas por arquivo (o mesmo do main.py)
+MAX_MESSAGES = 100
+# Histórico de envios da instância; em Cloud Functions só /tmp aceita escrita
+ENVIOS_DB = "/tmp/envios.db"
+# O cache de previsões fica em data/cache/, que não aceita escrita em Cloud Functions
+USE_CACHE = False
+
+
+def output_name(name): # Objeto de saída de cada entrada: raw/lote.csv -> processed/raw/lote_processado.parquet
+    return f"processed/{os.path.splitext(name)[0]}_processado.parquet"
+
+def process_object(storage, bucket, name, chunksize=CHUNKSIZE, use_cache=USE_CACHE, use_prefilter=PREFILTER_ENABLED, on_chunk=None): # Lê o objeto em blocos direto do armazenamento, classifica e grava a saída em Parquet no mesmo bucket.
+    # on_chunk: chamada com cada bloco já processado (ex.: geração das mensagens)
+    destino = output_name(name)
+    total = 0
+    with storage.open_read(bucket, name) as entrada, storage.open_write(bucket, destino) as saida:
+        writer = ProcessedWriter(None, sink=saida)
+        # O writer é fechado antes da saída mesmo se um bloco falhar (senão ele grava o rodapé em um objeto já fechado)
+        try:
+            for chunk in pd.read_csv(entrada, dtype=RAW_DTYPES, chunksize=chunksize):
+                # O dataset estruturado é o que tem o CD_TUSS; os demais passam pelos modelos
+                if "CD_TUSS" in chunk.columns:
+                    chunk = process_estruturado(chunk)
+                else:
+                    chunk = process_nao_estruturado(chunk, use_cache, use_prefilter)
+                writer.write(chunk)
+                total += len(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+        finally:
+            writer.close()
+    return destino, total
+
+def handle_object(storage, bucket, name, send=True, max_messages=MAX_MESSAGES, chunksize=CHUNKSIZE, envios_db=ENVIOS_DB, use_cache=USE_CACHE): # Processa um CSV enviado ao bucket e dispara as mensagens dos exames encontrados.
+    inicio = time.time()
+    enviadas = 0
+    send_log = None
+    if send:
+        from src.messaging.generate_messages import generate_messages
+        from src.messaging.send_messages import send_all_messages
+        from src.messaging.send_log import SendLogWriter
+        send_log = SendLogWriter(envios_db)
+
+    def enviar(chunk): # Mensagens de cada bloco, sem reenviar exames que já receberam mensagem nesta instância
+        nonlocal enviadas
+        if not send or enviadas >= max_messages:
+            return
+        messages = generate_messages(chunk, skip_sent=True, db_path=envios_db)[:max_messages - enviadas]
+        if messages:
+            send_all_messages(messages, send_log=send_log)
+            enviadas += len(messages)
+
+    try:
+        destino, linhas = process_object(storage, bucket, name, chunksize, use_cache, on_chunk=enviar)
+    finally:
+        if send_log is not None:
+            send_log.close()
+    return {"saida": destino, "linhas": linhas, "mensagens": enviadas, "tempo": time.time() - inicio}
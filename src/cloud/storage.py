@@ -0,0 +1,46 @@
+import os
+
+# Com esta variável apontando para uma pasta, os buckets são lidos e gravados nela em vez do Google Cloud Storage (testes e execução local)
+LOCAL_STORAGE_ENV = "STORAGE_LOCAL_ROOT"
+
+
+class GCSStorage: # Leitura e escrita de objetos do Google Cloud Storage como arquivos, sem baixá-los para o disco.
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self): # Cliente criado no primeiro uso (importar o google.cloud é caro)
+        if self._client is None:
+            from google.cloud import storage
+            self._client = storage.Client()
+        return self._client
+
+    def open_read(self, bucket, name):
+        return self.client.bucket(bucket).blob(name).open("rb")
+
+    def open_write(self, bucket, name):
+        # ignore_flush: o pyarrow chama flush() durante a escrita, o que o BlobWriter não suporta
+        return self.client.bucket(bucket).blob(name).open("wb", ignore_flush=True)
+
+
+class LocalStorage: # Mesma interface sobre uma pasta local: cada bucket é uma subpasta de root.
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, bucket, name):
+        return os.path.join(self.root, bucket, *name.split("/"))
+
+    def open_read(self, bucket, name):
+        return open(self.path(bucket, name), "rb")
+
+    def open_write(self, bucket, name):
+        path = self.path(bucket, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, "wb")
+
+
+def get_storage(): # Armazenamento local se STORAGE_LOCAL_ROOT estiver definida; senão, o Google Cloud Storage.
+    root = os.environ.get(LOCAL_STORAGE_ENV)
+    return LocalStorage(root) if root else GCSStorage()
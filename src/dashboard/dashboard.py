@@ -5,34 +5,50 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-
-# Carregar os dados
-@st.cache_data
-def load_data():
+from src.data.aggregates import AGGREGATE_NAME, AggregateCube, build_aggregate
+from src.data.storage import read_processed, read_processed_head, processed_exists, processed_signature
+
+# Origens do agregado e arquivo usado na prévia de cada visão
+VISOES = {
+    'Estruturado': (["estruturado"], "estruturado_processado"),
+    'Não Estruturado': (["nao_estruturado"], "nao_estruturado_processado"),
+    'Resultado Processado': (None, "resultado_processado"),
+}
+# Saídas lidas pelo dashboard; a assinatura delas (mtime e tamanho) faz parte da chave dos caches
+SAIDAS = [AGGREGATE_NAME, "estruturado_processado", "nao_estruturado_processado", "resultado_processado"]
+
+# Carregar os dados (o cubo com os índices de datas é montado uma vez e compartilhado entre as interações e as sessões,
+# sem cópia a cada execução do script; quando o pipeline regrava uma saída a assinatura muda e o cubo é recarregado)
+@st.cache_resource(max_entries=1)
+def load_cube(assinatura):
     try:
-        estruturado = pd.read_csv(r'data\processed\estruturado_processado.csv', dtype={'CPF': str})
-        nao_estruturado = pd.read_csv(r'data\processed\nao_estruturado_processado.csv', dtype={'CPF': str})
-        resultado = pd.read_csv(r'data\processed\resultado_processado.csv', dtype={'CPF': str})
-        
-        for df in [estruturado, nao_estruturado, resultado]:
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col].fillna('', inplace=True)
-                else:
-                    df[col].fillna(0, inplace=True)
-        
+        if processed_exists(AGGREGATE_NAME):
+            cubo = read_processed(AGGREGATE_NAME)
+        else:
+            # Saídas gravadas antes do agregado diário: monta o agregado a partir das linhas processadas
+            colunas = ["DATA", "exame_resultado", "SOLICITANTE"]
+            cubo = build_aggregate(read_processed("estruturado_processado", columns=colunas), read_processed("nao_estruturado_processado", columns=colunas))
         st.success("Dados carregados com sucesso!")
-        return estruturado, nao_estruturado, resultado
+        return AggregateCube(cubo)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return AggregateCube(pd.DataFrame(columns=["DATA", "origem", "exame_resultado", "SOLICITANTE", "quantidade"]))
+
+@st.cache_data(max_entries=len(VISOES))
+def load_preview(nome, assinatura): # Apenas as 5 primeiras linhas de cada saída são lidas
+    try:
+        return read_processed_head(nome, 5)
+    except Exception as e:
+        st.error(f"Erro ao carregar {nome}: {e}")
+        return pd.DataFrame()
 
 # Carregar os dados
-estruturado, nao_estruturado, resultado = load_data()
+assinatura = processed_signature(SAIDAS)
+cube = load_cube(assinatura)
 
 # Interface
 st.sidebar.header('Filtros de Consulta')
-visao = st.sidebar.radio('Selecione a Visão:', 
+visao = st.sidebar.radio('Selecione a Visão:',
                         ('Estruturado', 'Não Estruturado', 'Resultado Processado'))
 
 # Opção para selecionar tipo de filtro de data
@@ -47,91 +63,37 @@ else:
     data_inicio = data_especifica
     data_fim = data_especifica
 
-# Converter datas para datetime
-data_inicio_dt = pd.to_datetime(data_inicio.strftime('%Y-%m-%d'), format='%Y-%m-%d')
-data_fim_dt = pd.to_datetime(data_fim.strftime('%Y-%m-%d'), format='%Y-%m-%d')
-
-# Função de filtro
-def filter_dates(df, data_inicio_dt, data_fim_dt):
-    if 'DATA' not in df.columns:
-        st.warning("Coluna 'DATA' não encontrada!")
-        return df
-    
-    df_copy = df.copy()
-    df_copy['DATA'] = pd.to_datetime(df_copy['DATA'], format='%Y-%m-%d', errors='coerce')
-    
-    df_filtered = df_copy[(df_copy['DATA'] >= data_inicio_dt) & (df_copy['DATA'] <= data_fim_dt)]
-    
-    return df_filtered
-
 # Função para criar tabela de tipos de exames e quantidades
-def cria_tabela_exame(df):
-    if 'exame_resultado' not in df.columns:
-        st.warning("Coluna 'exame_resultado' não encontrada!")
-        return
-    
-    # Contar ocorrências de cada tipo de exame
-    exam_counts = df['exame_resultado'].value_counts().reset_index()
+def cria_tabela_exame(por_exame):
+    exam_counts = por_exame.reset_index()
     exam_counts.columns = ['Tipo de Exame', 'Quantidade']
-    
+
     # Exibir a tabela
     st.write("### Quantidade por Tipo de Exame:")
     st.write(exam_counts)
 
-# Processamento
-if visao == 'Estruturado':
-    st.write("Dados Estruturados (5 primeiras linhas):", estruturado.head())
-    df = filter_dates(estruturado, data_inicio_dt, data_fim_dt)
-    st.header('Análise dos Dados Estruturados')
-    
-    if filtro_data_tipo == 'Data Específica':
-        st.subheader(f"Exames Solicitados em {data_especifica.strftime('%d/%m/%Y')}")
-        st.write(f"### Total de Exames: {len(df)}")
-    else: 
-        st.subheader(f'Exames Solicitados entre {data_inicio.strftime('%d/%m/%Y')} e {data_fim.strftime('%d/%m/%Y')}')
-        st.write(f'### Total de Exames: {len(df)}')
-    
-    if 'SOLICITANTE' in df.columns:
-        st.write("### Exames por Solicitante:")
-        st.write(df['SOLICITANTE'].value_counts())
-    else:
-        st.warning("Coluna 'SOLICITANTE' não encontrada!")
-
-    # Adicionar tabela de tipos de exames e quantidades
-    cria_tabela_exame(df)
-
-elif visao == 'Não Estruturado':
-    st.write("Dados Não Estruturados (5 primeiras linhas):", nao_estruturado.head())
-    df = filter_dates(nao_estruturado, data_inicio_dt, data_fim_dt)
-    st.header('Análise dos Dados Não Estruturados')
-    
-    if filtro_data_tipo == 'Data Específica':
-        st.subheader(f"Exames Solicitados em {data_especifica.strftime('%d/%m/%Y')}")
-        st.write(f"### Total de Exames: {len(df)}")
-    else: 
-        st.subheader(f'Exames Solicitados entre {data_inicio.strftime('%d/%m/%Y')} e {data_fim.strftime('%d/%m/%Y')}')
-        st.write(f'### Total de Exames: {len(df)}')
-
-    if 'SOLICITANTE' in df.columns:
-        st.write("### Exames por Solicitante:")
-        st.write(df['SOLICITANTE'].value_counts())
-
-    cria_tabela_exame(df)
-
-elif visao == 'Resultado Processado':
-    st.write("Resultado Processado (5 primeiras linhas):", resultado.head())
-    df = filter_dates(resultado, data_inicio_dt, data_fim_dt)
-    st.header('Análise dos Resultados Processados')
-    
-    if filtro_data_tipo == 'Data Específica':
-        st.subheader(f"Exames Processados em {data_especifica.strftime('%d/%m/%Y')}")
-        st.write(f"### Total de Exames: {len(df)}")
-    else: 
-        st.subheader(f'Exames Solicitados entre {data_inicio.strftime('%d/%m/%Y')} e {data_fim.strftime('%d/%m/%Y')}')
-        st.write(f'### Total de Exames: {len(df)}')
-
-    if 'SOLICITANTE' in df.columns:
-        st.write("### Exames por Solicitante:")
-        st.write(df['SOLICITANTE'].value_counts())
-
-    cria_tabela_exame(df)
+# Processamento: as contagens vêm do agregado diário (busca binária pelas datas), sem percorrer as linhas processadas
+origens, nome_preview = VISOES[visao]
+consulta = cube.query(data_inicio, data_fim, origens)
+
+titulos = {
+    'Estruturado': ("Dados Estruturados (5 primeiras linhas):", 'Análise dos Dados Estruturados', "Exames Solicitados em"),
+    'Não Estruturado': ("Dados Não Estruturados (5 primeiras linhas):", 'Análise dos Dados Não Estruturados', "Exames Solicitados em"),
+    'Resultado Processado': ("Resultado Processado (5 primeiras linhas):", 'Análise dos Resultados Processados', "Exames Processados em"),
+}
+titulo_preview, titulo_analise, titulo_data = titulos[visao]
+
+st.write(titulo_preview, load_preview(nome_preview, assinatura))
+st.header(titulo_analise)
+
+if filtro_data_tipo == 'Data Específica':
+    st.subheader(f"{titulo_data} {data_especifica.strftime('%d/%m/%Y')}")
+else:
+    st.subheader(f"Exames Solicitados entre {data_inicio.strftime('%d/%m/%Y')} e {data_fim.strftime('%d/%m/%Y')}")
+st.write(f"### Total de Exames: {consulta['total']}")
+
+st.write("### Exames por Solicitante:")
+st.write(consulta['por_solicitante'].rename_axis('SOLICITANTE').rename('count'))
+
+# Adicionar tabela de tipos de exames e quantidades
+cria_tabela_exame(consulta['por_exame'])
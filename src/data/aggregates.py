@@ -0,0 +1,78 @@
+# Agregado diário da camada processada: quantidade de exames por dia, origem, tipo de exame e solicitante.
+# O dashboard consulta este agregado em vez das linhas processadas.
+import numpy as np
+import pandas as pd
+
+AGGREGATE_NAME = "agregado_diario"
+AGGREGATE_KEYS = ["DATA", "origem", "exame_resultado", "SOLICITANTE"]
+
+
+def daily_aggregate(df, origem): # Conta as linhas de um dataset processado por dia, tipo de exame e solicitante.
+    chaves = pd.DataFrame({
+        "DATA": pd.to_datetime(df["DATA"], format="%Y-%m-%d", errors="coerce").dt.normalize(),
+        "origem": origem,
+        "exame_resultado": df["exame_resultado"].astype(object),
+        "SOLICITANTE": df["SOLICITANTE"].astype(object),
+    })
+    # Linhas sem data nunca entram em um filtro de datas; exame/solicitante ausentes continuam contando no total
+    chaves = chaves[chaves["DATA"].notna()]
+    return chaves.groupby(AGGREGATE_KEYS, dropna=False).size().reset_index(name="quantidade")
+
+def combine_aggregates(partes): # Junta agregados parciais (ex.: de cada bloco do modo streaming) somando as contagens.
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame({col: [] for col in AGGREGATE_KEYS + ["quantidade"]})
+    cubo = pd.concat(partes, ignore_index=True)
+    for col in ("origem", "exame_resultado", "SOLICITANTE"):
+        cubo[col] = cubo[col].astype(object)
+    cubo = cubo.groupby(AGGREGATE_KEYS, dropna=False)["quantidade"].sum().reset_index()
+    return cubo.sort_values(["origem", "DATA"], kind="stable", ignore_index=True)
+
+def build_aggregate(estruturado, nao_estruturado): # Agregado dos dois datasets processados.
+    return combine_aggregates([daily_aggregate(estruturado, "estruturado"), daily_aggregate(nao_estruturado, "nao_estruturado")])
+
+
+class AggregateCube: # Consulta o agregado por intervalo de datas: busca binária no índice de datas ordenado de cada origem e contagem por código.
+
+    def __init__(self, cubo):
+        # Uma única lista de categorias para todas as origens, para que os códigos possam ser somados entre elas
+        self.exames = pd.Categorical(cubo["exame_resultado"].astype(object)).categories
+        self.solicitantes = pd.Categorical(cubo["SOLICITANTE"].astype(object)).categories
+        self.origens = {}
+        for origem, parte in cubo.groupby(cubo["origem"].astype(object), sort=False):
+            parte = parte.sort_values("DATA", kind="stable")
+            self.origens[origem] = (
+                parte["DATA"].to_numpy(dtype="datetime64[ns]"),
+                pd.Categorical(parte["exame_resultado"].astype(object), categories=self.exames).codes,
+                pd.Categorical(parte["SOLICITANTE"].astype(object), categories=self.solicitantes).codes,
+                parte["quantidade"].to_numpy(dtype=np.int64),
+            )
+
+    def query(self, data_inicio, data_fim, origens=None): # Totais entre as duas datas (inclusive) para as origens pedidas (None = todas).
+        inicio = np.datetime64(pd.Timestamp(data_inicio).normalize(), "ns")
+        fim = np.datetime64(pd.Timestamp(data_fim).normalize(), "ns")
+        total = 0
+        por_exame = np.zeros(len(self.exames), dtype=np.int64)
+        por_solicitante = np.zeros(len(self.solicitantes), dtype=np.int64)
+        for origem in origens or self.origens:
+            if origem not in self.origens:
+                continue
+            datas, exames, solicitantes, quantidade = self.origens[origem]
+            i, j = np.searchsorted(datas, inicio, "left"), np.searchsorted(datas, fim, "right")
+            total += int(quantidade[i:j].sum())
+            por_exame += _count_by_code(exames[i:j], quantidade[i:j], len(self.exames))
+            por_solicitante += _count_by_code(solicitantes[i:j], quantidade[i:j], len(self.solicitantes))
+        return {
+            "total": total,
+            "por_exame": _sorted_counts(por_exame, self.exames),
+            "por_solicitante": _sorted_counts(por_solicitante, self.solicitantes),
+        }
+
+
+def _count_by_code(codes, pesos, n): # Soma os pesos por código de categoria (o código -1, valor ausente, fica de fora).
+    validos = codes >= 0
+    return np.bincount(codes[validos], weights=pesos[validos], minlength=n).astype(np.int64)
+
+def _sorted_counts(contagens, categorias): # Contagens em ordem decrescente, sem as categorias zeradas (como o value_counts).
+    serie = pd.Series(contagens, index=categorias)
+    return serie[serie > 0].sort_values(ascending=False, kind="stable")
@@ -1,7 +1,28 @@
 import pandas as pd
 import os
+from src.monitoring.metrics import get_metrics
+
+ESTRUTURADO_FILE = "sample_estruturados.csv"
+NAO_ESTRUTURADO_FILE = "sample_nao_estruturados.csv"
+# TEL e CPF são lidos como texto para não perder zeros à esquerda
+RAW_DTYPES = {"TEL": str, "CPF": str}
 
 def load_data(data_dir="data/raw/"):
-    estruturado = pd.read_csv(os.path.join(data_dir, "sample_estruturados.csv"))
-    nao_estruturado = pd.read_csv(os.path.join(data_dir, "sample_nao_estruturados.csv"))
-    return estruturado, nao_estruturado
\ No newline at end of file
+    with get_metrics().stage("load_data") as etapa:
+        estruturado = pd.read_csv(os.path.join(data_dir, ESTRUTURADO_FILE), dtype=RAW_DTYPES)
+        nao_estruturado = pd.read_csv(os.path.join(data_dir, NAO_ESTRUTURADO_FILE), dtype=RAW_DTYPES)
+        etapa.itens = len(estruturado) + len(nao_estruturado)
+    return estruturado, nao_estruturado
+
+def iter_data(data_dir="data/raw/", chunksize=50_000): # Lê os dois CSVs em blocos de tamanho fixo, sem carregar o arquivo inteiro.
+    estruturado = pd.read_csv(os.path.join(data_dir, ESTRUTURADO_FILE), dtype=RAW_DTYPES, chunksize=chunksize)
+    nao_estruturado = pd.read_csv(os.path.join(data_dir, NAO_ESTRUTURADO_FILE), dtype=RAW_DTYPES, chunksize=chunksize)
+    return estruturado, nao_estruturado
+
+def read_columns(data_dir="data/raw/"): # Lê apenas o cabeçalho de cada CSV.
+    estruturado = pd.read_csv(os.path.join(data_dir, ESTRUTURADO_FILE), nrows=0).columns.tolist()
+    nao_estruturado = pd.read_csv(os.path.join(data_dir, NAO_ESTRUTURADO_FILE), nrows=0).columns.tolist()
+    return estruturado, nao_estruturado
+
+def load_file(path): # Lê um único CSV de entrada (estruturado ou não estruturado).
+    return pd.read_csv(path, dtype=RAW_DTYPES)
@@ -1,112 +1,197 @@
 # Funções de balanceamento e classificação
 
 import pandas as pd
-from src.models.predict import predict_exam_batch
-from src.data.load_data import load_data
-
-# Mapeamento de CD_TUSS para tipos de exame (baseado na imagem do dataset estruturado)
-tuss_map = {
-    "40901114": "ULTRASSONOGRAFIA DE MAMA",
-    "40601110": "PROCEDIMENTO DIAGNÓSTICO ANATOMOPATOLÓGICO EM MATERIAL PROVENIENTE DE BIÓPSIAS SIMPLES, PAAF, 'IMPRINT' E 'CELL-BLOCK'",
-    "40805018": "RADIOGRAFIA DE TÓRAX",
-    "40103064": "PESQUISA DE POTENCIAIS EVOCADOS AUDITIVOS DE TRONCO CEREBRAL (BERA)",
-    "40101010": "ECG CONVENCIONAL",
-    "41101014": "RESSONÂNCIA MAGNÉTICA DE CRÂNIO (ENCÉFALO)",
-    "40901483": "DOPPLER COLORIDO VENOSO DE MEMBROS INFERIORES",
-    "20102020": "HOLTER DE 24 HORAS - 2 OU MAIS CANAIS - ANALÓGICO OU DIGITAL",
-    "40901300": "ULTRASSONOGRAFIA TRANSVAGINAL (INCLUI ABDOME INFERIOR FEMININO)",
-    "40101037": "TESTE ERGOMÉTRICO (INCLUI ECG BASAL CONVENCIONAL) - COM DIRETRIZ DE UTILIZAÇÃO",
-    "40808041": "MAMOGRAFIA DIGITAL (COM DIRETRIZ DE UTILIZAÇÃO)",
-    "40601137": "PROCEDIMENTO DIAGNÓSTICO CITOPATOLÓGICO ONCÓTICO DE MATERIAL CÉRVICO-VAGINAL",
-    "40103072": "AUDIOMETRIA TONAL LIMIAR",
-    "40901203": "ULTRASSONOGRAFIA DE ÓRGÃOS SUPERFICIAIS (TIREÓIDE, ESCROTO, PÊNIS OU CRÂNIO)",
-    "40901122": "ULTRASSONOGRAFIA DE ABDOME TOTAL",
-    "40901220": "ULTRASSONOGRAFIA ARTICULAR",
-    "40901106": "ECODOPPLERCARDIOGRAMA TRANSTORÁCICO",
-    "41101316": "RESSONÂNCIA MAGNÉTICA ARTICULAR",
-    "41001117": "TOMOGRAFIA COMPUTADORIZADA DE PELVE OU BACIA",
-    "40802051": "RADIOGRAFIA DE COLUNA LOMBO-SACRA",
-    "41101189": "RESSONÂNCIA MAGNÉTICA DE PELVE",
-    "40601129": "PROCEDIMENTO DIAGNÓSTICO CITOPATOLÓGICO ONCÓTICO DE LÍQUIDOS E RASPADOS CUTÂNEOS",
-    "41101227": "RESSONÂNCIA MAGNÉTICA DE COLUNA CERVICAL, DORSAL OU LOMBAR",
-    "40105075": "ESPIROMETRIA FORÇADA - VOLUMES E FLUXOS MÁXIMOS (COM/SEM BD)",
-    "41101170": "RESSONÂNCIA MAGNÉTICA DE ABDOME SUPERIOR (FÍGADO, PÂNCREAS, BAÇO, RINS, SUPRA-RENAIS, RETROPERITÔNIO)",
-    "40901360": "DOPPLER COLORIDO DE VASOS CERVICAIS ARTERIAIS (CARÓTIDAS E VERTEBRAIS)",
-    "40808130": "DENSITOMETRIA ÓSSEA - QUALQUER SEGMENTO",
-    "20102038": "MONITORIZAÇÃO AMBULATORIAL DA PRESSÃO ARTERIAL - MAPA (24 HORAS) - COM DIRETRIZ DE UTILIZAÇÃO",
-    "40804011": "RADIOGRAFIA DE BACIA",
-    "40601013": "PROCEDIMENTO DIAGNÓSTICO ANATOMOPATOLÓGICO POR CONGELAÇÃO DURANTE ATO CIRÚRGICO",
-    "40101045": "TESTE ERGOMÉTRICO (INCLUI ECG BASAL CONVENCIONAL) - COM DIRETRIZ DE UTILIZAÇÃO",
-    "40803139": "RADIOGRAFIA DE MÃOS E PUNHOS PARA IDADE ÓSSEA",
-    "41001095": "TOMOGRAFIA COMPUTADORIZADA DE ABDOME TOTAL (ABDOME SUPERIOR, PELVE E RETROPERITÔNIO)",
-    "41101308": "RESSONÂNCIA MAGNÉTICA DE PÉ (ANTEPÉ)",
-    "41101537": "ANGIO-RM (CRÂNIO, PESCOÇO, TÓRAX, ABDOME SUPERIOR OU PELVE) - ARTERIAL OU VENOSA",
-    "40202615": "TESTE DA UREASE PARA HELICOBACTER PYLORI (TESTE DE HEALD)",
-    "40802035": "RADIOGRAFIA DE COLUNA DORSAL",
-    "29020085": "Exame não identificado",
-    "41001079": "TOMOGRAFIA COMPUTADORIZADA DE TÓRAX",
-    "40804097": "RADIOGRAFIA DE PÉ OU PODODÁCTILO",
-    "40901130": "ULTRASSONOGRAFIA DE ABDOME SUPERIOR",
-    "40804054": "RADIOGRAFIA DE JOELHO",
-    "20010010": "Exame não identificado", # Não encontrado na tabela TUSS
-    "45552": "Exame não identificado",
-    "41301340": "URODINÂMICA COMPLETA",
-    "41101480": "RESSONÂNCIA MAGNÉTICA DE MAMA",
-    "40901084": "ECODOPPLERCARDIOGRAMA FETAL COM MAPEAMENTO DE FLUXO",
-    "40805026": "RADIOGRAFIA DE TÓRAX",
-    "40901262": "ULTRASSONOGRAFIA OBSTÉTRICA MORFOLÓGICA",
-    "41101545": "ANGIO-RM (CRÂNIO, PESCOÇO, TÓRAX, ABDOME SUPERIOR OU PELVE) - ARTERIAL OU VENOSA",
-    "40901076": "ECODOPPLERCARDIOGRAMA COM ESTRESSE FARMACOLÓGICO/ESTRESSE FÍSICO",
-    "40103579": "POTENCIAL EVOCADO AUDITIVO DE MÉDIA LATÊNCIA (PEA-ML)",
-    "20010141": "Exame não identificado",
-    "40901238": "ULTRASSONOGRAFIA OBSTÉTRICA COM TRANSLUCÊNCIA NUCAL",
-    "41001010": "TOMOGRAFIA COMPUTADORIZADA DE CRÂNIO, SELA TÚRCICA OU ÓRBITAS",
-    "41301374": "COLPOSCOPIA, VULVOSCOPIA, PENISCOPIA, ANUSCOPIA",
-    "40801128": "RADIOGRAFIA DE ADENÓIDES OU CAVUM",
-    "40901181": "ULTRASSONOGRAFIA DE ABDOME INFERIOR FEMININO",
-    "40201120": "ENDOSCOPIA DIGESTIVA ALTA",
-    "41001230": "ANGIOTOMOGRAFIA CORONARIANA (COM DIRETRIZ DE UTILIZAÇÃO)",
-    "40202666": "COLONOSCOPIA COM BIÓPSIA E/OU CITOLOGIA COM OU SEM DILATAÇÃO SEGMENTAR OU ESTENOSTOMIA",
-    "40901750": "ULTRASSONOGRAFIA TRANSRETAL",
-    "40901157": "Exame não identificado",
-    "51010127": "Exame não identificado",
-    "40201082": "COLONOSCOPIA COM BIÓPSIA E/OU CITOLOGIA COM OU SEM DILATAÇÃO SEGMENTAR OU ESTENOSTOMIA",
-    "40802019": "RADIOGRAFIA DE COLUNA CERVICAL",
-    "17111013": "Exame não identificado",
-    "33010021": "Exame não identificado",
-    "40901769": "ULTRASSONOGRAFIA DE APARELHO URINÁRIO MASCULINO",
-    "40901173": "ULTRASSONOGRAFIA DE ABDOME INFERIOR MASCULINO",
-    "42352": "Exame não identificado",
-    "40103536": "POLISSONOGRAFIA COM EEG DE NOITE INTEIRA COM OU SEM TESTE DE CPAP NASAL (INCLUI POLISSONOGRAMAS)",
-}
-
-
-def process_data(): # Processa os datasets estruturado e não estruturado, identificando os exames.
-    # Carrega os dados
-    estruturado, nao_estruturado = load_data()
-    
-    # Processa o dataset estruturado usando o CD_TUSS
-    estruturado["exame_resultado"] = estruturado["CD_TUSS"].map(lambda x: tuss_map.get(str(x), "Não é exame de imagem")) # X = codigo TUSS
-    df_estrturado_dash = estruturado
-    df_estrturado_dash.to_csv("data/processed/estruturado_processado.csv", index=False)
-    
+import os
+from src.models.predict import predict_exam_batch, stage_counts
+from src.models.cache import get_prediction_cache
+from src.models.classifier import get_classifier
+from src.models.prefilter import get_prefilter, check_agreement, PREFILTER_ENABLED, AGREEMENT_SAMPLE_SIZE
+from src.data.load_data import load_data, load_file, iter_data, read_columns, NAO_ESTRUTURADO_FILE
+from src.data.state import ProcessedState, STATE_PATH
+from src.data.tuss import get_tuss_catalog
+from src.data.aggregates import AGGREGATE_NAME, daily_aggregate, combine_aggregates, build_aggregate
+from src.data.storage import PROCESSED_DIR, EXPORT_CSV, ProcessedWriter, apply_schema, write_processed, read_processed, processed_exists
+from src.monitoring.metrics import get_metrics
+
+def process_estruturado(estruturado): # Mapeia o CD_TUSS de cada linha para o tipo de exame.
+    # Busca vetorizada no catálogo TUSS (data/tuss/catalogo_tuss.csv), carregado uma vez por processo
+    estruturado["exame_resultado"] = get_tuss_catalog().lookup(estruturado["CD_TUSS"])
+    return estruturado
+
+def process_nao_estruturado(nao_estruturado, use_cache=True, use_prefilter=PREFILTER_ENABLED, workers=1): # Classifica o DS_RECEITA de cada linha com os modelos.
     # Limpa valores nulos na coluna DS_RECEITA e converte para string para não haver conflit com o tranformers
     nao_estruturado["DS_RECEITA"] = nao_estruturado["DS_RECEITA"].fillna("")  # Substitui NaN por string vazia
     nao_estruturado["DS_RECEITA"] = nao_estruturado["DS_RECEITA"].astype(str)  # Garante que seja string
 
-    print(f"Processando {len(nao_estruturado)} linhas do dataset não estruturado...")
-    for idx in range(0, len(nao_estruturado), 100):  # Print a cada 100 linhas
-        print(f"Processadas {idx} linhas...")
-
     # Processa em lote usando predict_exam_batch
-    predictions = predict_exam_batch(nao_estruturado["DS_RECEITA"].tolist(), batch_size=32)
+    predictions = predict_exam_batch(nao_estruturado["DS_RECEITA"].tolist(), use_cache=use_cache, use_prefilter=use_prefilter, workers=workers)
     nao_estruturado["exame_resultado"] = predictions
-    df_nao_estrturado_dash = nao_estruturado
-    df_nao_estrturado_dash.to_csv("data/processed/nao_estruturado_processado.csv", index=False)
+    return nao_estruturado
+
+def _start_stats(use_cache):
+    if use_cache:
+        get_prediction_cache().reset_stats()
+    stage_counts.clear()
+
+def _report_stats(use_cache):
+    # Os mesmos números vão para as métricas da execução (src/monitoring/metrics.py)
+    metrics = get_metrics()
+    # Relatório do cache de previsões
+    if use_cache:
+        stats = get_prediction_cache().stats()
+        print(f"Cache de previsões: {stats['hits']} acertos, {stats['misses']} erros (taxa de acerto: {stats['hit_rate']:.1%})")
+        metrics.gauge("cache_acertos", stats["hits"])
+        metrics.gauge("cache_erros", stats["misses"])
+        metrics.gauge("cache_taxa_acerto", stats["hit_rate"])
+
+    # Relatório de quantas linhas cada etapa resolveu
+    print("Linhas resolvidas por etapa: " + ", ".join(f"{etapa}={total}" for etapa, total in stage_counts.items()))
+    for etapa, total in stage_counts.items():
+        metrics.gauge("linhas_resolvidas", total, etapa=etapa)
+
+
+def process_data(use_cache=True, use_prefilter=PREFILTER_ENABLED, check_prefilter=False, workers=1, data_dir="data/raw/", output_dir=PROCESSED_DIR, csv=EXPORT_CSV): # Processa os datasets estruturado e não estruturado, identificando os exames.
+    # Carrega os dados
+    estruturado, nao_estruturado = load_data(data_dir)
+    
+    # Processa o dataset estruturado usando o CD_TUSS
+    df_estrturado_dash = process_estruturado(estruturado)
+    write_processed(df_estrturado_dash, "estruturado_processado", output_dir, csv)
+
+    # O progresso da inferência é exibido pelo classificador a cada bucket de comprimento (ou shard, com workers > 1)
+    print(f"Processando {len(nao_estruturado)} linhas do dataset não estruturado...")
+    _start_stats(use_cache)
+    df_nao_estrturado_dash = process_nao_estruturado(nao_estruturado, use_cache, use_prefilter, workers)
+    write_processed(df_nao_estrturado_dash, "nao_estruturado_processado", output_dir, csv)
     
     # Combina os dataframes
-    df_combined = pd.concat([estruturado, nao_estruturado], ignore_index=True)
-    df_combined.to_csv("data/processed/resultado_processado.csv", index=False)
+    df_combined = write_processed(pd.concat([estruturado, nao_estruturado], ignore_index=True), "resultado_processado", output_dir, csv)
+    # Agregado diário consultado pelo dashboard
+    write_processed(build_aggregate(df_estrturado_dash, df_nao_estrturado_dash), AGGREGATE_NAME, output_dir, csv)
+
+    _report_stats(use_cache)
+    if check_prefilter:
+        report_prefilter_agreement(nao_estruturado["DS_RECEITA"].tolist())
     return df_combined
 
 
+def report_prefilter_agreement(textos, sample_size=AGREEMENT_SAMPLE_SIZE): # Confere as linhas que o pré-filtro resolveria com o modelo binário (ativo ou não) e exibe o resultado.
+    resolvidos = get_prefilter().resolve_mask(textos)
+    print(f"O pré-filtro resolveria {sum(resolvidos)} de {len(textos)} linhas sem o modelo.")
+    concordancia = check_agreement(textos, resolvidos, get_classifier(), sample_size)
+    if concordancia:
+        print(f"Concordância do pré-filtro com o modelo binário: {concordancia['concordancia']:.1%} em {concordancia['amostra']} linhas")
+    return concordancia
+
+def validate_prefilter(data_dir="data/raw/", sample_size=AGREEMENT_SAMPLE_SIZE): # Valida as regras do pré-filtro no dataset não estruturado, sem processar nem gravar nada.
+    textos = pd.read_csv(os.path.join(data_dir, NAO_ESTRUTURADO_FILE), usecols=["DS_RECEITA"])["DS_RECEITA"].fillna("").astype(str).tolist()
+    return report_prefilter_agreement(textos, sample_size)
+
+
+def process_data_streaming(data_dir="data/raw/", output_dir=PROCESSED_DIR, chunksize=50_000, use_cache=True, use_prefilter=PREFILTER_ENABLED, workers=1, csv=EXPORT_CSV): # Processa os CSVs em blocos, gravando cada bloco nas saídas; a memória não cresce com o tamanho da entrada.
+    # O resultado combinado tem a união das colunas dos dois datasets (na ordem do concat)
+    colunas_estruturado, colunas_nao_estruturado = read_columns(data_dir)
+    colunas = list(dict.fromkeys(colunas_estruturado + colunas_nao_estruturado + ["exame_resultado"]))
+    resultado = ProcessedWriter("resultado_processado", output_dir, csv, columns=colunas)
+    chunks_estruturado, chunks_nao_estruturado = iter_data(data_dir, chunksize)
+
+    _start_stats(use_cache)
+    total = 0
+    agregados = []
+    for nome, chunks, processar in (
+        ("estruturado", chunks_estruturado, process_estruturado),
+        ("nao_estruturado", chunks_nao_estruturado, lambda df: process_nao_estruturado(df, use_cache, use_prefilter, workers)),
+    ):
+        saida = ProcessedWriter(f"{nome}_processado", output_dir, csv)
+        linhas = 0
+        for chunk in chunks:
+            chunk = processar(chunk)
+            saida.write(chunk)
+            resultado.write(chunk)
+            agregados.append(daily_aggregate(chunk, nome))
+            linhas += len(chunk)
+            total += len(chunk)
+            print(f"Processadas {linhas} linhas do dataset {nome}...")
+        saida.close()
+
+    resultado.close()
+    write_processed(combine_aggregates(agregados), AGGREGATE_NAME, output_dir, csv)
+    _report_stats(use_cache)
+    return total
+
+
+def process_data_incremental(data_dir="data/raw/", output_dir=PROCESSED_DIR, use_cache=True, use_prefilter=PREFILTER_ENABLED, workers=1, state_path=STATE_PATH, csv=EXPORT_CSV): # Processa apenas as linhas novas ou alteradas e as incorpora às saídas já existentes.
+    estruturado, nao_estruturado = load_data(data_dir)
+    state = ProcessedState(state_path)
+
+    _start_stats(use_cache)
+    processados = []
+    for origem, df, processar in (
+        ("estruturado", estruturado, process_estruturado),
+        ("nao_estruturado", nao_estruturado, lambda delta: process_nao_estruturado(delta, use_cache, use_prefilter, workers)),
+    ):
+        nome = f"{origem}_processado"
+        # Sem a saída anterior não há o que reaproveitar: processa tudo de novo
+        if not processed_exists(nome, output_dir):
+            state.reset(origem)
+            anterior = None
+        else:
+            anterior = read_processed(nome, output_dir)
+
+        # Apenas as linhas novas ou alteradas passam pelo processamento
+        delta = df[state.delta_mask(origem, df)]
+        print(f"Dataset {origem}: {len(delta)} de {len(df)} linhas novas ou alteradas.")
+        if delta.empty and anterior is not None:
+            processados.append(anterior)
+            continue
+        delta_processado = apply_schema(processar(delta.copy()))
+        processados.append(merge_processed(origem, delta_processado, output_dir, csv, anterior))
+
+        # O estado só é atualizado depois que a saída foi gravada
+        state.mark_processed(origem, delta)
+
+    state.close()
+    df_combined = write_combined(dict(zip(("estruturado", "nao_estruturado"), processados)), output_dir, csv)
+    _report_stats(use_cache)
+    return df_combined
+
+
+def merge_processed(origem, novos, output_dir=PROCESSED_DIR, csv=EXPORT_CSV, anterior=None): # Incorpora linhas processadas à saída do dataset (<origem>_processado): substitui as versões anteriores pelo ID e acrescenta as novas.
+    # anterior: saída atual já lida (None lê do disco, se existir)
+    nome = f"{origem}_processado"
+    if anterior is None and processed_exists(nome, output_dir):
+        anterior = read_processed(nome, output_dir)
+    if anterior is not None:
+        anterior = anterior[~anterior["ID"].astype(str).isin(novos["ID"].astype(str))]
+        novos = pd.concat([anterior, novos], ignore_index=True)
+    return write_processed(novos, nome, output_dir, csv)
+
+def write_combined(processados, output_dir=PROCESSED_DIR, csv=EXPORT_CSV): # Regrava o resultado_processado e o agregado diário a partir das saídas de cada dataset ({origem: DataFrame}).
+    processados = {origem: df for origem, df in processados.items() if df is not None}
+    df_combined = write_processed(pd.concat(processados.values(), ignore_index=True), "resultado_processado", output_dir, csv)
+    write_processed(combine_aggregates([daily_aggregate(df, origem) for origem, df in processados.items()]), AGGREGATE_NAME, output_dir, csv)
+    return df_combined
+
+
+def process_file(path, output_dir=PROCESSED_DIR, use_cache=True, use_prefilter=PREFILTER_ENABLED, workers=1, csv=EXPORT_CSV): # Processa um único CSV e grava a saída como <nome do arquivo>_processado.
+    # As linhas também são incorporadas à saída do dataset correspondente, ao resultado_processado e ao agregado diário
+    # (como no modo incremental), para que o dashboard mostre os arquivos processados pelo monitor.py
+    df = load_file(path)
+    # O dataset estruturado é o que tem o CD_TUSS; os demais passam pelos modelos
+    if "CD_TUSS" in df.columns:
+        origem = "estruturado"
+        df = process_estruturado(df)
+    else:
+        origem = "nao_estruturado"
+        print(f"Processando {len(df)} linhas de {path}...")
+        _start_stats(use_cache)
+        df = process_nao_estruturado(df, use_cache, use_prefilter, workers)
+        _report_stats(use_cache)
+    # Saídas atuais dos datasets, lidas antes de gravar a deste arquivo (um arquivo chamado estruturado.csv teria o mesmo nome de saída)
+    processados = {o: read_processed(f"{o}_processado", output_dir) if processed_exists(f"{o}_processado", output_dir) else None for o in ("estruturado", "nao_estruturado")}
+    nome = f"{os.path.splitext(os.path.basename(path))[0]}_processado"
+    df = write_processed(df, nome, output_dir, csv)
+
+    processados[origem] = merge_processed(origem, df, output_dir, csv, processados[origem])
+    write_combined(processados, output_dir, csv)
+    return df
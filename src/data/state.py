@@ -0,0 +1,91 @@
+import sqlite3
+import hashlib
+import time
+import os
+import pandas as pd
+
+# Estado do modo incremental: IDs já processados e o hash do conteúdo de cada linha
+STATE_PATH = "data/cache/estado.db"
+
+
+def row_hashes(df): # Hash (int64) do conteúdo de cada linha; qualquer edição, inclusive no DS_RECEITA, muda o hash.
+    return pd.util.hash_pandas_object(df, index=False).astype("int64")
+
+
+class ProcessedState: # Registro persistente (SQLite) das linhas já processadas em execuções anteriores.
+
+    def __init__(self, path=STATE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processados (
+                origem TEXT NOT NULL,
+                id TEXT NOT NULL,
+                hash INTEGER NOT NULL,
+                PRIMARY KEY (origem, id)
+            )
+        """)
+        self.conn.commit()
+
+    def delta_mask(self, origem, df): # True para as linhas novas ou alteradas desde a última execução.
+        conhecidos = dict(self.conn.execute("SELECT id, hash FROM processados WHERE origem = ?", (origem,)).fetchall())
+        if not conhecidos:
+            return pd.Series(True, index=df.index)
+        # Int64 (com NA) para comparar os hashes sem perder precisão em float
+        anteriores = pd.Series(conhecidos, dtype="Int64").reindex(df["ID"].astype(str).values)
+        anteriores.index = df.index
+        return (anteriores != row_hashes(df)).fillna(True).astype(bool)
+
+    def mark_processed(self, origem, df): # Registra (ou atualiza) o hash das linhas processadas.
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO processados (origem, id, hash) VALUES (?, ?, ?)",
+            zip([origem] * len(df), df["ID"].astype(str), row_hashes(df).tolist())
+        )
+        self.conn.commit()
+
+    def reset(self, origem): # Esquece o estado de uma origem (ex.: a saída processada foi apagada).
+        self.conn.execute("DELETE FROM processados WHERE origem = ?", (origem,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def file_hash(path, block_size=1 << 20): # SHA-256 do conteúdo do arquivo, lido em blocos.
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(block_size), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+class ProcessedFiles: # Registro persistente (SQLite) dos arquivos já processados pelo monitor e do hash do conteúdo de cada um.
+
+    def __init__(self, path=STATE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Usado pela thread do worker do monitor, não pela thread que o criou
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS arquivos (
+                caminho TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                processado_em REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def is_processed(self, caminho, hash_conteudo): # True se o arquivo já foi processado com este mesmo conteúdo.
+        linha = self.conn.execute("SELECT hash FROM arquivos WHERE caminho = ?", (os.path.abspath(caminho),)).fetchone()
+        return linha is not None and linha[0] == hash_conteudo
+
+    def mark_processed(self, caminho, hash_conteudo):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO arquivos (caminho, hash, processado_em) VALUES (?, ?, ?)",
+            (os.path.abspath(caminho), hash_conteudo, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
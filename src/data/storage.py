@@ -0,0 +1,102 @@
+# Camada processada em Parquet, com tipos explícitos para cada coluna
+import os
+import pandas as pd
+
+PROCESSED_DIR = "data/processed/"
+# Também grava uma cópia em CSV de cada saída (exportação opcional)
+EXPORT_CSV = False
+
+INT_COLUMNS = ["ID", "CD_TUSS"]  # Int64 aceita valores ausentes (CD_TUSS não existe no não estruturado)
+DATE_COLUMNS = ["DATA"]
+STRING_COLUMNS = ["TEL", "CPF", "DS_RECEITA"]  # TEL/CPF como texto para manter zeros à esquerda
+CATEGORICAL_COLUMNS = ["SOLICITANTE", "exame_resultado", "origem"]
+
+
+def apply_schema(df): # Converte as colunas conhecidas para os tipos da camada processada.
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d", errors="coerce")
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def processed_path(name, output_dir=PROCESSED_DIR, ext="parquet"):
+    return os.path.join(output_dir, f"{name}.{ext}")
+
+def write_processed(df, name, output_dir=PROCESSED_DIR, csv=EXPORT_CSV): # Grava uma saída processada em Parquet (e em CSV, se pedido).
+    df = apply_schema(df)
+    df.to_parquet(processed_path(name, output_dir), index=False)
+    if csv:
+        df.to_csv(processed_path(name, output_dir, "csv"), index=False, date_format="%Y-%m-%d")
+    return df
+
+def read_processed(name, processed_dir=PROCESSED_DIR, columns=None): # Lê uma saída processada já com os tipos corretos.
+    return pd.read_parquet(processed_path(name, processed_dir), columns=columns)
+
+def read_processed_head(name, n=5, processed_dir=PROCESSED_DIR): # Primeiras n linhas de uma saída processada, lendo só o início do arquivo.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(processed_path(name, processed_dir))
+    lote = next(arquivo.iter_batches(batch_size=n), None)
+    tabela = pa.Table.from_batches([lote]) if lote is not None else arquivo.schema_arrow.empty_table()
+    return tabela.to_pandas()
+
+def processed_exists(name, processed_dir=PROCESSED_DIR):
+    return os.path.exists(processed_path(name, processed_dir))
+
+def processed_signature(names, processed_dir=PROCESSED_DIR): # Versão atual das saídas: (nome, mtime, tamanho) de cada arquivo existente; muda sempre que o pipeline regrava alguma delas.
+    assinatura = []
+    for name in names:
+        try:
+            info = os.stat(processed_path(name, processed_dir))
+        except FileNotFoundError:
+            continue
+        assinatura.append((name, info.st_mtime_ns, info.st_size))
+    return tuple(assinatura)
+
+
+class ProcessedWriter: # Grava uma saída processada bloco a bloco (modo streaming), cada bloco como um row group do Parquet.
+
+    def __init__(self, name, output_dir=PROCESSED_DIR, csv=EXPORT_CSV, columns=None, sink=None):
+        # sink: destino já aberto para escrita (ex.: objeto do bucket); substitui o arquivo em output_dir e o CSV
+        self.path = sink if sink is not None else processed_path(name, output_dir)
+        self.csv_path = processed_path(name, output_dir, "csv") if csv and sink is None else None
+        self.columns = columns
+        self.writer = None
+        self.schema = None
+        self.csv_started = False
+
+    def write(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.columns is not None:
+            chunk = chunk.reindex(columns=self.columns)
+        chunk = apply_schema(chunk)
+        if self.writer is None:
+            # O schema do primeiro bloco vale para o arquivo inteiro; as colunas categóricas usam índices int32 fixos,
+            # porque o pandas escolhe o menor inteiro que cabe nas categorias do bloco (int8 até 127) e os blocos
+            # seguintes podem ter mais categorias
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            for i, campo in enumerate(schema):
+                if pa.types.is_dictionary(campo.type):
+                    schema = schema.set(i, campo.with_type(pa.dictionary(pa.int32(), pa.string())))
+            self.schema = schema
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+        if self.csv_path:
+            # O primeiro bloco recria o CSV com cabeçalho; os demais são anexados
+            chunk.to_csv(self.csv_path, mode="a" if self.csv_started else "w", header=not self.csv_started, index=False, date_format="%Y-%m-%d")
+            self.csv_started = True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
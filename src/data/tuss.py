@@ -0,0 +1,63 @@
+# Catálogo TUSS (código -> tipo de exame) carregado de um arquivo de dados, para que a tabela possa ser atualizada
+# (inclusive pela tabela TUSS completa da ANS) sem mudar o código.
+import threading
+import numpy as np
+import pandas as pd
+from src.models.rules import NAO_EXAME
+
+# CSV com as colunas CD_TUSS e EXAME
+TUSS_CATALOG_PATH = "data/tuss/catalogo_tuss.csv"
+
+
+class TussCatalog: # Catálogo compilado: índice int64 dos códigos (busca por tabela hash) e o exame de cada código como código de categoria.
+
+    def __init__(self, codigos, exames):
+        # Códigos repetidos: vale a última linha do arquivo
+        catalogo = pd.DataFrame({"codigo": codigos, "exame": exames}).drop_duplicates("codigo", keep="last").sort_values("codigo")
+        self.codigos = catalogo["codigo"].to_numpy(dtype=np.int64)
+        self.index = pd.Index(self.codigos)
+        exames = pd.Categorical(catalogo["exame"])
+        # Os códigos fora do catálogo recebem NAO_EXAME, a última categoria
+        self.categorias = exames.categories.append(pd.Index([NAO_EXAME])).unique()
+        self.exame_codes = pd.Categorical(catalogo["exame"], categories=self.categorias).codes
+        self.nao_exame_code = self.categorias.get_loc(NAO_EXAME)
+
+    @classmethod
+    def from_file(cls, path=TUSS_CATALOG_PATH): # Lê o catálogo do CSV; linhas com código não numérico são ignoradas.
+        df = pd.read_csv(path, dtype={"CD_TUSS": str, "EXAME": str})
+        codigos = pd.to_numeric(df["CD_TUSS"].str.strip(), errors="coerce")
+        validos = codigos.notna() & (codigos >= 0) & df["EXAME"].notna()
+        return cls(codigos[validos].astype(np.int64).to_numpy(), df.loc[validos, "EXAME"].to_numpy())
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def lookup(self, cd_tuss): # Tipo de exame de cada CD_TUSS (Series categórica com o mesmo índice); códigos ausentes ou desconhecidos viram NAO_EXAME.
+        serie = pd.Series(cd_tuss)
+        if pd.api.types.is_integer_dtype(serie.dtype) and not serie.hasnans:
+            chaves = serie.to_numpy(dtype=np.int64)
+        else:
+            # Vazios, texto e frações nunca são códigos: viram -1, que não existe no catálogo
+            valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            chaves = np.where(np.isfinite(valores) & (valores == np.floor(valores)), valores, -1).astype(np.int64)
+
+        # Cada código distinto é buscado uma única vez no índice (-1 = fora do catálogo) e o resultado é expandido para as linhas
+        inverso, distintos = pd.factorize(chaves)
+        posicoes = self.index.get_indexer(distintos)
+        encontrados = posicoes >= 0
+        codes = np.full(len(distintos), self.nao_exame_code, dtype=np.int32)
+        codes[encontrados] = self.exame_codes[posicoes[encontrados]]
+        return pd.Series(pd.Categorical.from_codes(codes[inverso], categories=self.categorias), index=getattr(cd_tuss, "index", None), name="exame_resultado")
+
+
+# Instância compartilhada pelo processo
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_tuss_catalog(): # Retorna o catálogo do processo, lendo o arquivo apenas na primeira vez.
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = TussCatalog.from_file()
+    return _catalog
@@ -0,0 +1,107 @@
+import threading
+import queue
+import time
+import os
+from src.data.state import ProcessedFiles, file_hash, STATE_PATH
+
+# Um arquivo só é processado depois de DEBOUNCE_SECONDS sem eventos e com tamanho/mtime iguais entre duas verificações
+DEBOUNCE_SECONDS = 2.0
+POLL_INTERVAL = 0.5
+
+_PARAR = object()
+
+
+class FileQueue: # Recebe os eventos do watchdog, espera cada arquivo estabilizar e entrega o caminho, uma vez, ao worker que o processa.
+
+    def __init__(self, processar, state_path=STATE_PATH, debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL):
+        # processar: função chamada com o caminho de cada arquivo estável e ainda não processado com o conteúdo atual
+        self.processar = processar
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.processed_files = ProcessedFiles(state_path)
+        self.lock = threading.Lock()
+        self.pendentes = {}  # caminho -> (instante do último evento, (tamanho, mtime) da última verificação)
+        self.enfileirados = set()  # caminhos na fila que ainda não começaram a ser processados
+        self.queue = queue.Queue()
+        self.parado = threading.Event()
+        self.contagens = {"eventos": 0, "processados": 0, "ignorados": 0, "erros": 0}
+        self.threads = [
+            threading.Thread(target=self._debounce_loop, name="monitor-debounce", daemon=True),
+            threading.Thread(target=self._worker_loop, name="monitor-worker", daemon=True),
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self): # Encerra as threads; o arquivo em processamento termina antes.
+        self.parado.set()
+        self.queue.put(_PARAR)
+        for thread in self.threads:
+            thread.join()
+        self.processed_files.close()
+
+    def notify(self, path): # Registra um evento do arquivo; chamada pela thread do watchdog, não bloqueia.
+        path = os.path.abspath(path)
+        with self.lock:
+            self.contagens["eventos"] += 1
+            assinatura = self.pendentes.get(path, (None, None))[1]
+            self.pendentes[path] = (time.monotonic(), assinatura)
+
+    def idle(self): # True quando não há arquivos aguardando estabilizar, na fila ou em processamento.
+        with self.lock:
+            return not self.pendentes and not self.enfileirados and self.queue.unfinished_tasks == 0
+
+    def _debounce_loop(self):
+        while not self.parado.wait(self.poll_interval):
+            agora = time.monotonic()
+            with self.lock:
+                for path, (ultimo_evento, assinatura) in list(self.pendentes.items()):
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        # Removido (ou renomeado) antes de estabilizar
+                        del self.pendentes[path]
+                        continue
+                    atual = (stat.st_size, stat.st_mtime_ns)
+                    if atual != assinatura:
+                        # Ainda sendo escrito: espera mais um intervalo completo
+                        self.pendentes[path] = (agora, atual)
+                    elif agora - ultimo_evento >= self.debounce:
+                        del self.pendentes[path]
+                        # Eventos repetidos de um arquivo que já está na fila são agrupados
+                        if path not in self.enfileirados:
+                            self.enfileirados.add(path)
+                            self.queue.put(path)
+
+    def _worker_loop(self):
+        while True:
+            path = self.queue.get()
+            if path is _PARAR:
+                self.queue.task_done()
+                break
+            with self.lock:
+                self.enfileirados.discard(path)
+            try:
+                self._process(path)
+            finally:
+                self.queue.task_done()
+
+    def _process(self, path):
+        try:
+            hash_conteudo = file_hash(path)
+        except FileNotFoundError:
+            return
+        if self.processed_files.is_processed(path, hash_conteudo):
+            print(f"{path} já foi processado com este conteúdo; ignorando.")
+            self.contagens["ignorados"] += 1
+            return
+        try:
+            self.processar(path)
+        except Exception as e:
+            # Sem registro: o arquivo volta a ser processado no próximo evento ou reinício
+            print(f"Erro ao processar {path}: {e}")
+            self.contagens["erros"] += 1
+            return
+        self.processed_files.mark_processed(path, hash_conteudo)
+        self.contagens["processados"] += 1
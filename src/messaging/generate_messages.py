@@ -1,12 +1,111 @@
+from string import Formatter
 import pandas as pd
+from src.data.storage import read_processed
+from src.messaging.send_log import sent_keys, DB_PATH
+from src.models.rules import NAO_EXAME
+from src.monitoring.metrics import get_metrics
 
-def generate_messages(): # Gera mensagens personalizadas para os pacientes com exames de imagem.
-    # Carrega o CSV processado
-    df = pd.read_csv("data/processed/resultado_processado.csv")
-    messages = []
-    for _, row in df.iterrows():
-        # Só gera mensagem se for exame de imagem
-        if row["exame_resultado"] != "Não é exame de imagem":
-            mensagem = f"Olá, temos uma boa notícia! Seu exame de {row['exame_resultado']} solicitado pelo Doutor(a) {row['SOLICITANTE']} já está agendado com a gente, e estamos muito felizes em cuidar de você com todo o carinho e a qualidade que você merece. Não deixe para depois, venha fazer seu exame com quem realmente se importa com a sua saúde! Qualquer dúvida, é só nos chamar!"
-            messages.append({"telefone": row["TEL"], "mensagem": mensagem, "solicitante": row["SOLICITANTE"]})
-    return messages
\ No newline at end of file
+# Texto padrão das mensagens; {exame} e {solicitante} são preenchidos com as colunas de cada linha
+TEMPLATE_PADRAO = "Olá, temos uma boa notícia! Seu exame de {exame} solicitado pelo Doutor(a) {solicitante} já está agendado com a gente, e estamos muito felizes em cuidar de você com todo o carinho e a qualidade que você merece. Não deixe para depois, venha fazer seu exame com quem realmente se importa com a sua saúde! Qualquer dúvida, é só nos chamar!"
+# Texto usado quando os exames de um mesmo telefone são agrupados em uma única mensagem
+TEMPLATE_AGRUPADO = "Olá, temos uma boa notícia! Seus exames de {exame} solicitados pelo Doutor(a) {solicitante} já estão agendados com a gente, e estamos muito felizes em cuidar de você com todo o carinho e a qualidade que você merece. Não deixe para depois, venha fazer seus exames com quem realmente se importa com a sua saúde! Qualquer dúvida, é só nos chamar!"
+
+# Campos disponíveis nos templates e a coluna correspondente do resultado processado
+TEMPLATE_FIELDS = {"exame": "exame_resultado", "solicitante": "SOLICITANTE", "telefone": "TEL"}
+MESSAGE_COLUMNS = ["ID", "TEL", "SOLICITANTE", "exame_resultado"]
+# Chave de um envio: o mesmo exame (ID) para o mesmo telefone nunca é enviado duas vezes com sucesso
+SEND_KEY = ["TEL", "exame_resultado", "ID"]
+
+def generate_messages(df=None, templates=None, skip_sent=False, merge_by_phone=False, db_path=DB_PATH): # Gera mensagens personalizadas para os pacientes com exames de imagem.
+    # df: resultado já processado em memória (None lê data/processed/resultado_processado)
+    # templates: dicionário {tipo de exame: template} para personalizar o texto; os demais tipos usam TEMPLATE_PADRAO
+    # skip_sent: descarta os exames que já têm envio com sucesso em db/envios.db
+    # merge_by_phone: junta em uma única mensagem os exames de um mesmo telefone
+    with get_metrics().stage("generate_messages") as etapa:
+        messages = []
+        for lote in iter_messages(df, batch_size=None, templates=templates, skip_sent=skip_sent, merge_by_phone=merge_by_phone, db_path=db_path):
+            messages.extend(lote)
+        etapa.itens = len(messages)
+    return messages
+
+def iter_messages(df=None, batch_size=1000, templates=None, skip_sent=False, merge_by_phone=False, db_path=DB_PATH): # Gera as mensagens em lotes de até batch_size (None gera um único lote).
+    df = _exames(df)
+    if skip_sent:
+        df = drop_sent(df, db_path)
+    if merge_by_phone:
+        # Os exames do mesmo telefone precisam estar no mesmo lote para serem agrupados
+        df = df.sort_values("TEL", kind="stable")
+    if batch_size is None:
+        batch_size = max(len(df), 1)
+    # Telefones já ordenados, extraídos uma única vez para os cortes dos lotes
+    tels = df["TEL"].to_numpy() if merge_by_phone else None
+    inicio = 0
+    while inicio < len(df):
+        fim = min(inicio + batch_size, len(df))
+        if merge_by_phone:
+            # Estende o lote até o fim do telefone corrente
+            while fim < len(df) and tels[fim] == tels[fim - 1]:
+                fim += 1
+        lote = df.iloc[inicio:fim]
+        yield _build_merged(lote, templates) if merge_by_phone else _build_messages(lote, templates)
+        inicio = fim
+
+def _exames(df): # Mantém apenas as linhas que são exames de imagem e têm telefone.
+    if df is None:
+        df = read_processed("resultado_processado", columns=MESSAGE_COLUMNS)
+    # Sem telefone não há para quem enviar (e o pd.NA não pode ser gravado no histórico de envios)
+    return df.loc[((df["exame_resultado"] != NAO_EXAME) & df["TEL"].notna()).to_numpy(), MESSAGE_COLUMNS]
+
+def drop_sent(df, db_path=DB_PATH): # Remove as linhas repetidas e as já enviadas com sucesso, comparando pela chave (telefone, exame, ID).
+    df = df.drop_duplicates(SEND_KEY)
+    enviados = sent_keys(db_path)  # carregado uma vez por execução, como um conjunto em memória
+    if not enviados or df.empty:
+        return df
+    chaves = pd.MultiIndex.from_arrays([df[col].astype(str) for col in SEND_KEY])
+    return df[~chaves.isin(enviados)]
+
+def _send_keys(df): # Pares (exame_resultado, ID) de cada linha, no formato gravado em envios.
+    return list(zip(df["exame_resultado"].astype(str).tolist(), df["ID"].astype(str).tolist()))
+
+def _build_messages(df, templates): # Monta as mensagens de um lote coluna a coluna, sem percorrer as linhas.
+    mensagens = render_template(TEMPLATE_PADRAO, df)
+    for exame, template in (templates or {}).items():
+        mask = (df["exame_resultado"] == exame).to_numpy()
+        if mask.any():
+            mensagens[mask] = render_template(template, df[mask])
+    return [
+        {"telefone": telefone, "mensagem": mensagem, "solicitante": solicitante, "chaves": [chave]}
+        for telefone, mensagem, solicitante, chave in zip(df["TEL"].tolist(), mensagens.tolist(), df["SOLICITANTE"].tolist(), _send_keys(df))
+    ]
+
+def _build_merged(df, templates): # Uma mensagem por telefone; os telefones com um único exame seguem o template normal.
+    repetidos = df["TEL"].duplicated(keep=False).to_numpy()
+    messages = _build_messages(df[~repetidos], templates)
+    if not repetidos.any():
+        return messages
+
+    grupos = df[repetidos].assign(chave=_send_keys(df[repetidos]))
+    grupos = grupos.groupby("TEL", sort=False, observed=True).agg(
+        exame_resultado=("exame_resultado", lambda exames: _join_names(exames.astype(str).unique())),
+        SOLICITANTE=("SOLICITANTE", lambda nomes: _join_names(nomes.astype(str).unique())),
+        chaves=("chave", list),
+    ).reset_index()
+    mensagens = render_template(TEMPLATE_AGRUPADO, grupos)
+    messages.extend(
+        {"telefone": telefone, "mensagem": mensagem, "solicitante": solicitante, "chaves": chaves}
+        for telefone, mensagem, solicitante, chaves in zip(grupos["TEL"].tolist(), mensagens.tolist(), grupos["SOLICITANTE"].tolist(), grupos["chaves"].tolist())
+    )
+    return messages
+
+def _join_names(nomes): # "A", "A e B", "A, B e C"
+    nomes = list(nomes)
+    return nomes[0] if len(nomes) == 1 else ", ".join(nomes[:-1]) + " e " + nomes[-1]
+
+def render_template(template, df): # Preenche o template para todas as linhas do DataFrame concatenando os trechos fixos com as colunas.
+    partes = pd.Series("", index=df.index, dtype=object)
+    for texto, campo, _, _ in Formatter().parse(template):
+        if texto:
+            partes = partes + texto
+        if campo is not None:
+            partes = partes + df[TEMPLATE_FIELDS[campo]].astype(str).astype(object)
+    return partes.to_numpy()
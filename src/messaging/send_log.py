@@ -0,0 +1,152 @@
+from datetime import datetime
+import threading
+import atexit
+import sqlite3
+import queue
+import time
+import os
+
+# Banco com o histórico de envios
+DB_PATH = "db/envios.db"
+
+# Os registros são gravados em uma única transação a cada FLUSH_ROWS linhas ou FLUSH_INTERVAL segundos, o que vier primeiro
+FLUSH_ROWS = 500
+FLUSH_INTERVAL = 1.0
+
+_FECHAR = object()
+
+
+def connect(db_path=DB_PATH): # Abre o banco de envios em modo WAL e garante a tabela e os índices.
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    # WAL: leituras (dashboards, consultas) não bloqueiam a gravação; com synchronous=NORMAL o fsync ocorre só nos checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS envios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_envio TEXT,
+            telefone TEXT,
+            mensagem TEXT,
+            status TEXT,
+            exame_resultado TEXT,
+            id_exame TEXT
+        )
+    """)
+    # Bancos criados antes da deduplicação não têm as colunas da chave do envio
+    colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(envios)")}
+    for coluna in ("exame_resultado", "id_exame"):
+        if coluna not in colunas:
+            conn.execute(f"ALTER TABLE envios ADD COLUMN {coluna} TEXT")
+    # O índice da chave (telefone, exame, ID) também atende as buscas só por telefone
+    conn.execute("DROP INDEX IF EXISTS idx_envios_telefone")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_envios_chave ON envios (telefone, exame_resultado, id_exame)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_envios_data_envio ON envios (data_envio)")
+    conn.commit()
+    return conn
+
+
+class SendLogWriter: # Grava os registros de envio em lotes a partir de uma thread dedicada; log() pode ser chamado de qualquer thread.
+
+    def __init__(self, db_path=DB_PATH, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.gravados = 0
+        self.transacoes = 0
+        self.queue = queue.Queue()
+
+        # A tabela é criada aqui para que erros de abertura do banco apareçam na thread que criou o writer
+        connect(db_path).close()
+        self.thread = threading.Thread(target=self._run, name="send-log", daemon=True)
+        self.thread.start()
+
+    def log(self, telefone, mensagem, status, data_envio=None, exame=None, id_exame=None): # Enfileira um registro de envio.
+        data_envio = data_envio or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.queue.put((data_envio, telefone, mensagem, status, exame, id_exame))
+
+    def flush(self): # Aguarda a gravação de todos os registros enfileirados até agora.
+        if not self.thread.is_alive():
+            return
+        gravado = threading.Event()
+        self.queue.put(gravado)
+        gravado.wait()
+
+    def close(self): # Grava o que estiver pendente e encerra a thread.
+        if self.thread.is_alive():
+            self.queue.put(_FECHAR)
+            self.thread.join()
+
+    def _run(self):
+        conn = connect(self.db_path)
+        pendentes = []
+        prazo = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, prazo - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _FECHAR:
+                self._write(conn, pendentes)
+                break
+            if isinstance(item, threading.Event):
+                self._write(conn, pendentes)
+                pendentes = []
+                item.set()
+                continue
+            if item is not None:
+                pendentes.append(item)
+            if len(pendentes) >= self.flush_rows or time.monotonic() >= prazo:
+                self._write(conn, pendentes)
+                pendentes = []
+                prazo = time.monotonic() + self.flush_interval
+        conn.close()
+
+    def _write(self, conn, rows): # Grava um lote de registros em uma transação.
+        if not rows:
+            return
+        try:
+            with conn:
+                conn.executemany("INSERT INTO envios (data_envio, telefone, mensagem, status, exame_resultado, id_exame) VALUES (?, ?, ?, ?, ?, ?)", [tuple(map(_sql_value, row)) for row in rows])
+        except sqlite3.Error as e:
+            # A thread continua viva para não travar quem aguarda em flush(); o lote perdido é informado no console
+            print(f"Erro ao gravar {len(rows)} registros de envio: {e}")
+            return
+        self.gravados += len(rows)
+        self.transacoes += 1
+
+
+def _sql_value(valor): # Valores que o sqlite3 não sabe gravar (pd.NA, NaT, escalares do numpy) viram NULL ou o tipo nativo, sem perder o lote inteiro.
+    if valor is None or isinstance(valor, (str, bytes, int, float)):
+        return valor
+    try:
+        # NaT é diferente de si mesmo; com o pd.NA a comparação não tem valor booleano (TypeError)
+        if valor != valor:
+            return None
+    except TypeError:
+        return None
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+
+# Instância compartilhada pelo processo
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_send_log(): # Retorna o writer do processo, iniciado apenas na primeira vez e encerrado ao fim do processo.
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SendLogWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def sent_keys(db_path=DB_PATH): # Chaves (telefone, exame_resultado, id_exame) dos envios feitos com sucesso.
+    conn = connect(db_path)
+    try:
+        return set(conn.execute("SELECT telefone, exame_resultado, id_exame FROM envios WHERE status = 'Sucesso' AND id_exame IS NOT NULL"))
+    finally:
+        conn.close()
@@ -1,63 +1,182 @@
-from twilio.rest import Client
-import sqlite3
-from datetime import datetime
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import urllib.request
+import urllib.parse
+import urllib.error
+import threading
+import random
+import base64
+import time
+from src.messaging.send_log import get_send_log
+from src.monitoring.metrics import get_metrics, quantile
 
 # Configurações do Twilio (substitua pelos seus dados)
 account_sid = "SUA_ACCOUNT_SID"
 auth_token = "SEU_AUTH_TOKEN"
 twilio_number = "SEU_NUMERO_TWILIO"
-client = Client(account_sid, auth_token)
-
-# Cria a pasta db/ se não existir
-if not os.path.exists("db"):
-    os.makedirs("db")
-
-# Conecta ao banco de dados SQLite (cria o arquivo se não existir)
-db_path = "db/envios.db"
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-# Cria a tabela de envios se não existir
-cursor.execute("""
-    CREATE TABLE IF NOT EXISTS envios (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        data_envio TEXT,
-        telefone TEXT,
-        mensagem TEXT,
-        status TEXT
-    )
-""")
-conn.commit()
-
-def send_whatsapp_message(telefone, mensagem):
+
+# Disparo concorrente: threads enviando em paralelo, limitadas ao número de envios por segundo do provedor
+SEND_WORKERS = 8
+SEND_RATE = 80  # mensagens por segundo (None desativa o limite)
+SEND_BURST = 1  # envios que podem sair de uma vez depois de um período ocioso
+MAX_RETRIES = 3  # novas tentativas para erros transitórios (429, 5xx, falhas de conexão)
+BACKOFF_BASE = 0.5  # segundos; a espera dobra a cada tentativa
+
+
+class TransientSendError(Exception): # Falha temporária do provedor; o envio é tentado novamente.
+    pass
+
+
+class TwilioTransport: # Envia pelo SDK do Twilio; cada thread usa o próprio cliente, criado no primeiro envio.
+
+    def __init__(self, account_sid=account_sid, auth_token=auth_token, from_number=twilio_number):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._local = threading.local()
+
+    def __call__(self, telefone, mensagem):
+        from twilio.rest import Client
+        from twilio.base.exceptions import TwilioRestException
+        from requests.exceptions import ConnectionError, Timeout
+
+        if not hasattr(self._local, "client"):
+            self._local.client = Client(self.account_sid, self.auth_token)
+        try:
+            self._local.client.messages.create(
+                body=mensagem,
+                from_=f"whatsapp:{self.from_number}",
+                to=f"whatsapp:{telefone}"
+            )
+        except TwilioRestException as e:
+            if e.status == 429 or e.status >= 500:
+                raise TransientSendError(str(e)) from e
+            raise
+        except (ConnectionError, Timeout) as e:
+            raise TransientSendError(str(e)) from e
+
+
+class HttpTransport: # Envia pela API REST do Twilio em base_url; permite testar o disparo contra um servidor local que imita o Twilio.
+
+    def __init__(self, base_url, account_sid=account_sid, auth_token=auth_token, from_number=twilio_number, timeout=10):
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.auth = "Basic " + base64.b64encode(f"{account_sid}:{auth_token}".encode()).decode()
+        self.from_number = from_number
+        self.timeout = timeout
+
+    def __call__(self, telefone, mensagem):
+        dados = urllib.parse.urlencode({"From": f"whatsapp:{self.from_number}", "To": f"whatsapp:{telefone}", "Body": mensagem}).encode("utf-8")
+        req = urllib.request.Request(self.url, data=dados, headers={"Authorization": self.auth})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise TransientSendError(f"HTTP {e.code}") from e
+            raise
+        except (urllib.error.URLError, OSError) as e:
+            raise TransientSendError(str(e)) from e
+
+
+class RateLimiter: # Token bucket compartilhado pelas threads: libera no máximo `rate` envios por segundo.
+
+    def __init__(self, rate, burst=SEND_BURST):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (agora - self.updated) * self.rate)
+                self.updated = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) / self.rate
+            time.sleep(espera)
+
+
+def _send_with_retry(transport, limiter, telefone, mensagem, max_retries, backoff_base): # Envia uma mensagem, repetindo com backoff exponencial em erros transitórios. Retorna (status, latência).
+    # A latência conta a partir da liberação do primeiro envio pelo limitador (inclui as retentativas)
+    limiter.acquire()
+    inicio = time.perf_counter()
+    tentativa = 0
+    while True:
+        try:
+            transport(telefone, mensagem)
+            return "Sucesso", time.perf_counter() - inicio
+        except TransientSendError as e:
+            if tentativa >= max_retries:
+                return f"Falha - Erro: {str(e)}", time.perf_counter() - inicio
+            time.sleep(backoff_base * 2 ** tentativa + random.uniform(0, backoff_base))
+            tentativa += 1
+            limiter.acquire()
+        except Exception as e:
+            return f"Falha - Erro: {str(e)}", time.perf_counter() - inicio
+
+def _send_and_log(transport, limiter, send_log, telefone, mensagem, chaves, max_retries, backoff_base): # Envia e enfileira o registro do envio no log (executado nas threads de envio).
+    # chaves: pares (exame_resultado, ID) cobertos pela mensagem; cada um vira um registro, usado na deduplicação dos próximos envios
+    status, latencia = _send_with_retry(transport, limiter, telefone, mensagem, max_retries, backoff_base)
+    for exame, id_exame in chaves or [(None, None)]:
+        send_log.log(telefone, mensagem, status, exame=exame, id_exame=id_exame)
+    return status, latencia
+
+def send_whatsapp_message(telefone, mensagem, transport=None, send_log=None, chaves=None):
     """Envia uma mensagem via WhatsApp usando a API do Twilio e registra no SQLite."""
-    try:
-        message = client.messages.create(
-            body=mensagem,
-            from_=f"whatsapp:{twilio_number}",
-            to=f"whatsapp:{telefone}"
-        )
-        status = "Sucesso"
+    status, _ = _send_and_log(transport or TwilioTransport(), RateLimiter(None), send_log or get_send_log(), telefone, mensagem, chaves, MAX_RETRIES, BACKOFF_BASE)
+    if status.startswith("Sucesso"):
         print(f"Mensagem para {telefone} enviada: Sim")
-    except Exception as e:
-        status = f"Falha - Erro: {str(e)}"
-        print(f"Erro ao enviar para {telefone}: {e}")
-
-    # Registra o envio no banco de dados
-    data_envio = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute(
-        "INSERT INTO envios (data_envio, telefone, mensagem, status) VALUES (?, ?, ?, ?)",
-        (data_envio, telefone, mensagem, status)
-    )
-    conn.commit()
+    else:
+        print(f"Erro ao enviar para {telefone}: {status}")
     return status.startswith("Sucesso")
 
-def send_all_messages(messages): # Envia todas as mensagens geradas e registra cada envio.
-    for idx, msg in enumerate(messages):
-        success = send_whatsapp_message(msg["telefone"], msg["mensagem"])
-        print(f"Mensagem {idx+1}/{len(messages)} - Enviada: {'Sim' if success else 'Não'}")
+def send_all_messages(messages, transport=None, workers=SEND_WORKERS, rate=SEND_RATE, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, send_log=None): # Envia todas as mensagens em paralelo, respeitando o limite do provedor, e registra cada envio.
+    # transport: função (telefone, mensagem) que faz o envio; o padrão usa o SDK do Twilio
+    # send_log: SendLogWriter que grava os registros em lote (padrão: db/envios.db)
+    transport = transport or TwilioTransport()
+    send_log = send_log or get_send_log()
+    limiter = RateLimiter(rate)
+    messages = list(messages)
+    metrics = get_metrics()
+    latencias = []
+    enviadas = 0
+    inicio = time.perf_counter()
+    with metrics.stage("send_all_messages", itens=len(messages)):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(_send_and_log, transport, limiter, send_log, msg["telefone"], msg["mensagem"], msg.get("chaves"), max_retries, backoff_base): msg
+                for msg in messages
+            }
+            for idx, future in enumerate(as_completed(futures)):
+                msg = futures[future]
+                status, latencia = future.result()
+                success = status.startswith("Sucesso")
+                if not success:
+                    print(f"Erro ao enviar para {msg['telefone']}: {status}")
+                latencias.append(latencia)
+                metrics.observe("envio_latencia_seconds", latencia)
+                enviadas += success
+                print(f"Mensagem {idx+1}/{len(messages)} - Enviada: {'Sim' if success else 'Não'}")
 
-# Garante que o banco de dados será fechado quando o script terminar
-import atexit
-atexit.register(lambda: conn.close())
\ No newline at end of file
+        # Ao retornar, todos os envios desta chamada já estão gravados no banco
+        send_log.flush()
+    metrics.count("mensagens", enviadas, status="enviada")
+    metrics.count("mensagens", len(messages) - enviadas, status="falha")
+    tempo = time.perf_counter() - inicio
+    stats = {
+        "mensagens": len(messages),
+        "enviadas": enviadas,
+        "falhas": len(messages) - enviadas,
+        "tempo": tempo,
+        "msgs_por_segundo": len(messages) / tempo if tempo > 0 else 0.0,
+        "latencia_p50": quantile(latencias, 0.5) if latencias else 0.0,
+        "latencia_p99": quantile(latencias, 0.99) if latencias else 0.0,
+    }
+    print(f"Envio concluído: {stats['enviadas']} enviadas, {stats['falhas']} falhas em {tempo:.2f} s ({stats['msgs_por_segundo']:.1f} msgs/s)")
+    print(f"Latência de envio: p50 = {stats['latencia_p50'] * 1000:.0f} ms, p99 = {stats['latencia_p99'] * 1000:.0f} ms")
+    return stats
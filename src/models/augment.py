@@ -0,0 +1,115 @@
+# Aumento de dados por sinônimos (nlpaug) para as classes minoritárias do treino multiclasse: os textos são aumentados
+# em um pool de processos, com semente fixa por texto, e os resultados ficam guardados em disco.
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Textos aumentados já calculados, por (texto exato, aumentador e parâmetros)
+AUG_CACHE_PATH = "data/cache/aumentos.db"
+# Aumentador usado; entra na chave junto com os parâmetros
+AUGMENTER = "nlpaug.SynonymAug"
+AUG_WORKERS = os.cpu_count() or 1
+# Abaixo disso o custo de subir os processos (e carregar o WordNet em cada um) é maior que o ganho
+PARALLEL_MIN_TEXTS = 64
+SEED = 42
+
+# Um SynonymAug por processo e por aug_p, criado no primeiro uso
+_augmenters = {}
+
+def _get_augmenter(aug_p):
+    if aug_p not in _augmenters:
+        from nlpaug.augmenter.word import SynonymAug
+        _augmenters[aug_p] = SynonymAug(aug_p=aug_p)
+    return _augmenters[aug_p]
+
+def augment_one(texto, aug_p, seed=SEED): # Aumenta um texto com uma semente derivada do próprio texto: o resultado não depende do processo nem da ordem.
+    import numpy as np
+    semente = int.from_bytes(hashlib.sha256(f"{seed}\x00{texto}".encode("utf-8")).digest()[:4], "little")
+    random.seed(semente)
+    np.random.seed(semente)
+    return _get_augmenter(aug_p).augment(texto)[0]
+
+def _augment_args(args):
+    return augment_one(*args)
+
+def augment_key(texto, aug_p, seed): # Chave do texto exato (sem normalizar espaços: o aumento depende deles) com o aumentador, o aug_p e a semente.
+    return hashlib.sha256(json.dumps([AUGMENTER, aug_p, seed, texto], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def augment_texts(textos, aug_p, seed=SEED, workers=None, use_cache=True): # Uma versão aumentada de cada texto, na mesma ordem.
+    workers = workers or AUG_WORKERS
+    keys = [augment_key(texto, aug_p, seed) for texto in textos]
+    prontos = get_augment_cache().get_many(keys) if use_cache else {}
+
+    # Cada texto ainda não visto é aumentado uma única vez
+    pendentes = {}
+    for key, texto in zip(keys, textos):
+        if key not in prontos and key not in pendentes:
+            pendentes[key] = texto
+
+    if pendentes:
+        args = [(texto, aug_p, seed) for texto in pendentes.values()]
+        if workers > 1 and len(args) >= PARALLEL_MIN_TEXTS:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                novos = list(pool.map(_augment_args, args, chunksize=max(1, len(args) // (workers * 4))))
+        else:
+            novos = [augment_one(*a) for a in args]
+        novos = dict(zip(pendentes, novos))
+        if use_cache:
+            get_augment_cache().put_many(novos)
+        prontos.update(novos)
+
+    return [prontos[key] for key in keys]
+
+
+class AugmentCache: # Textos aumentados em SQLite (tabela própria, sem limite de tamanho: cresce só com os dados de treino).
+
+    def __init__(self, path=AUG_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS aumentos (chave TEXT PRIMARY KEY, texto_aumentado TEXT NOT NULL)")
+        self.conn.commit()
+
+    def get_many(self, keys): # Retorna {chave: texto aumentado} para as chaves presentes.
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        with self.lock:
+            # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self.conn.execute(f"SELECT chave, texto_aumentado FROM aumentos WHERE chave IN ({placeholders})", chunk).fetchall())
+        return found
+
+    def put_many(self, items):
+        if not items:
+            return
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO aumentos (chave, texto_aumentado) VALUES (?, ?)", list(items.items()))
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM aumentos").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+# Instância compartilhada pelo processo
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_augment_cache(): # Retorna o cache de textos aumentados, abrindo o banco apenas na primeira vez.
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AugmentCache()
+    return _cache
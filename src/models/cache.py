@@ -0,0 +1,99 @@
+import sqlite3
+import hashlib
+import threading
+import time
+import os
+
+# Local padrão do cache de previsões e limite de entradas antes da remoção das menos usadas (LRU)
+CACHE_PATH = "data/cache/predicoes.db"
+CACHE_MAX_ENTRIES = 200_000
+
+
+def normalize_text(texto): # Normaliza espaços; o tokenizer ignora espaços repetidos, então a previsão não muda.
+    return " ".join(str(texto).split())
+
+def make_key(texto, model_version): # Chave do cache: hash do texto normalizado + versão dos modelos.
+    return hashlib.sha256(f"{model_version}\x00{normalize_text(texto)}".encode("utf-8")).hexdigest()
+
+
+class PredictionCache: # Cache persistente (SQLite) do exame_resultado por texto, com limite de tamanho e remoção LRU.
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS predicoes (
+                chave TEXT PRIMARY KEY,
+                resultado TEXT NOT NULL,
+                ultimo_acesso REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_predicoes_acesso ON predicoes (ultimo_acesso)")
+        self.conn.commit()
+
+    def get_many(self, keys): # Retorna {chave: resultado} para as chaves presentes e atualiza o último acesso delas.
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        with self.lock:
+            # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(f"SELECT chave, resultado FROM predicoes WHERE chave IN ({placeholders})", chunk)
+                found.update(rows.fetchall())
+            if found:
+                agora = time.time()
+                self.conn.executemany("UPDATE predicoes SET ultimo_acesso = ? WHERE chave = ?", [(agora, k) for k in found])
+                self.conn.commit()
+        hits = sum(1 for k in keys if k in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items): # Grava {chave: resultado} e remove as entradas menos usadas se o limite for ultrapassado.
+        if not items:
+            return
+        agora = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO predicoes (chave, resultado, ultimo_acesso) VALUES (?, ?, ?)",
+                [(k, v, agora) for k, v in items.items()]
+            )
+            excesso = self.conn.execute("SELECT COUNT(*) FROM predicoes").fetchone()[0] - self.max_entries
+            if excesso > 0:
+                self.conn.execute(
+                    "DELETE FROM predicoes WHERE chave IN (SELECT chave FROM predicoes ORDER BY ultimo_acesso LIMIT ?)",
+                    (excesso,)
+                )
+            self.conn.commit()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self): # Contadores de acertos/erros desde o último reset_stats().
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        self.conn.close()
+
+
+# Instância compartilhada pelo processo
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_prediction_cache(): # Retorna o cache do processo, abrindo o banco apenas na primeira vez.
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
@@ -0,0 +1,161 @@
+import threading
+import hashlib
+import time
+import os
+from src.models.rules import NAO_EXAME, LABEL_MAP
+from src.monitoring.metrics import get_metrics
+
+# Caminhos dos artefatos gerados pelos scripts de treinamento
+CONFIG_DIR = "./models/config"
+MODELO_BINARIO_DIR = "./models/binario/modelo_binario"
+MODELO_MULTICLASSE_DIR = "./models/multiclasse/modelo_multiclasse"
+
+
+# Modo de inferência: "bucketed" ordena os textos por tamanho e preenche cada lote só até o maior item dele;
+# "fixed" mantém o comportamento original (lotes fixos com padding até max_length).
+INFERENCE_MODE = "bucketed"
+MAX_LENGTH = 128
+MAX_BATCH_SIZE = 128  # Limite de textos por lote no modo bucketed
+MAX_TOKENS_PER_BATCH = 4096  # Orçamento de tokens (textos x maior comprimento) por lote no modo bucketed
+
+# Backend de inferência: "torch" (pipeline do transformers) ou "onnx" (ONNX Runtime na CPU, exportado com export_onnx.py).
+# Sem o arquivo exportado, o backend "onnx" volta para o pipeline do PyTorch.
+INFERENCE_BACKEND = "torch"
+ONNX_QUANTIZED = False  # Usa o modelo com quantização dinâmica int8 (conferir com benchmarks/onnx_backend.py antes de ativar)
+ONNX_THREADS = None  # Threads intra-op do ONNX Runtime (None = uma por núcleo físico)
+
+
+def make_buckets(lengths, max_batch_size, max_tokens): # Agrupa os índices ordenados por comprimento em lotes que respeitam o orçamento de tokens.
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    buckets = []
+    atual = []
+    for idx in order:
+        # Como a ordem é crescente, o item atual é o maior do lote e define o padding
+        if atual and (len(atual) + 1 > max_batch_size or (len(atual) + 1) * lengths[idx] > max_tokens):
+            buckets.append(atual)
+            atual = []
+        atual.append(idx)
+    if atual:
+        buckets.append(atual)
+    return buckets
+
+def model_version(*model_dirs): # Identifica a versão dos modelos pelo nome, tamanho e data de modificação dos arquivos salvos.
+    digest = hashlib.sha256()
+    for model_dir in model_dirs:
+        for nome in sorted(os.listdir(model_dir)):
+            caminho = os.path.join(model_dir, nome)
+            if os.path.isfile(caminho):
+                stat = os.stat(caminho)
+                digest.update(f"{nome}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def model_backend(model_dir, backend=INFERENCE_BACKEND, onnx_quantized=ONNX_QUANTIZED): # Backend efetivo de um modelo ("onnx" só quando o arquivo exportado existe).
+    if backend == "onnx":
+        from src.models.onnx_backend import onnx_path
+        path = onnx_path(model_dir, onnx_quantized)
+        if os.path.exists(path):
+            return f"onnx:{model_version(os.path.dirname(path))}"
+    return "torch"
+
+def classifier_version(config_dir=CONFIG_DIR, binario_dir=MODELO_BINARIO_DIR, multiclasse_dir=MODELO_MULTICLASSE_DIR,
+                       backend=INFERENCE_BACKEND, onnx_quantized=ONNX_QUANTIZED): # Versão usada nas chaves do cache, calculada sem carregar os modelos.
+    # multiclasse_dir=None: versão apenas do modelo binário
+    model_dirs = [model_dir for model_dir in (binario_dir, multiclasse_dir) if model_dir is not None]
+    # Inclui o backend, já que o int8 pode mudar previsões
+    backends = [model_backend(model_dir, backend, onnx_quantized) for model_dir in model_dirs]
+    return model_version(config_dir, *model_dirs) + "-" + "-".join(backends)
+
+
+class ExamClassifier: # Mantém o tokenizer e os dois pipelines carregados em memória para serem reutilizados entre chamadas e arquivos.
+
+    def __init__(self, config_dir=CONFIG_DIR, binario_dir=MODELO_BINARIO_DIR, multiclasse_dir=MODELO_MULTICLASSE_DIR, batch_size=32,
+                 inference_mode=INFERENCE_MODE, max_batch_size=MAX_BATCH_SIZE, max_tokens_per_batch=MAX_TOKENS_PER_BATCH,
+                 backend=INFERENCE_BACKEND, onnx_quantized=ONNX_QUANTIZED, onnx_threads=ONNX_THREADS):
+        self.batch_size = batch_size
+        self.onnx_quantized = onnx_quantized
+        self.onnx_threads = onnx_threads
+        self.inference_mode = inference_mode
+        self.max_batch_size = max_batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        # Os pipelines do transformers não são thread-safe, então as chamadas são serializadas
+        self.lock = threading.Lock()
+
+        # Carrega o tokenizer e os modelos uma única vez (o transformers só é importado aqui, no primeiro uso)
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(config_dir)
+        self.backends = []
+        self.classifier_binario = self._load_model(binario_dir, backend)
+        # multiclasse_dir=None carrega só o modelo binário (ex.: filtragem dos dados de treino do multiclasse)
+        self.classifier_multiclasse = self._load_model(multiclasse_dir, backend) if multiclasse_dir is not None else None
+
+        # Versões dos modelos usadas nas chaves do cache de previsões
+        self.version = classifier_version(config_dir, binario_dir, multiclasse_dir, backend, onnx_quantized)
+        self.binary_version = classifier_version(config_dir, binario_dir, None, backend, onnx_quantized)
+
+    def _load_model(self, model_dir, backend):
+        efetivo = model_backend(model_dir, backend, self.onnx_quantized)
+        self.backends.append(efetivo)
+        if efetivo.startswith("onnx"):
+            from src.models.onnx_backend import OnnxTextClassifier, onnx_path
+            return OnnxTextClassifier(onnx_path(model_dir, self.onnx_quantized), self.tokenizer, max_length=MAX_LENGTH, intra_op_threads=self.onnx_threads)
+        if backend == "onnx":
+            print(f"Modelo ONNX de {model_dir} não encontrado, usando o pipeline do PyTorch.")
+
+        from transformers import pipeline
+        return pipeline(
+            "text-classification",
+            model=model_dir,
+            tokenizer=self.tokenizer,
+            truncation=True,
+            max_length=MAX_LENGTH,
+            padding="max_length",
+            batch_size=self.batch_size
+        )
+
+    def predict_binario(self, texts, batch_size=None, progress=None): # Retorna as previsões brutas do modelo binário ({"label", "score"} por texto).
+        return self._run(self.classifier_binario, texts, batch_size, progress)
+
+    def predict_multiclasse(self, texts, batch_size=None, progress=None): # Retorna as previsões brutas do modelo multiclasse.
+        return self._run(self.classifier_multiclasse, texts, batch_size, progress)
+
+    def _run(self, classifier, texts, batch_size, progress=None):
+        # progress: chamada com a quantidade de textos de cada lote concluído
+        if not texts:
+            return []
+        with self.lock:
+            if self.inference_mode != "bucketed":
+                results = classifier(texts, batch_size=batch_size or self.batch_size)
+                if progress is not None:
+                    progress(len(texts))
+                return results
+
+            # Mede o comprimento de cada texto já truncado e monta lotes de tamanhos parecidos
+            lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]]
+            buckets = make_buckets(lengths, batch_size or self.max_batch_size, self.max_tokens_per_batch)
+
+            # Sem padding fixo: o pipeline preenche cada lote apenas até o maior texto dele
+            results = [None] * len(texts)
+            metrics = get_metrics()
+            for bucket in buckets:
+                inicio = time.perf_counter()
+                preds = classifier([texts[idx] for idx in bucket], batch_size=len(bucket), padding=False)
+                metrics.observe("modelo_lote_seconds", time.perf_counter() - inicio)
+                if progress is not None:
+                    progress(len(bucket))
+                # Restaura a ordem original das linhas
+                for idx, pred in zip(bucket, preds):
+                    results[idx] = pred
+            return results
+
+
+# Instância compartilhada pelo processo (carregada sob demanda na primeira chamada)
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier(**kwargs): # Retorna o classificador do processo, carregando os modelos apenas na primeira vez (kwargs valem só nessa carga).
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = ExamClassifier(**kwargs)
+    return _classifier
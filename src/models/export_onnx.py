@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from src.models.classifier import CONFIG_DIR, MODELO_BINARIO_DIR, MODELO_MULTICLASSE_DIR, MAX_LENGTH
+from src.models.onnx_backend import ONNX_SUBDIR, ONNX_FILE, onnx_path
+
+def export_onnx(model_dir, tokenizer, quantizar=True): # Exporta um modelo treinado para ONNX e, opcionalmente, aplica quantização dinâmica int8.
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+
+    output_dir = os.path.join(model_dir, ONNX_SUBDIR)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, ONNX_FILE)
+
+    # Entrada de exemplo; lote e sequência ficam dinâmicos no grafo exportado
+    exemplo = tokenizer(["exemplo de texto"], truncation=True, max_length=MAX_LENGTH, return_tensors="pt")
+    torch.onnx.export(
+        model,
+        (exemplo["input_ids"], exemplo["attention_mask"]),
+        output_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=14,
+    )
+    print(f"Modelo exportado para {output_path}")
+
+    if quantizar:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quant_path = onnx_path(model_dir, quantized=True)
+        quantize_dynamic(output_path, quant_path, weight_type=QuantType.QInt8)
+        print(f"Modelo quantizado (int8) salvo em {quant_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sem-quantizacao", action="store_true", help="Exporta apenas o modelo fp32")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(CONFIG_DIR)
+    for model_dir in (MODELO_BINARIO_DIR, MODELO_MULTICLASSE_DIR):
+        export_onnx(model_dir, tokenizer, quantizar=not args.sem_quantizacao)
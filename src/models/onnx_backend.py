@@ -0,0 +1,50 @@
+import os
+import numpy as np
+
+# Arquivos gerados pelo export_onnx.py dentro da pasta de cada modelo
+ONNX_SUBDIR = "onnx"
+ONNX_FILE = "model.onnx"
+ONNX_QUANT_FILE = "model.quant.onnx"
+
+
+def onnx_path(model_dir, quantized): # Caminho do modelo exportado (quantizado em int8 ou fp32); sem padrão, para não divergir do ONNX_QUANTIZED do classifier.py.
+    return os.path.join(model_dir, ONNX_SUBDIR, ONNX_QUANT_FILE if quantized else ONNX_FILE)
+
+
+class OnnxTextClassifier: # Substituto do pipeline "text-classification" executado com o ONNX Runtime na CPU.
+
+    def __init__(self, path, tokenizer, max_length=128, padding="max_length", intra_op_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {entrada.name for entrada in self.session.get_inputs()}
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.padding = padding
+
+    def __call__(self, texts, batch_size=32, padding=None): # Mesmo formato de saída do pipeline: [{"label": "LABEL_<id>", "score": p}, ...].
+        padding = self.padding if padding is None else padding
+        results = []
+        for start in range(0, len(texts), batch_size):
+            lote = texts[start:start + batch_size]
+            # padding=False no modo bucketed: o lote é preenchido só até o maior texto dele
+            enc = self.tokenizer(
+                lote,
+                truncation=True,
+                max_length=self.max_length,
+                padding=padding or "longest",
+                return_tensors="np"
+            )
+            feeds = {nome: enc[nome].astype(np.int64) for nome in ("input_ids", "attention_mask") if nome in self.input_names}
+            logits = self.session.run(["logits"], feeds)[0]
+            # Softmax estável para obter o score da classe prevista
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs = exp / exp.sum(axis=1, keepdims=True)
+            for label_id, score in zip(probs.argmax(axis=1), probs.max(axis=1)):
+                results.append({"label": f"LABEL_{label_id}", "score": float(score)})
+        return results
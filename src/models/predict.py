@@ -1,62 +1,145 @@
-from transformers import pipeline, AutoTokenizer
-
-def predict_exam_batch(texts, batch_size=32): # Faz a previsão em lote para uma lista de textos usando os modelos binário e multiclasse.
-    
-    # Carrega o tokenizer e os modelos uma única vez
-    tokenizer = AutoTokenizer.from_pretrained("./models/config")
-    classifier_binario = pipeline(
-        "text-classification",
-        model="./models/binario/modelo_binario",
-        tokenizer=tokenizer,
-        truncation=True,
-        max_length=128,
-        padding="max_length",
-        batch_size=batch_size  # Define o tamanho do lote
-    )
-    classifier_multiclasse = pipeline(
-        "text-classification",
-        model="./models/multiclasse/modelo_multiclasse",
-        tokenizer=tokenizer,
-        truncation=True,
-        max_length=128,
-        padding="max_length",
-        batch_size=batch_size  # Define o tamanho do lote
-    )
-    
-    # Limpa os textos e garante que sejam strings válidas
+import numpy as np
+import time
+from collections import Counter
+from src.models.classifier import get_classifier, classifier_version, LABEL_MAP, NAO_EXAME
+from src.models.cache import get_prediction_cache, make_key
+from src.models.prefilter import get_prefilter, PREFILTER_ENABLED
+from src.models.sharded import classify_sharded
+from src.monitoring.metrics import get_metrics
+
+# Nomes das classes indexados pelo id do modelo multiclasse
+LABEL_NAMES = np.array([LABEL_MAP[label_id] for label_id in sorted(LABEL_MAP)], dtype=object)
+
+# Versão da montagem dos resultados; entra na chave do cache para descartar previsões montadas por versões anteriores
+RESULT_VERSION = "2"
+
+# Progresso da inferência: exibido só a partir de PROGRESS_MIN_TEXTS textos, no máximo a cada PROGRESS_INTERVAL segundos
+PROGRESS_MIN_TEXTS = 2_000
+PROGRESS_INTERVAL = 5.0
+
+# Quantidade de linhas resolvidas por cada etapa (prefiltro, cache, modelo_binario, modelo_multiclasse).
+# Nas etapas de modelo a contagem é por texto único enviado ao modelo.
+stage_counts = Counter()
+
+def predict_exam_batch(texts, batch_size=None, classifier=None, use_cache=True, use_prefilter=PREFILTER_ENABLED, workers=1): # Faz a previsão em lote para uma lista de textos usando os modelos binário e multiclasse.
+    # batch_size: limite de textos por lote (None usa a configuração do classificador; no modo bucketed o lote também respeita o orçamento de tokens)
+    # workers > 1: os modelos rodam em processos separados (src/models/sharded.py); pré-filtro e cache continuam neste processo
+    # Os workers carregam os modelos padrão: um classifier explícito seria ignorado e o cache gravaria as previsões sob a versão dele
+    if classifier is not None and workers > 1:
+        raise ValueError("classifier não pode ser usado com workers > 1: os workers carregam os modelos padrão (get_classifier).")
+
+    with get_metrics().stage("predict_exam_batch", itens=len(texts)):
+        # Reutiliza o classificador já carregado no processo (tokenizer e pipelines são carregados uma única vez)
+        if classifier is None and workers <= 1:
+            classifier = get_classifier()
+        run_models = _models_runner(batch_size, classifier, workers)
+
+        # Limpa os textos e garante que sejam strings válidas
+        texts_cleaned = [str(text) if isinstance(text, str) else "" for text in texts]
+        results = np.full(len(texts_cleaned), NAO_EXAME, dtype=object)
+
+        # Etapa 1: pré-filtro por regras resolve os textos que com certeza não são exames
+        pendentes = np.arange(len(texts_cleaned))
+        if use_prefilter:
+            resolvidos = np.array(get_prefilter().resolve_mask(texts_cleaned), dtype=bool)
+            stage_counts["prefiltro"] += int(resolvidos.sum())
+            pendentes = np.flatnonzero(~resolvidos)
+        textos_pendentes = [texts_cleaned[idx] for idx in pendentes]
+
+        # Etapas 2 e 3: cache de previsões e modelos
+        if use_cache:
+            version = classifier.version if classifier is not None else classifier_version()
+            results[pendentes] = _predict_cached(textos_pendentes, version, run_models)
+        else:
+            results[pendentes] = run_models(textos_pendentes)
+        return results.tolist()
+
+def predict_binary_batch(texts, batch_size=None, classifier=None, use_cache=True): # Só o modelo binário, em lote: array booleano por texto (True = exame de imagem).
+    # Usa o mesmo caminho de inferência (lotes por comprimento, sem padding fixo) e o mesmo cache de previsões,
+    # com chaves próprias ligadas apenas à versão do modelo binário
+    if classifier is None:
+        classifier = get_classifier()
     texts_cleaned = [str(text) if isinstance(text, str) else "" for text in texts]
-    
+
+    def run_binario(textos):
+        return ["1" if exame else "0" for exame in binary_label_array(classifier.predict_binario(textos, batch_size=batch_size))]
+
+    if use_cache:
+        labels = _predict_cached(texts_cleaned, f"binario:{classifier.binary_version}", run_binario)
+    else:
+        labels = run_binario(texts_cleaned)
+    return np.array(labels, dtype=object) == "1"
+
+def _models_runner(batch_size, classifier, workers): # Função que executa os modelos no próprio processo ou no pool de workers.
+    if workers <= 1:
+        return lambda textos: _classify(textos, batch_size, classifier, show_progress=True)
+
+    def run_sharded(textos):
+        results, counts = classify_sharded(textos, workers, batch_size, progress=InferenceProgress("Inferência", len(textos)))
+        stage_counts.update(counts)
+        return results
+    return run_sharded
+
+def _predict_cached(texts_cleaned, version, run_models): # Consulta o cache e envia aos modelos apenas os textos ainda não vistos (cada texto repetido uma única vez).
+    cache = get_prediction_cache()
+    keys = [make_key(text, f"{version}:{RESULT_VERSION}") for text in texts_cleaned]
+    cached = cache.get_many(keys)
+    stage_counts["cache"] += sum(1 for key in keys if key in cached)
+    pendentes = {}
+    for key, text in zip(keys, texts_cleaned):
+        if key not in cached and key not in pendentes:
+            pendentes[key] = text
+
+    if pendentes:
+        novos = dict(zip(pendentes, run_models(list(pendentes.values()))))
+        cache.put_many(novos)
+        cached.update(novos)
+
+    return [cached[key] for key in keys]
+
+class InferenceProgress: # Recebe os textos concluídos a cada lote (ou parte, no modo com workers) e exibe o progresso da etapa.
+
+    def __init__(self, etapa, total):
+        self.etapa = etapa
+        self.total = total
+        self.feitos = 0
+        self.inicio = time.perf_counter()
+        self.exibido = self.inicio
+
+    def __call__(self, feitos):
+        self.feitos += feitos
+        # Entradas pequenas (ex.: lotes do server.py) não exibem progresso
+        agora = time.perf_counter()
+        if self.total < PROGRESS_MIN_TEXTS or (self.feitos < self.total and agora - self.exibido < PROGRESS_INTERVAL):
+            return
+        self.exibido = agora
+        vazao = self.feitos / (agora - self.inicio) if agora > self.inicio else 0.0
+        restante = (self.total - self.feitos) / vazao if vazao else 0.0
+        print(f"{self.etapa}: {self.feitos}/{self.total} textos ({self.feitos / self.total:.0%}), {vazao:.0f} textos/s, restam ~{restante:.0f} s")
+
+def _classify(texts_cleaned, batch_size, classifier, show_progress=False): # Executa os dois modelos sobre os textos já limpos.
+    # show_progress: exibe o progresso de cada modelo (desligado nos workers, que reportam por parte concluída)
     # Faz a previsão binária em lote
-    pred_binarias = classifier_binario(texts_cleaned)
-    
-    # Inicializa os resultados
-    results = []
-    # Filtra os textos que são exames (LABEL_1) para a previsão multiclasse
-    textos_exames = []
-    indices_exames = []
-    for idx, pred in enumerate(pred_binarias):
-        if pred["label"] == "LABEL_1":
-            textos_exames.append(texts_cleaned[idx])
-            indices_exames.append(idx)
-        else:
-            results.append("Não é exame de imagem")
-    
-    # Faz a previsão multiclasse em lote para os textos que são exames
-    if textos_exames:
-        pred_multiclasses = classifier_multiclasse(textos_exames)
-        label_map = {0: "Tomografia", 1: "Ressonância Magnética", 2: "Ultrassonografia", 3: "Radiografia", 4: "Eletrocardiograma", 5: "Densiotometria"}
-        for idx, pred in zip(indices_exames, pred_multiclasses):
-            label_id = int(pred["label"].split("_")[1])
-            results.insert(idx, label_map[label_id])
-    
-    # Preenche os resultados para os textos que não foram classificados como exames
-    final_results = []
-    result_idx = 0
-    for idx in range(len(texts)):
-        if idx in indices_exames:
-            final_results.append(results[result_idx])
-            result_idx += 1
-        else:
-            final_results.append("Não é exame de imagem")
-    
-    return final_results
\ No newline at end of file
+    progress = InferenceProgress("Modelo binário", len(texts_cleaned)) if show_progress else None
+    is_exame = binary_label_array(classifier.predict_binario(texts_cleaned, batch_size=batch_size, progress=progress))
+
+    # Faz a previsão multiclasse em lote apenas para os textos que são exames (LABEL_1)
+    indices_exames = np.flatnonzero(is_exame)
+    textos_exames = [texts_cleaned[idx] for idx in indices_exames]
+    progress = InferenceProgress("Modelo multiclasse", len(textos_exames)) if show_progress else None
+    label_ids = multiclass_label_array(classifier.predict_multiclasse(textos_exames, batch_size=batch_size, progress=progress))
+    stage_counts["modelo_binario"] += len(texts_cleaned) - len(textos_exames)
+    stage_counts["modelo_multiclasse"] += len(textos_exames)
+
+    return merge_predictions(is_exame, label_ids).tolist()
+
+def binary_label_array(pred_binarias): # Converte as previsões do modelo binário em um array booleano (True = exame de imagem).
+    return np.fromiter((pred["label"] == "LABEL_1" for pred in pred_binarias), dtype=bool, count=len(pred_binarias))
+
+def multiclass_label_array(pred_multiclasses): # Converte as previsões do modelo multiclasse nos ids de classe (LABEL_<id>).
+    return np.fromiter((int(pred["label"].split("_")[1]) for pred in pred_multiclasses), dtype=np.int64, count=len(pred_multiclasses))
+
+def merge_predictions(is_exame, label_ids): # Monta o exame_resultado de cada linha: label_ids segue a ordem das linhas com is_exame=True.
+    results = np.full(len(is_exame), NAO_EXAME, dtype=object)
+    results[is_exame] = LABEL_NAMES[label_ids]
+    return results
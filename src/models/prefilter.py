@@ -0,0 +1,52 @@
+import re
+import random
+from src.models.rules import EXAMES_IMAGEM, EXCLUSOES
+
+# Pré-filtro por regras antes do modelo binário (opcional: as linhas resolvidas por ele não passam pelo modelo).
+# Antes de ativar, conferir a concordância das regras com o modelo: python main.py --conferir-prefiltro
+PREFILTER_ENABLED = False
+# "exclusoes": resolve apenas textos vazios ou com termos de exclusão (as regras de rotulagem sempre os marcam como "não");
+# "regras": resolve também os textos sem nenhuma palavra-chave de exame (mais agressivo)
+PREFILTER_MODE = "exclusoes"
+# Quantidade de linhas resolvidas pelo pré-filtro conferidas com o modelo binário
+AGREEMENT_SAMPLE_SIZE = 200
+
+
+class RulePrefilter: # Resolve sem o modelo os textos que as regras de rotulagem classificam com certeza como "não é exame".
+
+    def __init__(self, mode=PREFILTER_MODE):
+        self.mode = mode
+        # Cada lista vira uma única expressão regular (mesma semântica de substring do is_exame_imagem)
+        self.keywords = re.compile("|".join(re.escape(termo) for termo in EXAMES_IMAGEM))
+        self.exclusoes = re.compile("|".join(re.escape(termo) for termo in EXCLUSOES))
+
+    def is_nao_exame(self, texto): # True quando o texto pode ser resolvido como "Não é exame de imagem" sem o modelo.
+        if not texto.strip():
+            return True
+        texto_lower = texto.lower()
+        if self.exclusoes.search(texto_lower):
+            return True
+        return self.mode == "regras" and not self.keywords.search(texto_lower)
+
+    def resolve_mask(self, texts): # Lista de booleanos: True para as linhas resolvidas pelo pré-filtro.
+        return [self.is_nao_exame(texto) for texto in texts]
+
+
+def check_agreement(texts, resolved_mask, classifier, sample_size=AGREEMENT_SAMPLE_SIZE, seed=42): # Confere uma amostra das linhas resolvidas pelo pré-filtro com o modelo binário.
+    resolvidos = [texto for texto, resolvido in zip(texts, resolved_mask) if resolvido]
+    if not resolvidos:
+        return None
+    amostra = random.Random(seed).sample(resolvidos, min(sample_size, len(resolvidos)))
+    preds = classifier.predict_binario(amostra)
+    concordam = sum(pred["label"] != "LABEL_1" for pred in preds)
+    return {"amostra": len(amostra), "concordancia": concordam / len(amostra)}
+
+
+# Instância compartilhada pelo processo
+_prefilter = None
+
+def get_prefilter():
+    global _prefilter
+    if _prefilter is None:
+        _prefilter = RulePrefilter()
+    return _prefilter
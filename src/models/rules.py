@@ -0,0 +1,34 @@
+# Rótulos dos modelos e regras de palavras-chave usadas para rotular os dados de treino dos dois modelos.
+# O código deste módulo entra na chave dos datasets salvos (src/models/train_data.py): editar as regras gera novos rótulos.
+
+NAO_EXAME = "Não é exame de imagem"
+LABEL_MAP = {0: "Tomografia", 1: "Ressonância Magnética", 2: "Ultrassonografia", 3: "Radiografia", 4: "Eletrocardiograma", 5: "Densiotometria"}
+
+# Palavras chaves de exames de imagem
+EXAMES_IMAGEM = ["tomografia ", "tc ", "ct ", "ressonância magnética ", "rnm ", "rm ", "mri ", "ultrassom ", "us ", "ecografia ", "usg ", "radiografia ", "rx ", "raio x ", "eletrocardiograma ", "ecg ", "densitometria ", "mamografia "]
+# Termos que indicam receita de medicamentos ou exames laboratoriais
+EXCLUSOES = ["furosemida ", "uso oral ", "uso ", "uso interno ", "obstipante ", "hemograma ", "uso nasal ", "uso inalatorio "]
+
+def is_exame_imagem(texto):
+    texto_lower = texto.lower()
+    # Verifica se o texto obedece as regras para ser um exame de imagem
+    for exame in EXAMES_IMAGEM:
+        if exame in texto_lower and not any(med in texto_lower for med in EXCLUSOES):
+            return 1 # Sim
+    return 0 # Não
+
+def classificar_exame(texto): # Classifica o tipo de exame de imagem com base no texto.
+    texto_lower = texto.lower()
+    if "tomografia" in texto_lower or "tc" in texto_lower or "ct" in texto_lower:
+        return "Tomografia"
+    elif "ressonância magnética" in texto_lower or "rnm" in texto_lower or "rm" in texto_lower or "mri" in texto_lower:
+        return "Ressonância Magnética"
+    elif "ultrassom" in texto_lower or "us" in texto_lower or "ecografia" in texto_lower or "usg" in texto_lower:
+        return "Ultrassonografia"
+    elif "radiografia" in texto_lower or "rx" in texto_lower or "raio x" in texto_lower:
+        return "Radiografia"
+    elif "eletrocardiograma" in texto_lower or "ecg" in texto_lower:
+        return "Eletrocardiograma"
+    elif "densitometria" in texto_lower:
+        return "Densiotometria"
+    return None
@@ -0,0 +1,66 @@
+# Inferência em vários processos: cada worker carrega os modelos uma única vez e classifica partes do lote.
+# Este módulo não importa torch/transformers no topo para que o limite de threads seja aplicado antes da carga.
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import atexit
+import math
+import os
+
+# Pool mantido entre chamadas para que os workers não recarreguem os modelos
+_pool = None
+_pool_workers = 0
+
+
+def _init_worker(threads): # Limita as threads de cada worker (evita oversubscription) e carrega os modelos.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+    from src.models.classifier import get_classifier
+    get_classifier(onnx_threads=threads)
+
+def _classify_shard(args): # Executa os modelos sobre uma parte dos textos e devolve também as contagens por etapa.
+    texts, batch_size = args
+    from src.models.classifier import get_classifier
+    from src.models.predict import _classify, stage_counts
+    stage_counts.clear()
+    results = _classify(texts, batch_size, get_classifier())
+    return results, dict(stage_counts)
+
+def get_pool(workers, threads_per_worker=None): # Retorna o pool de workers, recriando-o apenas se o número de workers mudar.
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        # "spawn" garante processos limpos, sem herdar o estado do torch do processo principal
+        _pool = ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"), initializer=_init_worker, initargs=(threads,))
+        _pool_workers = workers
+    return _pool
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+atexit.register(shutdown_pool)
+
+def classify_sharded(texts, workers, batch_size=None, shards_per_worker=2, progress=None): # Divide os textos em partes, classifica em paralelo e remonta na ordem original.
+    # progress: chamada com a quantidade de textos de cada parte recebida
+    if not texts:
+        return [], {}
+    tamanho = math.ceil(len(texts) / (workers * shards_per_worker))
+    shards = [(texts[start:start + tamanho], batch_size) for start in range(0, len(texts), tamanho)]
+
+    results = []
+    counts = {}
+    # map preserva a ordem das partes
+    for shard_results, shard_counts in get_pool(workers).map(_classify_shard, shards):
+        results.extend(shard_results)
+        if progress is not None:
+            progress(len(shard_results))
+        for etapa, total in shard_counts.items():
+            counts[etapa] = counts.get(etapa, 0) + total
+    return results, counts
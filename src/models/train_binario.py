@@ -1,19 +1,17 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments
-from datasets import Dataset
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments, DataCollatorWithPadding
 from sklearn.metrics import accuracy_score, f1_score
 from sklearn.utils import resample
 from collections import Counter
 import pandas as pd
+from src.models.rules import is_exame_imagem
+from src.models.train_data import BASE_MODEL, prepare_dataset
 
-def is_exame_imagem(texto):
-    # Palavras chaves de exames de imagem
-    exames_imagem = ["tomografia ", "tc ", "ct ", "ressonância magnética ", "rnm ", "rm ", "mri ", "ultrassom ", "us ", "ecografia ", "usg ", "radiografia ", "rx ", "raio x ", "eletrocardiograma ", "ecg ", "densitometria ", "mamografia "]
-    texto_lower = texto.lower()
-    # Verifica se o texto obedece as regras para ser um exame de imagem
-    for exame in exames_imagem:
-        if exame in texto_lower and not any(med in texto_lower for med in ["furosemida ", "uso oral ", "uso ", "uso interno ", "obstipante ", "hemograma ", "uso nasal ", "uso inalatorio "]):
-            return 1 # Sim
-    return 0 # Não
+# Parâmetros do balanceamento (entram na chave do dataset salvo)
+BALANCE_PARAMS = {"random_state": 42}
 
 def balance_data(dados):
     # Filtra dados com texto válido e converte para string
@@ -29,34 +27,21 @@ def balance_data(dados):
     dados_sim = [d for d in dados_binarios if d["label"] == 1]
     dados_nao = [d for d in dados_binarios if d["label"] == 0]
     if len(dados_nao) >= len(dados_sim):
-        dados_nao_reduzidos = resample(dados_nao, replace=False, n_samples=len(dados_sim), random_state=42)
+        dados_nao_reduzidos = resample(dados_nao, replace=False, n_samples=len(dados_sim), random_state=BALANCE_PARAMS["random_state"])
         return dados_sim + dados_nao_reduzidos
     else:
-        dados_sim_aumentados = resample(dados_sim, replace=True, n_samples=len(dados_nao), random_state=42)
+        dados_sim_aumentados = resample(dados_sim, replace=True, n_samples=len(dados_nao), random_state=BALANCE_PARAMS["random_state"])
         return dados_sim_aumentados + dados_nao
 
 def train_binario(dados, output_dir="./models/binario"):
     # Carrega o tokenizer
-    tokenizer = AutoTokenizer.from_pretrained("distilbert-base-multilingual-cased")
-    
-    # Balanceia os dados
-    dados_balanceados = balance_data(dados)
-    print(f"Total de dados binários balanceados: {len(dados_balanceados)}")
-
-    # Pré-processa os dados
-    def preprocess_function(examples):
-        return tokenizer(examples["texto"], truncation=True, padding=True, max_length=128)
-
-    dataset = Dataset.from_list(dados_balanceados).map(preprocess_function, batched=True)
-    dataset = dataset.rename_column("label", "labels")
-    dataset.set_format("torch", columns=["input_ids", "attention_mask", "labels"])
+    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL)
 
-    # Divide os dados (treino, validação, teste)
-    dataset_split = dataset.train_test_split(test_size=0.3)
-    dataset_test_val = dataset_split["test"].train_test_split(test_size=0.5)
-    train_dataset = dataset_split["train"]
-    val_dataset = dataset_test_val["train"]
-    test_dataset = dataset_test_val["test"]
+    # Balanceia, tokeniza e divide os dados (treino, validação, teste); reaproveita o dataset salvo se nada mudou
+    splits = prepare_dataset("binario", dados, balance_data, tokenizer, BALANCE_PARAMS)
+    train_dataset = splits["train"]
+    val_dataset = splits["validation"]
+    test_dataset = splits["test"]
 
     # Define métricas
     def compute_metrics(pred):
@@ -82,7 +67,7 @@ def train_binario(dados, output_dir="./models/binario"):
     )
 
     # Inicializa o modelo
-    model = AutoModelForSequenceClassification.from_pretrained("distilbert-base-multilingual-cased", num_labels=2)
+    model = AutoModelForSequenceClassification.from_pretrained(BASE_MODEL, num_labels=2)
     
     # Inicializa o trainer
     trainer = Trainer(
@@ -90,6 +75,7 @@ def train_binario(dados, output_dir="./models/binario"):
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        data_collator=DataCollatorWithPadding(tokenizer),
         compute_metrics=compute_metrics
     )
     
@@ -0,0 +1,85 @@
+# Preparação dos dados de treino compartilhada por train_binario.py e train_multiclasse.py: rótulos, balanceamento,
+# tokenização e divisão treino/validação/teste são feitos uma vez e salvos em disco (Arrow) para as próximas execuções.
+import hashlib
+import inspect
+import json
+import os
+import shutil
+from functools import partial
+from src.models import rules
+
+# Modelo base dos dois treinos (tokenizer e pesos iniciais)
+BASE_MODEL = "distilbert-base-multilingual-cased"
+MAX_LENGTH = 128
+# Datasets já tokenizados, um diretório por chave (dados de entrada + regras de rotulagem + tokenizer + parâmetros)
+DATASET_DIR = "data/cache/datasets"
+# Divisão: 70% treino, 15% validação e 15% teste, sempre com a mesma semente
+TEST_SIZE = 0.3
+SEED = 42
+# Tokenização em vários processos só compensa em corpora grandes (subir os processos tem custo fixo)
+NUM_PROC = os.cpu_count() or 1
+PARALLEL_MIN_ROWS = 50_000
+
+
+def tokenizer_fingerprint(tokenizer): # Identifica o tokenizer pelo conteúdo (vocabulário e configuração), não pelo nome.
+    # Não usa o estado interno do objeto: chamar o tokenizer com truncation altera esse estado e mudaria a chave
+    config = {k: v for k, v in tokenizer.init_kwargs.items() if isinstance(v, (str, int, float, bool, type(None)))}
+    digest = hashlib.sha256(type(tokenizer).__name__.encode("utf-8"))
+    digest.update(json.dumps(sorted(tokenizer.get_vocab().items()), ensure_ascii=False).encode("utf-8"))
+    digest.update(json.dumps([tokenizer.special_tokens_map, config], sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def rules_fingerprint(): # Identifica as regras de rotulagem (src/models/rules.py) pelo código: os rótulos são gerados por elas dentro do balance.
+    return hashlib.sha256(inspect.getsource(rules).encode("utf-8")).hexdigest()
+
+def dataset_key(nome, dados, tokenizer, params): # Hash dos textos de entrada, das regras de rotulagem, do tokenizer e dos parâmetros de balanceamento/divisão.
+    digest = hashlib.sha256(nome.encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    digest.update(rules_fingerprint().encode("utf-8"))
+    digest.update(tokenizer_fingerprint(tokenizer).encode("utf-8"))
+    for d in dados:
+        digest.update(str(d.get("texto", "")).encode("utf-8") + b"\x00")
+    return digest.hexdigest()[:16]
+
+def prepare_dataset(nome, dados, balance, tokenizer, params=None, max_length=MAX_LENGTH, num_proc=NUM_PROC, dataset_dir=DATASET_DIR): # Retorna o DatasetDict (train/validation/test) tokenizado, reaproveitando o salvo em disco quando a chave é a mesma.
+    # balance: recebe `dados` e devolve a lista balanceada de {"texto", "label"}; só roda quando o dataset não está salvo
+    # params: parâmetros do balanceamento que mudam o resultado (entram na chave)
+    from datasets import Dataset, DatasetDict, load_from_disk
+
+    params = dict(params or {}, max_length=max_length, test_size=TEST_SIZE, seed=SEED)
+    caminho = os.path.join(dataset_dir, f"{nome}_{dataset_key(nome, dados, tokenizer, params)}")
+    if os.path.exists(caminho):
+        splits = load_from_disk(caminho)
+        print(f"Dataset {nome} reaproveitado de {caminho}: " + ", ".join(f"{k}={len(v)}" for k, v in splits.items()))
+        return _torch_format(splits)
+
+    dados_balanceados = balance(dados)
+    print(f"Total de dados {nome} balanceados: {len(dados_balanceados)}")
+
+    # Sem padding aqui: o DataCollatorWithPadding do Trainer preenche cada lote só até o maior texto dele
+    dataset = Dataset.from_list(dados_balanceados).map(
+        partial(_tokenize, tokenizer=tokenizer, max_length=max_length),
+        batched=True,
+        num_proc=num_proc if num_proc > 1 and len(dados_balanceados) >= PARALLEL_MIN_ROWS else None,
+        remove_columns=["texto"],
+    )
+    dataset = dataset.rename_column("label", "labels")
+
+    # Divide em treino, validação e teste
+    dataset_split = dataset.train_test_split(test_size=TEST_SIZE, seed=SEED)
+    dataset_test_val = dataset_split["test"].train_test_split(test_size=0.5, seed=SEED)
+    splits = DatasetDict(train=dataset_split["train"], validation=dataset_test_val["train"], test=dataset_test_val["test"])
+
+    # Grava em um diretório temporário e renomeia, para que uma execução interrompida não deixe um dataset pela metade
+    temporario = caminho + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    splits.save_to_disk(temporario)
+    os.replace(temporario, caminho)
+    return _torch_format(splits)
+
+def _tokenize(examples, tokenizer, max_length):
+    return tokenizer(examples["texto"], truncation=True, max_length=max_length)
+
+def _torch_format(splits):
+    splits.set_format("torch", columns=["input_ids", "attention_mask", "labels"])
+    return splits
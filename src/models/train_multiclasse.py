@@ -1,85 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import hashlib
+import json
 import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments, pipeline
-from datasets import Dataset
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments, DataCollatorWithPadding
 from sklearn.metrics import accuracy_score, f1_score
 from sklearn.utils import resample
 from collections import Counter
-from nlpaug.augmenter.word import SynonymAug
 import warnings
+from src.models.classifier import ExamClassifier, classifier_version
+from src.models.predict import predict_binary_batch
+from src.models.augment import augment_texts
+from src.models.rules import classificar_exame
+from src.models.train_data import BASE_MODEL, prepare_dataset
 
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-def classificar_exame(texto): # Classifica o tipo de exame de imagem com base no texto.
-    texto_lower = texto.lower()
-    if "tomografia" in texto_lower or "tc" in texto_lower or "ct" in texto_lower:
-        return "Tomografia"
-    elif "ressonância magnética" in texto_lower or "rnm" in texto_lower or "rm" in texto_lower or "mri" in texto_lower:
-        return "Ressonância Magnética"
-    elif "ultrassom" in texto_lower or "us" in texto_lower or "ecografia" in texto_lower or "usg" in texto_lower:
-        return "Ultrassonografia"
-    elif "radiografia" in texto_lower or "rx" in texto_lower or "raio x" in texto_lower:
-        return "Radiografia"
-    elif "eletrocardiograma" in texto_lower or "ecg" in texto_lower:
-        return "Eletrocardiograma"
-    elif "densitometria" in texto_lower:
-        return "Densiotometria"
-    return None
-
-def filter_exames(dados): # Filtra os dados usando o modelo binário treinado, retornando apenas os textos classificados como exames (label=1).
-    # Carrega o modelo binário treinado
-    tokenizer = AutoTokenizer.from_pretrained("./models/config")
-    classifier_binario = pipeline(
-        "text-classification",
-        model="./models/binario/modelo_binario",
-        tokenizer=tokenizer,
-        truncation=True,
-        max_length=128,
-        padding="max_length"
-    )
+# Conjunto filtrado pelo modelo binário salvo por versão do modelo e conteúdo dos dados; retreinar o multiclasse
+# com os mesmos dados e o mesmo modelo binário não roda a filtragem de novo
+FILTERED_DIR = "data/cache/treino"
+PERSIST_FILTERED = True
+# Parâmetros do balanceamento (entram na chave do dataset salvo; "aumento" identifica a estratégia de aumento de dados)
+BALANCE_PARAMS = {"min_samples": 75, "aug_p": 0.3, "random_state": 42, "aumento": "ate_min_samples"}
+
+def texto_treino(d): # Usa "DS_RECEITA" ou "texto" como chave, com fallback para string vazia
+    texto = d.get("DS_RECEITA", d.get("texto", ""))
+    if pd.isna(texto):
+        texto = ""
+    return str(texto)
+
+def filtered_path(textos, versao, filtered_dir=FILTERED_DIR): # Arquivo do conjunto filtrado para estes textos e esta versão do modelo binário.
+    digest = hashlib.sha256(versao.encode("utf-8"))
+    for texto in textos:
+        digest.update(texto.encode("utf-8") + b"\x00")
+    return os.path.join(filtered_dir, f"filtrados_{digest.hexdigest()[:16]}.json")
+
+def filter_exames(dados, batch_size=None, use_cache=True, persist=PERSIST_FILTERED, filtered_dir=FILTERED_DIR): # Filtra os dados usando o modelo binário treinado, retornando apenas os textos classificados como exames (label=1).
+    textos = [texto_treino(d) for d in dados]
+
+    # Reaproveita o conjunto já filtrado com a mesma versão do modelo binário
+    caminho = filtered_path(textos, classifier_version(multiclasse_dir=None), filtered_dir)
+    if persist and os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as f:
+            dados_filtrados = [{"texto": texto} for texto in json.load(f)]
+        print(f"Total de textos classificados como exames de imagem: {len(dados_filtrados)} (conjunto salvo em {caminho})")
+        return dados_filtrados
+
+    # Carrega só o modelo binário (o multiclasse ainda não existe no primeiro treino) e classifica em lotes,
+    # pelo mesmo caminho de inferência e cache de previsões do pipeline
+    classifier = ExamClassifier(multiclasse_dir=None)
+    is_exame = predict_binary_batch(textos, batch_size=batch_size, classifier=classifier, use_cache=use_cache)
+    dados_filtrados = [{"texto": texto} for texto, exame in zip(textos, is_exame) if exame]
+
+    if persist:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump([d["texto"] for d in dados_filtrados], f, ensure_ascii=False)
 
-    # Filtra os dados
-    dados_filtrados = []
-    for d in dados:
-        # Usa "DS_RECEITA" ou "texto" como chave, com fallback para string vazia
-        texto = d.get("DS_RECEITA", d.get("texto", ""))
-        if pd.isna(texto):
-            texto = ""
-        texto = str(texto)
-        
-        # Faz a previsão com o modelo binário
-        pred_binaria = classifier_binario(texto)[0]
-        if pred_binaria["label"] == "LABEL_1":  # Apenas exames de imagem
-            dados_filtrados.append({"texto": texto})
-    
     print(f"Total de textos classificados como exames de imagem: {len(dados_filtrados)}")
     return dados_filtrados
 
 def balance_multiclasse(dados): # Faz o balanceamento dos dados multiclasse para evitar viés no modelo.  
-    # Classifica os textos filtrados
-    dados_multiclasse = [
-        {"texto": d["texto"], "label": classificar_exame(d["texto"])}
-        for d in dados if classificar_exame(d["texto"]) is not None
-    ]
+    # Classifica os textos filtrados (uma chamada de classificar_exame por texto)
+    dados_multiclasse = []
+    for d in dados:
+        label = classificar_exame(d["texto"])
+        if label is not None:
+            dados_multiclasse.append({"texto": d["texto"], "label": label})
     
     # Verifica a distribuição das classes
     contagem = Counter([d["label"] for d in dados_multiclasse])
     print("Distribuição das classes antes do balanceamento:", contagem)
     
-    # Aumenta dados se necessário
-    min_samples = 75
-    aug = SynonymAug(aug_p=0.3)
-    for d in dados_multiclasse.copy():
-        if contagem[d["label"]] < min_samples:
-            texto_aumentado = aug.augment(d["texto"])[0]
-            dados_multiclasse.append({"texto": texto_aumentado, "label": d["label"]})
-    
+    # Agrupa por classe, na ordem em que as classes aparecem (a ordem do resultado não depende do hash das strings)
+    por_classe = {}
+    for d in dados_multiclasse:
+        por_classe.setdefault(d["label"], []).append(d)
+
+    # Aumenta dados se necessário: só o que falta para a classe chegar a min_samples (no máximo um texto aumentado
+    # por texto original), com os textos de todas as classes aumentados juntos no pool de processos
+    min_samples = BALANCE_PARAMS["min_samples"]
+    originais = []
+    for label, dados_classe in por_classe.items():
+        if len(dados_classe) < min_samples:
+            originais.extend(dados_classe[:min_samples - len(dados_classe)])
+    aumentados = augment_texts([d["texto"] for d in originais], BALANCE_PARAMS["aug_p"], seed=BALANCE_PARAMS["random_state"])
+    for d, texto_aumentado in zip(originais, aumentados):
+        por_classe[d["label"]].append({"texto": texto_aumentado, "label": d["label"]})
+
     # Balanceia as classes usando oversampling
     balanced = []
-    for label in set([d["label"] for d in dados_multiclasse]):
-        dados_classe = [d for d in dados_multiclasse if d["label"] == label]
+    for label, dados_classe in por_classe.items():
         if len(dados_classe) < min_samples:
-            dados_classe = resample(dados_classe, replace=True, n_samples=min_samples, random_state=42)
+            dados_classe = resample(dados_classe, replace=True, n_samples=min_samples, random_state=BALANCE_PARAMS["random_state"])
         balanced.extend(dados_classe)
     
     # Mapeia os labels para números
@@ -103,25 +119,13 @@ def train_multiclasse(dados, output_dir="./models/multiclasse"): # Treina o mode
         raise ValueError("Nenhum texto foi classificado como exame de imagem pelo modelo binário.")
 
     # Carrega o tokenizer
-    tokenizer = AutoTokenizer.from_pretrained("distilbert-base-multilingual-cased")
-    
-    # Balanceia os dados
-    dados_balanceados = balance_multiclasse(dados_filtrados)
-
-    # Prepara o dataset
-    def preprocess_function(examples):
-        return tokenizer(examples["texto"], truncation=True, padding=True, max_length=128)
-
-    dataset = Dataset.from_list(dados_balanceados).map(preprocess_function, batched=True)
-    dataset = dataset.rename_column("label", "labels")
-    dataset.set_format("torch", columns=["input_ids", "attention_mask", "labels"])
+    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL)
 
-    # Divide em treino, validação e teste
-    dataset_split = dataset.train_test_split(test_size=0.3)
-    dataset_test_val = dataset_split["test"].train_test_split(test_size=0.5)
-    train_dataset = dataset_split["train"]
-    val_dataset = dataset_test_val["train"]
-    test_dataset = dataset_test_val["test"]
+    # Balanceia, tokeniza e divide em treino, validação e teste; reaproveita o dataset salvo se nada mudou
+    splits = prepare_dataset("multiclasse", dados_filtrados, balance_multiclasse, tokenizer, BALANCE_PARAMS)
+    train_dataset = splits["train"]
+    val_dataset = splits["validation"]
+    test_dataset = splits["test"]
 
     # Define métricas de avaliação
     def compute_metrics(pred):
@@ -147,12 +151,13 @@ def train_multiclasse(dados, output_dir="./models/multiclasse"): # Treina o mode
     )
 
     # Carrega e treina o modelo
-    model = AutoModelForSequenceClassification.from_pretrained("distilbert-base-multilingual-cased", num_labels=6)
+    model = AutoModelForSequenceClassification.from_pretrained(BASE_MODEL, num_labels=6)
     trainer = Trainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        data_collator=DataCollatorWithPadding(tokenizer),
         compute_metrics=compute_metrics
     )
     trainer.train()
@@ -0,0 +1,280 @@
+# Instrumentação do pipeline: tempo, itens, itens/s e memória de cada etapa, latências (lotes de inferência, envios) e
+# contadores (cache de previsões, linhas por etapa). Cada etapa concluída vira uma linha em METRICS_JSONL e, ao fim da
+# execução, o resumo é gravado em METRICS_PROM no formato texto do Prometheus (exposto pelo monitor.py em /metrics ou
+# lido pelo textfile collector do node_exporter).
+# Só usa a biblioteca padrão para não pesar na importação do main.py, monitor.py e server.py.
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import threading
+import json
+import time
+import os
+
+METRICS_DIR = "data/metrics"
+METRICS_JSONL = os.path.join(METRICS_DIR, "pipeline.jsonl")
+METRICS_PROM = os.path.join(METRICS_DIR, "pipeline.prom")
+# Prefixo dos nomes no Prometheus
+PROM_PREFIX = "pipeline_"
+# Observações guardadas por métrica para os percentis (as mais recentes); contagem e soma valem para todas
+MAX_OBSERVATIONS = 10_000
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def peak_rss_bytes(): # Pico de memória residente do processo até agora (None onde não há o módulo resource, ex.: Windows).
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB e macOS em bytes
+    return pico if os.uname().sysname == "Darwin" else pico * 1024
+
+def quantile(valores, q): # Percentil por interpolação linear (mesmo resultado do np.percentile).
+    ordenados = sorted(valores)
+    pos = (len(ordenados) - 1) * q
+    base = int(pos)
+    topo = min(base + 1, len(ordenados) - 1)
+    return ordenados[base] + (ordenados[topo] - ordenados[base]) * (pos - base)
+
+
+class Stage: # Etapa em andamento; quem a executa informa os itens processados em `itens`.
+
+    def __init__(self, nome, itens):
+        self.nome = nome
+        self.itens = itens
+
+
+class PipelineMetrics: # Coletor de uma execução do pipeline; thread-safe. Sem jsonl_path/prom_path só acumula em memória.
+
+    def __init__(self, jsonl_path=None, prom_path=None, profile=None, profile_dir=METRICS_DIR):
+        # profile: etapas executadas sob o cProfile (lista vazia = todas); cada uma gera <profile_dir>/perfil_<etapa>_<execução>.prof
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.inicio = time.time()
+        self.lock = threading.Lock()
+        self.stages = defaultdict(lambda: {"chamadas": 0, "segundos": 0.0, "itens": 0})
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.observations = defaultdict(lambda: {"contagem": 0, "soma": 0.0, "valores": deque(maxlen=MAX_OBSERVATIONS)})
+        self._profiling = False
+
+    @contextmanager
+    def stage(self, nome, itens=None): # Mede o bloco como a etapa `nome`; as etapas podem ser aninhadas.
+        etapa = Stage(nome, itens)
+        profiler = self._start_profile(nome)
+        inicio_ts = time.time()
+        inicio = time.perf_counter()
+        try:
+            yield etapa
+        finally:
+            segundos = time.perf_counter() - inicio
+            if profiler is not None:
+                self._stop_profile(profiler, nome)
+            self._finish_stage(etapa, inicio_ts, segundos)
+
+    def _finish_stage(self, etapa, inicio_ts, segundos):
+        with self.lock:
+            total = self.stages[etapa.nome]
+            total["chamadas"] += 1
+            total["segundos"] += segundos
+            total["itens"] += etapa.itens or 0
+        # Início e fim em horário de parede e o pid permitem alinhar as etapas com amostras externas (ex.: py-spy record --pid)
+        self._emit({
+            "evento": "etapa",
+            "etapa": etapa.nome,
+            "inicio": round(inicio_ts, 3),
+            "fim": round(inicio_ts + segundos, 3),
+            "segundos": round(segundos, 4),
+            "itens": etapa.itens,
+            "itens_por_segundo": round(etapa.itens / segundos, 1) if etapa.itens and segundos > 0 else None,
+            "rss_pico_bytes": peak_rss_bytes(),
+        })
+
+    def _start_profile(self, nome):
+        # Um único cProfile por vez: dentro de uma etapa já perfilada as etapas internas entram no mesmo perfil
+        if self.profile is None or (self.profile and nome not in self.profile):
+            return None
+        with self.lock:
+            if self._profiling:
+                return None
+            self._profiling = True
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profile(self, profiler, nome):
+        profiler.disable()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        caminho = os.path.join(self.profile_dir, f"perfil_{nome}_{self.run_id}.prof")
+        profiler.dump_stats(caminho)
+        with self.lock:
+            self._profiling = False
+        print(f"Perfil da etapa {nome} gravado em {caminho} (python -m pstats {caminho})")
+
+    def observe(self, nome, valor): # Registra uma medida (ex.: latência de um lote, em segundos) para contagem, soma e percentis.
+        with self.lock:
+            obs = self.observations[nome]
+            obs["contagem"] += 1
+            obs["soma"] += valor
+            obs["valores"].append(valor)
+
+    def count(self, nome, valor=1, **labels): # Soma `valor` ao contador `nome` (com labels opcionais, ex.: etapa="cache").
+        with self.lock:
+            self.counters[(nome, tuple(sorted(labels.items())))] += valor
+
+    def gauge(self, nome, valor, **labels): # Define o valor atual de `nome`.
+        with self.lock:
+            self.gauges[(nome, tuple(sorted(labels.items())))] = valor
+
+    def summary(self): # Resumo da execução até agora.
+        with self.lock:
+            etapas = {
+                nome: dict(total, itens_por_segundo=round(total["itens"] / total["segundos"], 1) if total["itens"] and total["segundos"] > 0 else None)
+                for nome, total in self.stages.items()
+            }
+            observacoes = {}
+            for nome, obs in self.observations.items():
+                observacoes[nome] = {"contagem": obs["contagem"], "soma": obs["soma"]}
+                if obs["valores"]:
+                    observacoes[nome].update({f"p{int(q * 100)}": quantile(obs["valores"], q) for q in QUANTILES})
+                    observacoes[nome]["max"] = max(obs["valores"])
+            return {
+                "execucao": self.run_id,
+                "segundos": round(time.time() - self.inicio, 4),
+                "rss_pico_bytes": peak_rss_bytes(),
+                "etapas": etapas,
+                "observacoes": observacoes,
+                "contadores": {_label_key(nome, labels): valor for (nome, labels), valor in self.counters.items()},
+                "medidas": {_label_key(nome, labels): valor for (nome, labels), valor in self.gauges.items()},
+            }
+
+    def finish(self): # Grava o resumo da execução no JSONL e no arquivo do Prometheus; retorna o resumo.
+        resumo = self.summary()
+        self._emit(dict({"evento": "resumo"}, **resumo))
+        if self.prom_path:
+            # Gravação atômica: quem lê o arquivo (monitor.py, node_exporter) nunca vê uma versão pela metade
+            _ensure_dir(self.prom_path)
+            tmp = f"{self.prom_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus(resumo))
+            os.replace(tmp, self.prom_path)
+        return resumo
+
+    def to_prometheus(self, resumo=None): # Resumo no formato texto de exposição do Prometheus.
+        resumo = resumo or self.summary()
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, amostras):
+            linhas.append(f"# HELP {PROM_PREFIX}{nome} {ajuda}")
+            linhas.append(f"# TYPE {PROM_PREFIX}{nome} {tipo}")
+            for sufixo, labels, valor in amostras:
+                linhas.append(f"{PROM_PREFIX}{nome}{sufixo}{_prom_labels(labels)} {_prom_value(valor)}")
+
+        metrica("ultima_execucao_timestamp_seconds", "gauge", "Fim da última execução (epoch).", [("", (), time.time())])
+        metrica("execucao_seconds", "gauge", "Duração da última execução.", [("", (), resumo["segundos"])])
+        if resumo["rss_pico_bytes"] is not None:
+            metrica("rss_pico_bytes", "gauge", "Pico de memória residente do processo.", [("", (), resumo["rss_pico_bytes"])])
+
+        etapas = resumo["etapas"]
+        metrica("etapa_seconds", "gauge", "Tempo total de cada etapa na última execução.", [("", (("etapa", n),), e["segundos"]) for n, e in etapas.items()])
+        metrica("etapa_itens", "gauge", "Itens processados por etapa na última execução.", [("", (("etapa", n),), e["itens"]) for n, e in etapas.items()])
+        metrica("etapa_chamadas", "gauge", "Chamadas de cada etapa na última execução.", [("", (("etapa", n),), e["chamadas"]) for n, e in etapas.items()])
+        metrica("etapa_itens_por_segundo", "gauge", "Vazão de cada etapa na última execução.",
+                [("", (("etapa", n),), e["itens_por_segundo"]) for n, e in etapas.items() if e["itens_por_segundo"] is not None])
+
+        for nome, obs in resumo["observacoes"].items():
+            amostras = [("", (("quantile", str(q)),), obs[f"p{int(q * 100)}"]) for q in QUANTILES if f"p{int(q * 100)}" in obs]
+            metrica(nome, "summary", f"Distribuição de {nome} na última execução.", amostras + [("_sum", (), obs["soma"]), ("_count", (), obs["contagem"])])
+
+        # Contadores e medidas valem para a execução (o arquivo é regravado a cada uma), por isso são expostos como gauge
+        por_nome = defaultdict(list)
+        with self.lock:
+            for (nome, labels), valor in sorted(self.counters.items()) + sorted(self.gauges.items()):
+                por_nome[nome].append(("", labels, valor))
+        for nome, amostras in por_nome.items():
+            metrica(nome, "gauge", f"{nome} na última execução.", amostras)
+        return "\n".join(linhas) + "\n"
+
+    def _emit(self, registro):
+        if not self.jsonl_path:
+            return
+        registro = dict({"execucao": self.run_id, "pid": os.getpid()}, **registro)
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self.lock:
+            _ensure_dir(self.jsonl_path)
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(linha)
+
+
+def _ensure_dir(path):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+def _label_key(nome, labels): # "nome" ou "nome{a=b}" para o resumo em JSON.
+    return nome + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    escapar = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in labels) + "}"
+
+def _prom_value(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def serve_metrics(port, path=METRICS_PROM, host="0.0.0.0"): # Expõe o arquivo do Prometheus em http://host:port/metrics em uma thread; retorna o servidor.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            try:
+                with open(path, "rb") as f:
+                    dados = f.read()
+            except FileNotFoundError:
+                dados = b""  # nenhuma execução concluída ainda
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Coletor da execução corrente no processo
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics(): # Retorna o coletor corrente; fora de uma execução (start_run) as medidas ficam só em memória.
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = PipelineMetrics()
+    return _metrics
+
+def start_run(jsonl_path=METRICS_JSONL, prom_path=METRICS_PROM, profile=None): # Inicia uma nova execução com exportação para os arquivos.
+    global _metrics
+    with _metrics_lock:
+        _metrics = PipelineMetrics(jsonl_path, prom_path, profile)
+    return _metrics
+
+def finish_run(): # Exporta o resumo da execução corrente e volta a só acumular em memória.
+    global _metrics
+    with _metrics_lock:
+        metrics, _metrics = _metrics, None
+    return metrics.finish() if metrics is not None else None
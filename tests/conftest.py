@@ -0,0 +1,26 @@
+# Permite importar o pacote src/ rodando o pytest a partir de qualquer pasta
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def raiz_do_repositorio(monkeypatch): # Os caminhos padrão (ex.: data/tuss/catalogo_tuss.csv) são relativos à raiz do repositório.
+    monkeypatch.chdir(RAIZ)
+
+
+@pytest.fixture
+def pedidos(): # Gera linhas no formato de data/raw/, com os solicitantes dados em ciclo e as colunas extras informadas.
+    def gerar(inicio, linhas, solicitantes, **colunas):
+        return pd.DataFrame(dict({
+            "ID": range(inicio, inicio + linhas),
+            "DATA": "2024-01-02",
+            "TEL": [f"0119{i:07d}" for i in range(inicio, inicio + linhas)],
+            "CPF": [f"{i:011d}" for i in range(inicio, inicio + linhas)],
+            "SOLICITANTE": [solicitantes[i % len(solicitantes)] for i in range(linhas)],
+        }, **colunas))
+    return gerar
@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+import src.data.process_data as process_data_module
+from src.cloud.handler import handle_object, output_name
+from src.cloud.storage import LocalStorage
+from src.models.rules import NAO_EXAME
+
+
+@pytest.mark.parametrize("colunas", [
+    {"CD_TUSS": 40808041, "DS_RECEITA": "raio-x"},  # estruturado: mapeado pelo catálogo TUSS
+    {"DS_RECEITA": "texto"},  # não estruturado: passa pelos modelos
+])
+def test_handler_com_categorias_crescendo_entre_blocos(tmp_path, monkeypatch, pedidos, colunas):
+    # Sem os modelos: toda linha do não estruturado vira NAO_EXAME
+    monkeypatch.setattr(process_data_module, "predict_exam_batch", lambda textos, **kwargs: [NAO_EXAME] * len(textos))
+    storage = LocalStorage(str(tmp_path))
+    solicitantes = ["Dr. A"] + [f"Dr. {i}" for i in range(300)]
+    entrada = pd.concat([pedidos(0, 500, solicitantes[:1], **colunas), pedidos(500, 1500, solicitantes[1:], **colunas)])
+    with storage.open_write("bucket", "raw/lote.csv") as f:
+        entrada.to_csv(f, index=False)
+
+    resultado = handle_object(storage, "bucket", "raw/lote.csv", send=False, chunksize=500, use_cache=False)
+
+    assert resultado["linhas"] == 2000
+    saida = pd.read_parquet(storage.path("bucket", output_name("raw/lote.csv")))
+    assert saida["ID"].tolist() == entrada["ID"].tolist()
+    assert saida["SOLICITANTE"].nunique() == len(solicitantes)
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from src.data.storage import apply_schema
+from src.messaging.generate_messages import generate_messages
+from src.messaging.send_log import SendLogWriter, connect, sent_keys
+
+
+def test_linha_sem_telefone_nao_gera_mensagem_nem_perde_o_lote(tmp_path):
+    db_path = str(tmp_path / "envios.db")
+    # No Parquet o TEL é uma coluna string anulável: o telefone ausente chega como pd.NA
+    df = apply_schema(pd.DataFrame({
+        "ID": [1, 2],
+        "TEL": ["011999990001", None],
+        "SOLICITANTE": ["Dr. A", "Dr. B"],
+        "exame_resultado": ["Tomografia", "Tomografia"],
+    }))
+    assert df["TEL"].isna().tolist() == [False, True]
+
+    mensagens = generate_messages(df, db_path=db_path)
+    assert [msg["telefone"] for msg in mensagens] == ["011999990001"]
+
+    # Um valor que o sqlite3 não sabe gravar não derruba os demais registros do lote
+    writer = SendLogWriter(db_path, flush_rows=500, flush_interval=60)
+    exame, id_exame = mensagens[0]["chaves"][0]
+    writer.log(mensagens[0]["telefone"], mensagens[0]["mensagem"], "Sucesso", exame=exame, id_exame=id_exame)
+    writer.log(pd.NA, "sem telefone", "Falha", exame="Tomografia", id_exame="2")
+    writer.close()
+
+    assert writer.gravados == 2
+    conn = connect(db_path)
+    try:
+        assert conn.execute("SELECT telefone FROM envios ORDER BY id").fetchall() == [("011999990001",), (None,)]
+    finally:
+        conn.close()
+    assert sent_keys(db_path) == {("011999990001", "Tomografia", "1")}
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import src.models.predict as predict_module
+from src.models.cache import PredictionCache, make_key
+from src.models.classifier import LABEL_MAP, NAO_EXAME
+from src.models.predict import binary_label_array, multiclass_label_array, merge_predictions, predict_exam_batch, RESULT_VERSION
+
+
+def reference_merge(pred_binarias, pred_multiclasses): # Referência linha a linha: cada exame consome a próxima previsão multiclasse.
+    multiclasses = iter(pred_multiclasses)
+    return [
+        LABEL_MAP[int(next(multiclasses)["label"].split("_")[1])] if pred["label"] == "LABEL_1" else NAO_EXAME
+        for pred in pred_binarias
+    ]
+
+
+class FakeClassifier: # Classificador sem modelos: "exame" no texto é LABEL_1 e a classe vem do comprimento do texto.
+    version = "fake"
+
+    def __init__(self):
+        self.vistos = []
+
+    def predict_binario(self, textos, batch_size=None, progress=None):
+        self.vistos.extend(textos)
+        return [{"label": "LABEL_1" if "exame" in texto else "LABEL_0", "score": 0.9} for texto in textos]
+
+    def predict_multiclasse(self, textos, batch_size=None, progress=None):
+        return [{"label": f"LABEL_{len(texto) % len(LABEL_MAP)}", "score": 0.9} for texto in textos]
+
+    def per_row(self, texto): # Resultado esperado de um texto que chega aos modelos.
+        return LABEL_MAP[len(texto) % len(LABEL_MAP)] if "exame" in texto else NAO_EXAME
+
+
+def test_merge_predictions_igual_a_referencia():
+    rng = np.random.default_rng(0)
+    is_exame = rng.random(200) < 0.4
+    pred_b = [{"label": "LABEL_1" if e else "LABEL_0"} for e in is_exame]
+    pred_m = [{"label": f"LABEL_{i}"} for i in rng.integers(0, len(LABEL_MAP), int(is_exame.sum()))]
+    montado = merge_predictions(binary_label_array(pred_b), multiclass_label_array(pred_m)).tolist()
+    assert montado == reference_merge(pred_b, pred_m)
+    # Casos extremos: nenhuma linha e nenhum exame
+    assert merge_predictions(np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64)).tolist() == []
+    assert merge_predictions(np.zeros(3, dtype=bool), np.zeros(0, dtype=np.int64)).tolist() == [NAO_EXAME] * 3
+
+
+def test_predict_exam_batch_com_prefiltro_repetidos_e_cache(tmp_path, monkeypatch):
+    cache = PredictionCache(str(tmp_path / "predicoes.db"))
+    monkeypatch.setattr(predict_module, "get_prediction_cache", lambda: cache)
+    classifier = FakeClassifier()
+
+    # Acerto de cache com um valor que o modelo não daria, para distinguir as duas origens
+    em_cache = "exame em cache"
+    cache.put_many({make_key(em_cache, f"{classifier.version}:{RESULT_VERSION}"): "Radiografia"})
+
+    textos = [
+        "exame de tomografia",
+        "",                            # vazio: resolvido pelo pré-filtro
+        "exame de tomografia",         # repetido na mesma execução
+        "uso oral exame de rotina",    # termo de exclusão: resolvido pelo pré-filtro
+        em_cache,
+        "receita sem imagem",
+        None,                          # não é string: vira texto vazio
+        "exame  de tomografia",        # só difere nos espaços: mesma chave do cache
+        em_cache,
+        "exame ultrassom abdome",
+    ]
+    resultado = predict_exam_batch(textos, classifier=classifier, use_cache=True, use_prefilter=True)
+
+    prefiltrados = {1, 3, 6}
+    esperado = []
+    for idx, texto in enumerate(textos):
+        if idx in prefiltrados:
+            esperado.append(NAO_EXAME)
+        elif texto == em_cache:
+            esperado.append("Radiografia")
+        else:
+            esperado.append(classifier.per_row(" ".join(texto.split())))
+    assert resultado == esperado
+    # Cada texto pendente chega aos modelos uma única vez; prefiltrados e acertos de cache não chegam
+    assert sorted(classifier.vistos) == sorted(["exame de tomografia", "receita sem imagem", "exame ultrassom abdome"])
+
+    # Segunda execução: tudo vem do cache, sem chamar os modelos
+    classifier.vistos.clear()
+    assert predict_exam_batch(textos, classifier=classifier, use_cache=True, use_prefilter=True) == esperado
+    assert classifier.vistos == []
+    cache.close()
+
+
+def test_classifier_explicito_com_workers_e_rejeitado():
+    # Os workers carregariam os modelos padrão e o cache gravaria o resultado sob a versão do classifier passado
+    with pytest.raises(ValueError):
+        predict_exam_batch(["exame de tomografia"], classifier=FakeClassifier(), workers=2)
@@ -0,0 +1,33 @@
+import pandas as pd
+
+import src.data.process_data as process_data_module
+from src.data.aggregates import AGGREGATE_NAME
+from src.data.storage import read_processed
+from src.models.rules import NAO_EXAME
+
+
+def test_arquivo_do_monitor_entra_no_resultado_e_no_agregado(tmp_path, monkeypatch, pedidos):
+    # Sem os modelos: toda linha do não estruturado vira NAO_EXAME
+    monkeypatch.setattr(process_data_module, "predict_exam_batch", lambda textos, **kwargs: [NAO_EXAME] * len(textos))
+    saida = tmp_path / "processed"
+    saida.mkdir()
+
+    # Saídas de uma execução anterior do pipeline
+    estruturado = process_data_module.process_estruturado(pedidos(0, 10, ["Dr. A"], CD_TUSS=40808041, DS_RECEITA="raio-x"))
+    nao_estruturado = process_data_module.process_nao_estruturado(pedidos(100, 10, ["Dr. B"], DS_RECEITA="texto"), use_cache=False)
+    process_data_module.merge_processed("estruturado", estruturado, saida)
+    process_data_module.merge_processed("nao_estruturado", nao_estruturado, saida)
+    process_data_module.write_combined({"estruturado": estruturado, "nao_estruturado": nao_estruturado}, saida)
+
+    # Arquivo novo detectado pelo monitor: 5 linhas já conhecidas (IDs 5 a 9, agora de outro solicitante) e 5 novas
+    arquivo = tmp_path / "lote.csv"
+    pedidos(5, 10, ["Dr. C"], CD_TUSS=40808041, DS_RECEITA="raio-x").to_csv(arquivo, index=False)
+    process_data_module.process_file(str(arquivo), output_dir=saida, use_cache=False)
+
+    assert len(read_processed("lote_processado", saida)) == 10
+    resultado = read_processed("resultado_processado", saida)
+    assert sorted(resultado["ID"].tolist()) == list(range(15)) + list(range(100, 110))
+    assert resultado.loc[resultado["ID"] == 7, "SOLICITANTE"].astype(str).tolist() == ["Dr. C"]
+    agregado = read_processed(AGGREGATE_NAME, saida)
+    por_solicitante = agregado.groupby(agregado["SOLICITANTE"].astype(str))["quantidade"].sum().to_dict()
+    assert por_solicitante == {"Dr. A": 5, "Dr. B": 10, "Dr. C": 10}
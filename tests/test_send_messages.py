@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import Counter
+
+from src.messaging.send_log import SendLogWriter, connect
+from src.messaging.send_messages import RateLimiter, TransientSendError, send_all_messages
+
+
+class StubTransport: # Transporte sem rede: falha com TransientSendError as primeiras `falhas[telefone]` vezes e registra cada tentativa.
+
+    def __init__(self, falhas=None):
+        self.falhas = dict(falhas or {})
+        self.tentativas = Counter()
+        self.instantes = []
+        self.lock = threading.Lock()
+
+    def __call__(self, telefone, mensagem):
+        with self.lock:
+            self.tentativas[telefone] += 1
+            self.instantes.append(time.monotonic())
+            if self.tentativas[telefone] <= self.falhas.get(telefone, 0):
+                raise TransientSendError("HTTP 429")
+
+
+def _mensagens(n):
+    return [{"telefone": f"+55119{idx:08d}", "mensagem": f"Mensagem {idx}", "chaves": [("Tomografia", str(idx))]} for idx in range(n)]
+
+def _envios(db_path): # {id_exame: (telefone, status)} gravados no histórico.
+    conn = connect(db_path)
+    try:
+        return {id_exame: (telefone, status) for telefone, status, id_exame in conn.execute("SELECT telefone, status, id_exame FROM envios")}
+    finally:
+        conn.close()
+
+
+def test_retentativas_em_erros_transitorios(tmp_path):
+    db_path = str(tmp_path / "envios.db")
+    mensagens = _mensagens(6)
+    # Telefone 1 se recupera na última retentativa; telefone 2 esgota as retentativas
+    transport = StubTransport({mensagens[1]["telefone"]: 3, mensagens[2]["telefone"]: 10})
+    send_log = SendLogWriter(db_path)
+    stats = send_all_messages(mensagens, transport=transport, workers=4, rate=None, max_retries=3, backoff_base=0.001, send_log=send_log)
+    send_log.close()
+
+    assert transport.tentativas[mensagens[1]["telefone"]] == 4
+    assert transport.tentativas[mensagens[2]["telefone"]] == 4
+    assert all(transport.tentativas[msg["telefone"]] == 1 for idx, msg in enumerate(mensagens) if idx not in (1, 2))
+    assert (stats["enviadas"], stats["falhas"]) == (5, 1)
+
+    # Cada registro corresponde à própria mensagem, qualquer que seja a ordem de conclusão das threads
+    envios = _envios(db_path)
+    assert set(envios) == {str(idx) for idx in range(6)}
+    for idx, msg in enumerate(mensagens):
+        telefone, status = envios[str(idx)]
+        assert telefone == msg["telefone"]
+        assert status.startswith("Falha") if idx == 2 else status == "Sucesso"
+    assert "HTTP 429" in envios["2"][1]
+
+
+def test_rate_limiter_limita_a_vazao():
+    limiter = RateLimiter(50, burst=1)
+    inicio = time.monotonic()
+    for _ in range(26):
+        limiter.acquire()
+    # O primeiro sai na hora; os 25 seguintes precisam de 25 / 50 = 0,5 s
+    assert time.monotonic() - inicio >= 0.45
+
+
+def test_send_all_messages_respeita_o_limite(tmp_path):
+    transport = StubTransport()
+    send_log = SendLogWriter(str(tmp_path / "envios.db"))
+    stats = send_all_messages(_mensagens(30), transport=transport, workers=8, rate=40, send_log=send_log)
+    send_log.close()
+
+    assert stats["enviadas"] == 30
+    # Com 8 threads e sem latência no transporte, só o limitador segura a vazão: 29 envios depois do primeiro a 40/s
+    assert stats["tempo"] >= 29 / 40 * 0.9
+    instantes = sorted(transport.instantes)
+    # Em qualquer janela de 0,5 s cabem no máximo 40 * 0,5 envios (+1 do balde)
+    assert max(sum(1 for t in instantes[i:] if t - inicio < 0.5) for i, inicio in enumerate(instantes)) <= 21
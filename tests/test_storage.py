@@ -0,0 +1,51 @@
+import pandas as pd
+
+import src.data.process_data as process_data_module
+from src.data.load_data import ESTRUTURADO_FILE, NAO_ESTRUTURADO_FILE
+from src.data.storage import ProcessedWriter, read_processed
+from src.models.rules import NAO_EXAME
+
+
+def test_writer_aceita_mais_categorias_nos_blocos_seguintes(tmp_path):
+    # O primeiro bloco cabe em índices int8; o segundo passa de 127 categorias
+    blocos = [
+        pd.DataFrame({"ID": [1, 2], "SOLICITANTE": ["Dr. A", "Dr. B"], "exame_resultado": [NAO_EXAME, NAO_EXAME]}),
+        pd.DataFrame({"ID": range(3, 303), "SOLICITANTE": [f"Dr. {i}" for i in range(300)], "exame_resultado": [f"exame {i % 150}" for i in range(300)]}),
+    ]
+    writer = ProcessedWriter("saida", output_dir=tmp_path)
+    for bloco in blocos:
+        writer.write(bloco.copy())
+    writer.close()
+
+    lido = read_processed("saida", tmp_path)
+    esperado = pd.concat(blocos, ignore_index=True)
+    assert len(lido) == len(esperado)
+    assert lido["SOLICITANTE"].astype(str).tolist() == esperado["SOLICITANTE"].tolist()
+    assert lido["exame_resultado"].astype(str).tolist() == esperado["exame_resultado"].tolist()
+
+
+def test_streaming_com_categorias_crescendo_entre_blocos(tmp_path, monkeypatch, pedidos):
+    # Sem os modelos: toda linha do não estruturado vira NAO_EXAME
+    monkeypatch.setattr(process_data_module, "predict_exam_batch", lambda textos, **kwargs: [NAO_EXAME] * len(textos))
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    poucos = ["Dr. A", "Dr. B"]
+    muitos = [f"Dr. {i}" for i in range(200)]
+    pd.concat([
+        pedidos(0, 1000, poucos, CD_TUSS=40808041, DS_RECEITA="raio-x"),
+        pedidos(1000, 1000, muitos, CD_TUSS=40808041, DS_RECEITA="raio-x"),
+    ]).to_csv(raw / ESTRUTURADO_FILE, index=False)
+    pd.concat([
+        pedidos(0, 1000, poucos, DS_RECEITA="texto"),
+        pedidos(1000, 1000, muitos, DS_RECEITA="texto"),
+    ]).to_csv(raw / NAO_ESTRUTURADO_FILE, index=False)
+
+    saida = tmp_path / "processed"
+    saida.mkdir()
+    total = process_data_module.process_data_streaming(data_dir=raw, output_dir=saida, chunksize=1000, use_cache=False, use_prefilter=False)
+
+    assert total == 4000
+    resultado = read_processed("resultado_processado", saida)
+    assert len(resultado) == 4000
+    assert resultado["SOLICITANTE"].nunique() == len(poucos) + len(muitos)
+
@@ -0,0 +1,24 @@
+import inspect
+
+import src.models.train_data as train_data_module
+from src.models import rules
+from src.models.train_data import dataset_key
+
+
+class FakeTokenizer: # Só o que tokenizer_fingerprint lê de um tokenizer do transformers.
+    init_kwargs = {"do_lower_case": False}
+    special_tokens_map = {"pad_token": "[PAD]"}
+
+    def get_vocab(self):
+        return {"[PAD]": 0, "exame": 1}
+
+
+def test_chave_do_dataset_muda_com_as_regras_de_rotulagem(monkeypatch):
+    dados = [{"texto": "rx de torax "}, {"texto": "uso oral"}]
+    chave = dataset_key("binario", dados, FakeTokenizer(), {"random_state": 42})
+    assert dataset_key("binario", dados, FakeTokenizer(), {"random_state": 42}) == chave
+
+    # Mesmos textos, tokenizer e parâmetros, mas regras editadas: os rótulos mudam, então a chave também
+    getsource = inspect.getsource
+    monkeypatch.setattr(train_data_module.inspect, "getsource", lambda obj: getsource(obj) + ('EXCLUSOES.append("raio ")\n' if obj is rules else ""))
+    assert dataset_key("binario", dados, FakeTokenizer(), {"random_state": 42}) != chave
@@ -0,0 +1,60 @@
+import time
+
+from src.data.watcher import FileQueue
+
+CSV = "ID,DATA,TEL,CPF,SOLICITANTE,DS_RECEITA\n"
+LINHA = "0,2020-02-15,1100000000,12345670000,João,RX DE TORAX PA E PERFIL\n"
+
+
+def _aguardar(file_queue, timeout=10):
+    limite = time.monotonic() + timeout
+    while not file_queue.idle():
+        assert time.monotonic() < limite, "A fila não esvaziou"
+        time.sleep(0.02)
+
+
+def _fila(state_path, chamadas):
+    file_queue = FileQueue(chamadas.append, state_path=state_path, debounce=0.2, poll_interval=0.05)
+    file_queue.start()
+    return file_queue
+
+
+def test_eventos_repetidos_processam_uma_vez_e_reinicio_nao_reprocessa(tmp_path):
+    state_path = str(tmp_path / "estado.db")
+    arquivo = tmp_path / "lote.csv"
+    chamadas = []
+
+    # Arquivo escrito em blocos, com um evento a cada bloco, todos dentro da janela de debounce
+    file_queue = _fila(state_path, chamadas)
+    with open(arquivo, "w", encoding="utf-8") as f:
+        f.write(CSV)
+        for _ in range(10):
+            f.write(LINHA)
+            f.flush()
+            file_queue.notify(str(arquivo))
+            time.sleep(0.01)
+    _aguardar(file_queue)
+    # Eventos atrasados do mesmo arquivo, sem mudança de conteúdo
+    for _ in range(5):
+        file_queue.notify(str(arquivo))
+    _aguardar(file_queue)
+    file_queue.stop()
+
+    assert chamadas == [str(arquivo)]
+    assert file_queue.contagens["processados"] == 1
+    assert file_queue.contagens["eventos"] == 15
+
+    # Reinício com o mesmo estado: o arquivo inalterado é ignorado pelo hash do conteúdo
+    file_queue = _fila(state_path, chamadas)
+    file_queue.notify(str(arquivo))
+    _aguardar(file_queue)
+    assert chamadas == [str(arquivo)]
+    assert file_queue.contagens["ignorados"] == 1
+
+    # Com o conteúdo alterado o arquivo volta a ser processado
+    with open(arquivo, "a", encoding="utf-8") as f:
+        f.write(LINHA)
+    file_queue.notify(str(arquivo))
+    _aguardar(file_queue)
+    file_queue.stop()
+    assert chamadas == [str(arquivo)] * 2